@@ -16,11 +16,20 @@ validation/generation support.
 - Copr RPM repos: https://copr.fedoraproject.org/coprs/ssato/python-anyconfig/
 
 """
-from .globals import AUTHOR, VERSION
-from .api import (
-    single_load, multi_load, load, loads, dump, dumps, validate, gen_schema,
-    list_types, find_loader, merge, get, set_, open,
-    MS_REPLACE, MS_NO_REPLACE, MS_DICTS, MS_DICTS_AND_LISTS,
+import time as _time
+
+# Wall and CPU time when this package started to be imported, to report time
+# taken to import it and its dependencies with anyconfig_cli --timings.
+_IMPORT_STARTED = (_time.time(),
+                   getattr(_time, "process_time",
+                           getattr(_time, "clock", _time.time))())
+
+from .globals import AUTHOR, VERSION  # noqa: E402
+from .api import (  # noqa: E402
+    single_load, multi_load, load, loads, dump, dumps, compile, preload,
+    validate, validate_many, gen_schema, merge_schema,
+    list_types, find_loader, merge, get, set_, open, compile_schema,
+    MS_REPLACE, MS_NO_REPLACE, MS_DICTS, MS_DICTS_AND_LISTS, FrozenConfig,
     UnknownParserTypeError, UnknownFileTypeError
 )
 
@@ -28,11 +37,13 @@ __author__ = AUTHOR
 __version__ = VERSION
 
 __all__ = [
-    "single_load", "multi_load", "load", "loads", "dump", "dumps", "validate",
-    "gen_schema", "list_types", "find_loader", "merge",
-    "get", "set_", "open",
+    "single_load", "multi_load", "load", "loads", "dump", "dumps", "compile",
+    "preload", "validate",
+    "validate_many",
+    "gen_schema", "merge_schema", "list_types", "find_loader", "merge",
+    "get", "set_", "open", "compile_schema",
     "MS_REPLACE", "MS_NO_REPLACE", "MS_DICTS", "MS_DICTS_AND_LISTS",
-    "UnknownParserTypeError", "UnknownFileTypeError"
+    "FrozenConfig", "UnknownParserTypeError", "UnknownFileTypeError"
 ]
 
 # vim:sw=4:ts=4:et:
@@ -5,6 +5,17 @@
 # pylint: disable=unused-import,import-error,invalid-name
 r"""Public APIs of anyconfig module.
 
+.. versionadded:: 0.9.4
+
+   - ac_dict keyword option accepts immutable mapping classes such as
+     :class:`~anyconfig.dicts.FrozenConfig` to make results immutable.
+   - Added ac_intern keyword option to share identical keys, strings and
+     immutable subtrees among results.
+   - Added :func:`compile` to save snapshots of configs loaded to load them
+     quickly later.
+   - Added :func:`preload` to load configs and keep them shared among
+     processes forked later.
+
 .. versionadded:: 0.8.3
 
    - Added ac_dict keyword option to pass dict factory (any callable like
@@ -58,13 +69,22 @@ r"""Public APIs of anyconfig module.
 """
 from __future__ import absolute_import
 
+import copy
+import functools
+import gc
+import hashlib
+import inspect
+import os
 import os.path
 
 from anyconfig.globals import LOGGER
 import anyconfig.backends
+import anyconfig.backend.base
 import anyconfig.backend.json
+import anyconfig.backend.snapshot
 import anyconfig.compat
 import anyconfig.query
+import anyconfig.stats
 import anyconfig.globals
 import anyconfig.dicts
 import anyconfig.template
@@ -76,9 +96,11 @@ from anyconfig.backends import (
 )
 from anyconfig.dicts import (
     MS_REPLACE, MS_NO_REPLACE, MS_DICTS, MS_DICTS_AND_LISTS, MERGE_STRATEGIES,
-    get, set_, merge # flake8: noqa
+    get, set_, merge, FrozenConfig  # flake8: noqa
+)
+from anyconfig.schema import (
+    validate, validate_many, gen_schema, merge_schema, compile_schema
 )
-from anyconfig.schema import validate, gen_schema
 from anyconfig.utils import is_path
 
 # Re-export and aliases:
@@ -115,6 +137,62 @@ def _maybe_validated(cnf, schema, **options):
     return None
 
 
+def _intern_memo(options):
+    """
+    Replace ac_intern option in `options` with a dict to keep objects shared
+    among results loaded, if it's True.
+
+    :param options: A dict of keyword options
+    :return: A dict to keep objects shared or None if ac_intern is not set
+    """
+    ac_intern = options.get("ac_intern", False)
+    if isinstance(ac_intern, dict):
+        return ac_intern
+    if not ac_intern:
+        return None
+
+    options["ac_intern"] = {}
+    return options["ac_intern"]
+
+
+def _maybe_frozen(func):
+    """
+    Decorator for loading APIs to make results immutable if an immutable
+    mapping class such as :class:`~anyconfig.dicts.FrozenConfig` was given as
+    ac_dict keyword option. Configs are loaded, merged, validated and queried
+    with mutable mapping objects and converted to immutable ones at last as
+    backends and merge functions modify them in place.
+
+    :param func: Loading API function
+    """
+    getargspec = getattr(inspect, "getfullargspec", None) or \
+        getattr(inspect, "getargspec")
+    names = getargspec(func).args
+    idx = names.index("ac_dict") if "ac_dict" in names else None
+
+    @functools.wraps(func)
+    def wrapper(*args, **options):
+        """Wrapper function."""
+        if idx is not None and len(args) > idx:  # ac_dict given positionally.
+            options.update(zip(names[idx:], args[idx:]))
+            args = args[:idx]
+
+        ac_dict = options.get("ac_dict", None)
+        if not anyconfig.dicts.is_immutable_type(ac_dict):
+            return func(*args, **options)
+
+        ac_intern = _intern_memo(options)
+        options["ac_dict"] = None
+        cnf = anyconfig.dicts.convert_to(func(*args, **options),
+                                         ac_dict=ac_dict)
+        if ac_intern is not None:
+            cnf = anyconfig.dicts.intern_objects(cnf, ac_intern)
+
+        return cnf
+
+    return wrapper
+
+
 def version():
     """
     :return: A tuple of version info, (major, minor, release), e.g. (0, 8, 2)
@@ -149,6 +227,125 @@ def find_loader(path_or_stream, parser_or_type=None, is_path_=False):
         raise
 
 
+# Cache of schema objects loaded: {key: schema}
+_SCHEMAS = {}
+_SCHEMAS_MAX = 128
+
+
+def _load_options_key(options):
+    """
+    :param options: Keyword options to load schema objects
+    :return: A tuple of hashable (key, value) pairs of `options` may change
+        schema objects loaded, e.g. ac_query, ac_parser and ac_dict
+    """
+    ret = []
+    for key, val in sorted(options.items()):
+        if key in ("ac_schema", "ac_context") or key.startswith("ac_schema_"):
+            continue  # These do not change schema objects loaded.
+        if key == "ac_intern":
+            val = bool(val)
+        elif key == "ac_parser" and val is not None and \
+                not isinstance(val, anyconfig.compat.STR_TYPES):
+            val = val.type()
+        try:
+            hash(val)
+        except TypeError:
+            val = repr(val)
+        ret.append((key, val))
+
+    return tuple(ret)
+
+
+def _schema_cache_key(schema_src, ptype=None, ac_template=False,
+                      ac_context=None, **options):
+    """
+    Make a key to find the schema object loaded and cached previously. Schema
+    files are keyed by its path and mtime, and schema strings are keyed by the
+    hash of its content, along with load options may change the results.
+
+    :param schema_src: JSON schema file path or its content
+    :param ptype: Parser type to load schema from string `schema_src`
+    :param options:
+        Optional keyword arguments such as ac_dict, ac_ordered and ac_query
+
+    :return: A tuple as a key or None if the schema should not be cached
+    """
+    if ac_template and ac_context:
+        return None  # Rendered results may vary.
+
+    opts = (bool(ac_template), _load_options_key(options))
+
+    if ptype is not None:
+        content = schema_src if isinstance(schema_src, bytes) else \
+            schema_src.encode("utf-8")
+        return (ptype, hashlib.sha1(content).hexdigest()) + opts
+
+    if is_path(schema_src):
+        path = anyconfig.utils.normpath(schema_src)
+        try:
+            stat = os.stat(path)
+        except OSError:  # e.g. glob patterns or missing files.
+            return None
+
+        return (path, stat.st_mtime, stat.st_size) + opts
+
+    return None  # Streams.
+
+
+def _load_schema(load_fn, schema_src, ptype=None, **options):
+    """
+    Load schema object with `load_fn`, or get the one loaded and cached
+    previously if the schema file or content was not changed since then.
+
+    .. note::
+       Schema objects cached are shared among API calls and must not be
+       modified.
+
+    :param load_fn: Callable to load schema object from `schema_src`
+    :param schema_src: JSON schema file path or its content
+    :param ptype: Parser type to load schema from string `schema_src`
+    :param options: Keyword options passed to `load_fn`
+    """
+    key = _schema_cache_key(schema_src, ptype, **options)
+    schema = _SCHEMAS.get(key, None) if key else None
+    if anyconfig.stats.HOOKS:
+        anyconfig.stats.emit("load_schema",
+                             cache="miss" if schema is None else "hit")
+    if schema is None:
+        LOGGER.info("Loading schema: %s", schema_src)
+        schema = load_fn(schema_src, **options)
+        if key and schema is not None:
+            if len(_SCHEMAS) >= _SCHEMAS_MAX:
+                _SCHEMAS.clear()
+            _SCHEMAS[key] = schema
+
+    return schema
+
+
+def _try_render(filepath, ctx=None):
+    """
+    Render the template file `filepath`, decompressed if it's compressed.
+
+    :param filepath: Path to the template file
+    :param ctx: Context dict needed to instantiate templates
+    :return: Compiled result (str) or None
+    """
+    if not anyconfig.backend.base.is_compressed(filepath):
+        return anyconfig.template.try_render(filepath=filepath, ctx=ctx)
+
+    try:
+        with anyconfig.backend.base.open_file(filepath, 'r') as inp:
+            content = inp.read()
+    except (IOError, OSError, UnicodeDecodeError) as exc:
+        LOGGER.warning("Failed to read '%s' as a template: %r", filepath,
+                       exc)
+        return None
+
+    paths = [os.path.dirname(filepath) or os.curdir, os.curdir]
+    return anyconfig.template.try_render(content=content, ctx=ctx,
+                                         paths=paths)
+
+
 def _maybe_schema(**options):
     """
     :param options: Optional keyword arguments such as
@@ -164,8 +361,7 @@ def _maybe_schema(**options):
         # original config file's format, perhaps.
         options["ac_parser"] = None
         options["ac_schema"] = None  # Avoid infinite loop.
-        LOGGER.info("Loading schema: %s", ac_schema)
-        return load(ac_schema, **options)
+        return _load_schema(load, ac_schema, **options)
 
     return None
 
@@ -195,6 +391,7 @@ def open(path, mode=None, ac_parser=None, **options):
     return psr.ropen(path, **options)
 
 
+@_maybe_frozen
 def single_load(path_or_stream, ac_parser=None, ac_template=False,
                 ac_context=None, **options):
     """
@@ -209,7 +406,7 @@ def single_load(path_or_stream, ac_parser=None, ac_template=False,
     :param ac_parser: Forced parser type or parser object itself
     :param ac_template:
         Assume configuration file may be a template file and try to compile it
-        AAR if True
+        AAR if True. Compressed files are rendered after decompressed.
     :param ac_context: A dict presents context to instantiate template
     :param options: Optional keyword arguments such as:
 
@@ -224,14 +421,28 @@ def single_load(path_or_stream, ac_parser=None, ac_template=False,
             ac_ordered (see below) is True and selected backend can keep the
             order of items loaded. See also :meth:`_container_factory` of
             :class:`~anyconfig.backend.base.Parser` for more implementation
-            details.
+            details. If it's an immutable mapping class such as
+            :class:`~anyconfig.dicts.FrozenConfig`, results are converted to
+            objects of it after loaded with any backends.
 
           - ac_ordered: True if you want to keep resuls ordered. Please note
             that order of items may be lost depends on the selected backend.
 
           - ac_schema: JSON schema file path to validate given config file
+          - ac_schema_jobs, ac_schema_chunk_size, ac_schema_max_errors:
+            Options to validate config, see :func:`anyconfig.schema.validate`
           - ac_query: JMESPath expression to query data
 
+          - ac_intern: Intern keys and short string values and share identical
+            immutable leaf subtrees in results if True, to save memory used
+            by many results have same keys and values. A dict may be given to
+            keep objects shared among calls instead of True. See also
+            :func:`anyconfig.dicts.intern_objects`. Objects are interned in
+            a pass after parsed, and mutable mapping objects and lists such
+            as dicts are never shared as modifying one of them would change
+            others; give ac_dict=FrozenConfig as well to share identical
+            blocks, e.g. {"enabled": true, "timeout": 30}.
+
         - Common backend options:
 
           - ignore_missing: Ignore and just return empty result if given file
@@ -241,9 +452,29 @@ def single_load(path_or_stream, ac_parser=None, ac_template=False,
 
     :return: Mapping object
     """
+    if is_path(path_or_stream):
+        tmr = anyconfig.stats.timer()
+        path_or_stream = anyconfig.utils.normpath(path_or_stream)
+        if tmr is not None:
+            tmr.emit("glob", size=1)
+
+    return _single_load(path_or_stream, ac_parser=ac_parser,
+                        ac_template=ac_template, ac_context=ac_context,
+                        **options)
+
+
+def _single_load(path_or_stream, ac_parser=None, ac_template=False,
+                 ac_context=None, **options):
+    """
+    Load single configuration file from the path normalized already or a file
+    or file-like object. See :func:`single_load` for parameters.
+
+    :return: Mapping object
+    """
+    tmr = anyconfig.stats.timer()
     is_path_ = is_path(path_or_stream)
     if is_path_:
-        filepath = path_or_stream = anyconfig.utils.normpath(path_or_stream)
+        filepath = path_or_stream
     else:
         filepath = anyconfig.utils.get_path_from_stream(path_or_stream)
 
@@ -252,17 +483,23 @@ def single_load(path_or_stream, ac_parser=None, ac_template=False,
                            **options)
 
     LOGGER.info("Loading: %s", filepath)
+    content = None
     if ac_template and filepath is not None:
-        content = anyconfig.template.try_render(filepath=filepath,
-                                                ctx=ac_context)
-        if content is not None:
-            cnf = psr.loads(content, **options)
-            return _maybe_validated(cnf, schema, **options)
+        content = _try_render(filepath, ac_context)
+
+    if content is None:
+        cnf = psr.load(path_or_stream, **options)
+    else:
+        cnf = psr.loads(content, **options)
+
+    cnf = _maybe_validated(cnf, schema, **options)
+    if tmr is not None:
+        tmr.emit("load", path=filepath, type=psr.type())
 
-    cnf = psr.load(path_or_stream, **options)
-    return _maybe_validated(cnf, schema, **options)
+    return cnf
 
 
+@_maybe_frozen
 def multi_load(paths, ac_parser=None, ac_template=False, ac_context=None,
                **options):
     """
@@ -304,6 +541,13 @@ def multi_load(paths, ac_parser=None, ac_template=False, ac_context=None,
 
           - ac_marker (marker): Globbing marker to detect paths patterns.
 
+          - ac_schema_fragments: Validate each of configs loaded, fragments,
+            independently with ac_schema by
+            :func:`~anyconfig.schema.validate_many` before merging them
+            instead of the merged one, in parallel if ac_schema_jobs was
+            given. Fragments are copied on merge to keep them intact until
+            validated.
+
         - Common backend options:
 
           - ignore_missing: Ignore and just return empty result if given file
@@ -317,22 +561,39 @@ def multi_load(paths, ac_parser=None, ac_template=False, ac_context=None,
     schema = _maybe_schema(ac_template=ac_template, ac_context=ac_context,
                            **options)
     options["ac_schema"] = None  # Avoid to load schema more than twice.
+    _intern_memo(options)  # Share objects among results.
+
+    tmr = anyconfig.stats.timer()
+    paths = [anyconfig.utils.normpath(p) if is_path(p) else p for p
+             in anyconfig.utils.norm_paths(paths, marker=marker)]
+    if tmr is not None:
+        tmr.emit("glob", size=len(paths))
 
-    paths = anyconfig.utils.norm_paths(paths, marker=marker)
     if anyconfig.utils.are_same_file_types(paths):
         ac_parser = find_loader(paths[0], ac_parser, is_path(paths[0]))
 
+    frags = [] if schema and options.get("ac_schema_fragments") else None
     cnf = ac_context
     for path in paths:
         opts = options.copy()
-        cups = single_load(path, ac_parser=ac_parser,
-                           ac_template=ac_template, ac_context=cnf, **opts)
+        cups = _single_load(path, ac_parser=ac_parser,
+                            ac_template=ac_template, ac_context=cnf, **opts)
         if cups:
+            if frags is not None:
+                frags.append(cups)
+                cups = copy.deepcopy(cups)
             if cnf is None:
                 cnf = cups
             else:
                 merge(cnf, cups, **options)
 
+    if frags is not None:
+        (valid, msgs) = validate_many(frags, schema, **options)
+        if not valid:
+            LOGGER.warning("Fragments not valid: %s", ", ".join(msgs))
+            return None
+        schema = None  # Fragments were validated instead.
+
     if cnf is None:
         return anyconfig.dicts.convert_to({}, **options)
 
@@ -340,6 +601,7 @@ def multi_load(paths, ac_parser=None, ac_template=False, ac_context=None,
     return anyconfig.query.query(cnf, **options)
 
 
+@_maybe_frozen
 def load(path_specs, ac_parser=None, ac_dict=None, ac_template=False,
          ac_context=None, **options):
     r"""
@@ -378,6 +640,7 @@ def load(path_specs, ac_parser=None, ac_dict=None, ac_template=False,
     return anyconfig.query.query(cnf, **options)
 
 
+@_maybe_frozen
 def loads(content, ac_parser=None, ac_dict=None, ac_template=False,
           ac_context=None, **options):
     """
@@ -408,9 +671,9 @@ def loads(content, ac_parser=None, ac_dict=None, ac_template=False,
     ac_schema = options.get("ac_schema", None)
     if ac_schema is not None:
         options["ac_schema"] = None
-        schema = loads(ac_schema, ac_parser=psr, ac_dict=ac_dict,
-                       ac_template=ac_template, ac_context=ac_context,
-                       **options)
+        schema = _load_schema(loads, ac_schema, psr.type(), ac_parser=psr,
+                              ac_dict=ac_dict, ac_template=ac_template,
+                              ac_context=ac_context, **options)
 
     if ac_template:
         compiled = anyconfig.template.try_render(content=content,
@@ -423,6 +686,81 @@ def loads(content, ac_parser=None, ac_dict=None, ac_template=False,
     return anyconfig.query.query(cnf, **options)
 
 
+# pylint: disable=redefined-builtin
+def compile(path_specs, out, **options):
+    """
+    Load configs with :func:`load` and save a snapshot of them to `out`, a
+    file can be loaded as it is much faster than loading configs from sources
+    with templates, merge and validation. Snapshots keep path specs, options
+    and the mtimes and sizes of sources and configs are reloaded from sources
+    on load and the snapshot is updated if any of sources were changed.
+
+    See also :mod:`anyconfig.backend.snapshot`.
+
+    >>> cnf = compile("/etc/xyz/conf.d/*.yml", "/var/cache/xyz.acsnap")
+    ... # doctest: +SKIP
+    >>> load("/var/cache/xyz.acsnap") == cnf  # doctest: +SKIP
+    True
+
+    :param path_specs: Configuration file path or paths or its pattern, must
+        not be file or file-like objects
+    :param out: Path to the snapshot file to save
+    :param options:
+        Optional keyword arguments passed to :func:`load`. Options cannot be
+        serialized in JSON such as ac_dict are refused with
+        :class:`~anyconfig.backend.snapshot.SnapshotError`.
+
+    :return: Mapping object or any query result might be primitive objects
+    """
+    options.setdefault("ac_marker", options.get("marker", '*'))
+    sources = anyconfig.backend.snapshot.list_sources(path_specs, **options)
+    cnf = load(path_specs, **options)
+    anyconfig.backend.snapshot.dump(cnf, out, path_specs, sources, options)
+
+    return cnf
+
+
+def preload(path_specs, **options):
+    """
+    Load configs with :func:`load` in pre-fork servers before forking worker
+    processes, to keep memory pages of configs shared with them.
+
+    Configs are made immutable :class:`~anyconfig.dicts.FrozenConfig`
+    objects with identical keys, strings and subtrees shared (ac_dict and
+    ac_intern options), and objects in the process are moved to the
+    permanent generation with :func:`gc.freeze` (python >= 3.7) after a
+    collection so that the garbage collector does not touch them. Note that
+    reference counts of objects accessed are still updated in processes.
+
+    Configs can be passed to :func:`dump`, :func:`dumps`, :func:`validate`
+    and :func:`gen_schema` as they are; these convert them to dicts with
+    :func:`anyconfig.dicts.thaw` first.
+
+    :param path_specs: Configuration file path or paths or its pattern
+    :param options:
+        Optional keyword arguments passed to :func:`load`, and ac_dict and
+        ac_intern options can be overridden
+
+    :return: A tuple of (mapping object or any query result, size of memory
+        retained by it in bytes)
+    """
+    tmr = anyconfig.stats.timer()
+    options.setdefault("ac_dict", FrozenConfig)
+    options.setdefault("ac_intern", True)
+    cnf = load(path_specs, **options)
+    size = anyconfig.dicts.sizeof(cnf)
+
+    gc.collect()
+    if hasattr(gc, "freeze"):
+        gc.freeze()
+
+    LOGGER.info("Preloaded configs: size=%d", size)
+    if tmr is not None:
+        tmr.emit("preload", size=size)
+
+    return (cnf, size)
+
+
 def _find_dumper(path_or_stream, ac_parser=None):
     """
     Find parser to dump configuration data.
@@ -445,11 +783,14 @@ def dump(data, path_or_stream, ac_parser=None, **options):
     :param options:
         Backend specific optional arguments, e.g. {"indent": 2} for JSON
         loader/dumper backend
+
+    .. note::
+       :class:`~anyconfig.dicts.FrozenConfig` objects are dumped as dicts.
     """
     dumper = _find_dumper(path_or_stream, ac_parser)
     LOGGER.info("Dumping: %s",
                 anyconfig.utils.get_path_from_stream(path_or_stream))
-    dumper.dump(data, path_or_stream, **options)
+    dumper.dump(anyconfig.dicts.thaw(data), path_or_stream, **options)
 
 
 def dumps(data, ac_parser=None, **options):
@@ -462,7 +803,8 @@ def dumps(data, ac_parser=None, **options):
 
     :return: Backend-specific string representation for the given data
     """
-    return _find_dumper(None, ac_parser).dumps(data, **options)
+    return _find_dumper(None, ac_parser).dumps(anyconfig.dicts.thaw(data),
+                                               **options)
 
 
 def query(data, expression, **options):
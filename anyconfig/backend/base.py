@@ -18,6 +18,18 @@ needed:
 
 Changelog:
 
+.. versionchanged:: 0.9.4
+
+   - Add 'ac_intern' option to :meth:`LoaderMixin.load` and
+     :meth:`LoaderMixin.loads` to share identical keys, strings and subtrees.
+   - Add :meth:`LoaderMixin.load_iter` to load configs one by one from
+     files may have multiple documents.
+   - :func:`load_with_fn` does not copy results if these are containers of
+     the type already.
+   - Files compressed with gzip, bzip2 or xz (.gz, .bz2 and .xz) are
+     decompressed and compressed transparently on load and dump, and the
+     compression level can be set with 'ac_compresslevel' option on dump.
+
 .. versionchanged:: 0.9.1
 
    - Rename the member _dict_options to `_dict_opts` to make consistent w/
@@ -37,17 +49,43 @@ Changelog:
 """
 from __future__ import absolute_import
 
+import bz2
 import functools
+import gzip
 import logging
 import os
 
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
 import anyconfig.compat
+import anyconfig.dicts
+import anyconfig.stats
 import anyconfig.utils
 
 
 LOGGER = logging.getLogger(__name__)
 
 
+def _open_xz(filepath, mode, compresslevel=None, **kwargs):
+    """
+    :func:`lzma.open` takes the compression level as `preset`.
+    """
+    if compresslevel is not None:
+        kwargs["preset"] = compresslevel
+    return lzma.open(filepath, mode, **kwargs)
+
+
+# Functions to open compressed files by extensions.
+_COMPRESSED_OPENS = dict(gz=gzip.open)
+if getattr(bz2, "open", None):  # python >= 3.3
+    _COMPRESSED_OPENS["bz2"] = bz2.open
+if lzma is not None:
+    _COMPRESSED_OPENS["xz"] = _open_xz
+
+
 def ensure_outdir_exists(filepath):
     """
     Make dir to dump `filepath` if that dir does not exist.
@@ -84,6 +122,43 @@ def _not_implemented(*args, **kwargs):
     raise NotImplementedError()
 
 
+def is_compressed(filepath):
+    """
+    :param filepath: File path
+    :return: True if `filepath` is a file compressed, e.g. 'a.json.gz'
+
+    >>> is_compressed("a.json.gz"), is_compressed("a.json")
+    (True, False)
+    """
+    return anyconfig.utils.split_compression_ext(filepath)[1] is not None
+
+
+def open_file(filepath, mode, compresslevel=None, **kwargs):
+    """
+    Open a file, and decompress and compress it on read and write in
+    streaming mode if it's a file compressed with gzip, bzip2 or xz.
+
+    :param filepath: File path
+    :param mode: Mode to open the file, e.g. 'r', 'wb'
+    :param compresslevel: Compression level or None to use the default
+    :param kwargs: Keyword options passed to the functions to open files
+    """
+    ext = anyconfig.utils.split_compression_ext(filepath)[1]
+    if ext is None:
+        return open(filepath, mode, **kwargs)
+
+    fnc = _COMPRESSED_OPENS.get(ext)
+    if fnc is None:
+        raise IOError("Compressed files are not supported: %s" % filepath)
+
+    if compresslevel is not None:
+        kwargs["compresslevel"] = compresslevel
+    if 'b' not in mode and anyconfig.compat.IS_PYTHON_3:
+        mode += 't'
+
+    return fnc(filepath, mode, **kwargs)
+
+
 class TextFilesMixin(object):
     """Mixin class to open configuration files as a plain text.
 
@@ -99,14 +174,16 @@ class TextFilesMixin(object):
         """
         :param filepath: Path to file to open to read data
         """
-        return open(filepath, cls._open_flags[0], **kwargs)
+        return open_file(filepath, cls._open_flags[0], **kwargs)
 
     @classmethod
-    def wopen(cls, filepath, **kwargs):
+    def wopen(cls, filepath, compresslevel=None, **kwargs):
         """
         :param filepath: Path to file to open to write data to
+        :param compresslevel: Compression level if it's a compressed file
         """
-        return open(filepath, cls._open_flags[1], **kwargs)
+        return open_file(filepath, cls._open_flags[1],
+                         compresslevel=compresslevel, **kwargs)
 
 
 class BinaryFilesMixin(TextFilesMixin):
@@ -115,6 +192,44 @@ class BinaryFilesMixin(TextFilesMixin):
     _open_flags = ('rb', 'wb')
 
 
+def _maybe_interned(cnf, ac_intern=False, **_options):
+    """
+    :param cnf: Mapping object loaded
+    :param ac_intern: True or a dict to keep objects shared among results to
+        intern objects in `cnf`, see :func:`anyconfig.dicts.intern_objects`
+
+    Objects are interned in a pass after `cnf` was made by backends, not on
+    construction, and only immutable subtrees are shared.
+    """
+    if isinstance(ac_intern, dict):  # It may be empty.
+        return anyconfig.dicts.intern_objects(cnf, ac_intern)
+    if ac_intern:
+        return anyconfig.dicts.intern_objects(cnf)
+
+    return cnf
+
+
+def _emit_io_event(tmr, event, psr, path_or_stream):
+    """
+    Emit an event of loading or dumping a file with its size.
+
+    :param tmr: :class:`anyconfig.stats.Timer` object
+    :param event: Name of the event, 'parse' or 'dump'
+    :param psr: Parser object
+    :param path_or_stream: Config file path or file{,-like} object
+    """
+    path = path_or_stream
+    if not isinstance(path, anyconfig.compat.STR_TYPES):
+        path = anyconfig.utils.get_path_from_stream(path_or_stream)
+
+    try:
+        size = os.path.getsize(path) if path else None
+    except (OSError, TypeError):
+        size = None
+
+    tmr.emit(event, type=getattr(psr, "_type", None), path=path, size=size)
+
+
 class LoaderMixin(object):
     """
     Mixin class to load data.
@@ -235,8 +350,14 @@ class LoaderMixin(object):
         if not content or content is None:
             return container()
 
-        options = self._load_options(container, **options)
-        return self.load_from_string(content, container, **options)
+        tmr = anyconfig.stats.timer()
+        lopts = self._load_options(container, **options)
+        cnf = self.load_from_string(content, container, **lopts)
+        if tmr is not None:
+            tmr.emit("parse", type=getattr(self, "_type", None),
+                     size=anyconfig.stats.nbytes(content))
+
+        return _maybe_interned(cnf, **options)
 
     def load(self, path_or_stream, ignore_missing=False, **options):
         """
@@ -256,18 +377,40 @@ class LoaderMixin(object):
 
         :return: dict or dict-like object holding configurations
         """
+        tmr = anyconfig.stats.timer()
         container = self._container_factory(**options)
-        options = self._load_options(container, **options)
+        lopts = self._load_options(container, **options)
 
         if isinstance(path_or_stream, anyconfig.compat.STR_TYPES):
             if ignore_missing and not os.path.exists(path_or_stream):
                 return container()
 
-            cnf = self.load_from_path(path_or_stream, container, **options)
+            if is_compressed(path_or_stream):
+                with self.ropen(path_or_stream) as inp:
+                    cnf = self.load_from_stream(inp, container, **lopts)
+            else:
+                cnf = self.load_from_path(path_or_stream, container, **lopts)
         else:
-            cnf = self.load_from_stream(path_or_stream, container, **options)
+            cnf = self.load_from_stream(path_or_stream, container, **lopts)
 
-        return cnf
+        if tmr is not None:
+            _emit_io_event(tmr, "parse", self, path_or_stream)
+
+        return _maybe_interned(cnf, **options)
+
+    def load_iter(self, path_or_stream, **options):
+        """
+        Load configs from a file path or a file / file-like object
+        `path_or_stream` and yield them one by one. Parsers can load
+        multiple documents in a file (stream) override this, and this yields
+        the result of :meth:`load` only by default.
+
+        :param path_or_stream: Config file path or file{,-like} object
+        :param options: Keyword options passed to :meth:`load`
+
+        :return: A generator yields dict or dict-like objects
+        """
+        yield self.load(path_or_stream, **options)
 
 
 class DumperMixin(object):
@@ -328,8 +471,14 @@ class DumperMixin(object):
 
         :return: string represents the configuration
         """
+        tmr = anyconfig.stats.timer()
         kwargs = anyconfig.utils.filter_options(self._dump_opts, kwargs)
-        return self.dump_to_string(cnf, **kwargs)
+        content = self.dump_to_string(cnf, **kwargs)
+        if tmr is not None:
+            tmr.emit("dump", type=getattr(self, "_type", None),
+                     size=anyconfig.stats.nbytes(content))
+
+        return content
 
     def dump(self, cnf, path_or_stream, **kwargs):
         """
@@ -338,17 +487,28 @@ class DumperMixin(object):
 
         :param cnf: Configuration data to dump
         :param path_or_stream: Config file path or file{,-like} object
-        :param kwargs: optional keyword parameters to be sanitized :: dict
+        :param kwargs: optional keyword parameters to be sanitized :: dict,
+            and 'ac_compresslevel' to set the compression level on dump to
+            compressed files such as 'a.json.gz'
         :raises IOError, OSError, AttributeError: When dump failed.
         """
+        tmr = anyconfig.stats.timer()
+        level = kwargs.get("ac_compresslevel", None)
         kwargs = anyconfig.utils.filter_options(self._dump_opts, kwargs)
 
         if isinstance(path_or_stream, anyconfig.compat.STR_TYPES):
             ensure_outdir_exists(path_or_stream)
-            self.dump_to_path(cnf, path_or_stream, **kwargs)
+            if is_compressed(path_or_stream):
+                with self.wopen(path_or_stream, compresslevel=level) as out:
+                    self.dump_to_stream(cnf, out, **kwargs)
+            else:
+                self.dump_to_path(cnf, path_or_stream, **kwargs)
         else:
             self.dump_to_stream(cnf, path_or_stream, **kwargs)
 
+        if tmr is not None:
+            _emit_io_event(tmr, "dump", self, path_or_stream)
+
 
 class Parser(TextFilesMixin, LoaderMixin, DumperMixin):
     """
@@ -554,7 +714,10 @@ def load_with_fn(load_fn, content_or_strm, container, **options):
     :return: container object holding data
     """
     ret = load_fn(content_or_strm, **options)
-    return container() if ret is None else container(ret)
+    if ret is None:
+        return container()
+
+    return ret if type(ret) is container else container(ret)
 
 
 def dump_with_fn(dump_fn, data, stream, **options):
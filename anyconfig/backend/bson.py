@@ -20,8 +20,20 @@ r"""BSON backend:
 
   - See also: https://api.mongodb.org/python/current/api/bson/
 
+- Multiple documents: :meth:`Parser.load` and :meth:`Parser.loads` decode
+  only the first document, and :meth:`Parser.load_iter` decodes documents
+  in a file or a file-like object one by one with
+  :func:`bson.decode_file_iter`.
+
 Changelog:
 
+.. versionchanged:: 0.9.4
+
+   - decode only the first document instead of all and do not copy it if it's
+     a container of the type already
+   - added :meth:`Parser.load_iter` to decode multiple documents in streaming
+     mode
+
 .. versionchanged:: 0.8.3
 
    - follow changes of options of bson.BSON.{encode,decode} in its upstream and
@@ -40,14 +52,22 @@ Changelog:
 """
 from __future__ import absolute_import
 
+import struct
+
 import bson
 import anyconfig.backend.base
+import anyconfig.compat
 import anyconfig.utils
 
+from anyconfig.backend.base import _maybe_interned
+
 
 _CO_OPTIONS = ("document_class", "tz_aware", "uuid_representation",
                "unicode_decode_error_handler", "tzinfo")
 
+# BSON documents start with the total length of them (int32, little endian).
+_DOC_LEN = struct.Struct("<i")
+
 
 def _codec_options(**options):
     """
@@ -59,6 +79,17 @@ def _codec_options(**options):
     return bson.CodecOptions(**opts)
 
 
+def _first_document(content):
+    """
+    :param content: BSON data may have multiple documents
+    :return: The first document in `content`, a byte string
+    """
+    if len(content) < _DOC_LEN.size:
+        return bytes(content)  # Broken and decoding it should fail.
+
+    return bytes(content[:_DOC_LEN.unpack_from(content, 0)[0]])
+
+
 class Parser(anyconfig.backend.base.StringParser,
              anyconfig.backend.base.BinaryFilesMixin):
     """
@@ -90,18 +121,44 @@ class Parser(anyconfig.backend.base.StringParser,
         :param container: callble to make a container object
         :param kwargs: optional keyword parameters
 
-        :return: Dict-like object holding config parameters
+        :return: Dict-like object holding config parameters, empty if
+            `content` is empty as :meth:`loads` does
         """
+        if not len(content):  # pylint: disable=len-as-condition
+            return container()
+
+        doc = bson.BSON(_first_document(content))
         if self._load_opts:  # indicates that C extension is not used.
-            objs = bson.decode_all(content, **kwargs)
+            cnf = doc.decode(**kwargs)
         else:
             # .. note::
             #    The order of loaded configuration keys may be lost but
             #    there is no way to avoid that, AFAIK.
-            objs = [container(x) for x in bson.decode_all(content)
-                    if x is not None]
+            cnf = doc.decode()
+
+        return cnf if type(cnf) is container else container(cnf)
 
-        return objs[0] if objs else None
+    def load_iter(self, path_or_stream, **options):
+        """
+        Decode BSON documents in `path_or_stream` one by one.
+
+        :param path_or_stream: Config file path or file{,-like} object
+        :param options: optional keyword parameters
+
+        :return: A generator yields dict-like objects
+        """
+        if isinstance(path_or_stream, anyconfig.compat.STR_TYPES):
+            with self.ropen(path_or_stream) as inp:
+                for cnf in self.load_iter(inp, **options):
+                    yield cnf
+            return
+
+        container = self._container_factory(**options)
+        lopts = self._load_options(container, **options)
+        for cnf in bson.decode_file_iter(path_or_stream, **lopts):
+            if type(cnf) is not container:
+                cnf = container(cnf)
+            yield _maybe_interned(cnf, **options)
 
     def dump_to_string(self, cnf, **kwargs):
         """Dump BSON data `cnf` to a string.
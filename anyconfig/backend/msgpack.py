@@ -17,17 +17,97 @@ r"""MessagePack backend:
 
   - See also: http://pythonhosted.org/msgpack-python/api.html
 
+- Streaming: :meth:`Parser.load_iter` loads multiple objects concatenated in
+  a file, a file-like object or a bytes-like object such as memoryview and
+  mmap objects with :class:`msgpack.Unpacker` and yields them one by one, or
+  yields items of top level maps if ac_items option is True, so that huge
+  files can be processed without loading them entirely. Pass
+  use_list=False to make arrays tuples cheaper than lists.
+
 Changelog:
 
+    .. versionchanged:: 0.9.4
+
+       - Added :meth:`Parser.load_iter` to load objects with
+         :class:`msgpack.Unpacker` in streaming mode.
+       - Accept bytes-like objects such as memoryview and mmap objects on
+         load, and mmap files instead of reading them entirely.
+       - Results are not copied if these are containers of the type already.
+
     .. versionadded:: 0.0.11
 """
 from __future__ import absolute_import
 
+import mmap
+import os
+
 import msgpack
 import anyconfig.backend.base
 import anyconfig.compat
 
-from anyconfig.backend.base import to_method
+from anyconfig.backend.base import to_method, _maybe_interned
+
+
+_READ_SIZE = 1024 * 1024
+
+
+class _BufferReader(object):
+    """
+    File-like object reads chunks of a bytes-like object without copying it
+    entirely.
+    """
+
+    def __init__(self, content):
+        """
+        :param content: A bytes-like object such as memoryview and mmap
+        """
+        self._view = memoryview(content)
+        self._pos = 0
+
+    def read(self, size=-1):
+        """
+        :param size: Max size to read or -1 to read all of the rest
+        :return: A byte string
+        """
+        end = len(self._view) if size < 0 else self._pos + size
+        chunk = self._view[self._pos:end].tobytes()
+        self._pos += len(chunk)
+        return chunk
+
+
+def _is_path(obj):
+    """
+    :param obj: Config file path, file{,-like} object or bytes-like object
+    :return: True if `obj` is a path
+
+    Byte strings are str in python 2 and these are paths only if files exist
+    there, or these are regarded as bytes-like objects to load.
+
+    >>> _is_path(u"/a/b.msgpack"), _is_path(memoryview(b"\\x80"))
+    (True, False)
+    """
+    if not isinstance(obj, anyconfig.compat.STR_TYPES):
+        return False
+
+    if isinstance(obj, bytes):  # python 2.
+        return b"\0" not in obj and os.path.isfile(obj)
+
+    return True
+
+
+def _iter_items(unpacker):
+    """
+    :param unpacker: :class:`msgpack.Unpacker` object
+    :return: A generator yields pairs of (key, value) of top level maps
+    """
+    while True:
+        try:
+            nitems = unpacker.read_map_header()
+        except msgpack.OutOfData:
+            return
+
+        for _ in range(nitems):
+            yield (unpacker.unpack(), unpacker.unpack())
 
 
 class Parser(anyconfig.backend.base.StringStreamFnParser,
@@ -37,10 +117,11 @@ class Parser(anyconfig.backend.base.StringStreamFnParser,
     """
     _type = "msgpack"
     _extensions = []
-    _load_opts = ["read_size", "use_list", "object_hook", "list_hook",
-                  "encoding", "unicode_errors", "max_buffer_size", "ext_hook",
-                  "max_str_len", "max_bin_len", "max_array_len", "max_map_len",
-                  "max_ext_len", "object_pairs_hook"]
+    _load_opts = ["read_size", "use_list", "raw", "strict_map_key",
+                  "object_hook", "list_hook", "unicode_errors",
+                  "max_buffer_size", "ext_hook", "max_str_len", "max_bin_len",
+                  "max_array_len", "max_map_len", "max_ext_len",
+                  "object_pairs_hook"]
     _dump_opts = ["default", "encoding", "unicode_errors", "use_single_float",
                   "autoreset", "use_bin_type"]
     _ordered = not anyconfig.compat.IS_PYTHON_3  # TODO.
@@ -51,4 +132,58 @@ class Parser(anyconfig.backend.base.StringStreamFnParser,
     _dump_to_string_fn = to_method(msgpack.packb)
     _dump_to_stream_fn = to_method(msgpack.pack)
 
+    def load_from_path(self, filepath, container, **options):
+        """
+        Load data from the file `filepath` mmapped not to read it entirely.
+
+        :param filepath: Config file path
+        :param container: callble to make a container object
+        :param options: keyword options passed to msgpack.unpackb
+
+        :return: container object holding the configuration data
+        """
+        with self.ropen(filepath) as inp:
+            if not os.fstat(inp.fileno()).st_size:
+                return container()
+
+            buf = mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                return self.load_from_string(buf, container, **options)
+            finally:
+                buf.close()
+
+    def load_iter(self, path_or_stream, ac_items=False, **options):
+        """
+        Load objects concatenated in `path_or_stream` one by one with
+        :class:`msgpack.Unpacker` in streaming mode.
+
+        :param path_or_stream:
+            Config file path, file{,-like} object or bytes-like object such as
+            memoryview and mmap objects
+        :param ac_items: Yield pairs of (key, value) of top level maps instead
+        :param options: keyword options passed to :class:`msgpack.Unpacker`
+
+        :return: A generator yields container objects or pairs of (key, value)
+        """
+        container = self._container_factory(**options)
+        lopts = self._load_options(container, **options)
+        lopts.setdefault("read_size", _READ_SIZE)
+
+        if _is_path(path_or_stream):
+            with self.ropen(path_or_stream) as inp:
+                for obj in self.load_iter(inp, ac_items, **options):
+                    yield obj
+            return
+
+        if not callable(getattr(path_or_stream, "read", None)):
+            path_or_stream = _BufferReader(path_or_stream)
+
+        unpacker = msgpack.Unpacker(path_or_stream, **lopts)
+        if ac_items:
+            for key, val in _iter_items(unpacker):
+                yield (key, _maybe_interned(val, **options))
+        else:
+            for obj in unpacker:
+                yield _maybe_interned(obj, **options)
+
 # vim:sw=4:ts=4:et:
@@ -15,14 +15,35 @@ r"""Pickle backend:
 
 - Development Status :: 4 - Beta
 - Limitations: None obvious
-- Special options: All options of pickle.{load{s,},dump{s,}} should work.
+- Special options:
+
+  - All options of pickle.{load{s,},dump{s,}} should work.
+
+  - ac_pickle_buffers: Dump large buffers, objects reduced to
+    pickle.PickleBuffer such as numpy arrays, out-of-band with pickle
+    protocol 5 (python >= 3.8) into the sidecar file, '<path>.buffers', on
+    dump to files. The sidecar file is mmapped
+    (copy-on-write) and buffers are passed to pickle.load without copies on
+    load if it exists. ValueError is raised if it's given on dump to
+    strings, streams and compressed files.
 
 Changelog:
 
+    .. versionchanged:: 0.9.4
+
+       - Added ac_pickle_buffers option to dump large buffers out-of-band
+         and load them without copies.
+
     .. versionadded:: 0.8.3
 """
 from __future__ import absolute_import
 
+import logging
+import mmap
+import os
+import struct
+import tempfile
+
 try:
     import cPickle as pickle
 except ImportError:
@@ -32,13 +53,112 @@ import anyconfig.backend.base
 import anyconfig.compat
 
 
+LOGGER = logging.getLogger(__name__)
+
 if anyconfig.compat.IS_PYTHON_3:
     LOAD_OPTS = ["fix_imports", "encoding", "errors"]
-    DUMP_OPTS = ["protocol", "fix_imports"]
+    DUMP_OPTS = ["protocol", "fix_imports", "ac_pickle_buffers"]
 else:
     LOAD_OPTS = []
     DUMP_OPTS = ["protocol"]
 
+# Pickle protocol 5 supports out-of-band buffers.
+OOB_PROTOCOL = 5
+HAS_OOB = pickle.HIGHEST_PROTOCOL >= OOB_PROTOCOL
+
+# Sidecar files: magic, number of buffers, pairs of offset and size of each
+# buffer and buffers aligned.
+BUFFERS_EXT = ".buffers"
+_BUF_MAGIC = b"ACPKBUF1"
+_BUF_CNT = struct.Struct(">Q")
+_BUF_ENT = struct.Struct(">QQ")
+_BUF_ALIGN = 64
+
+
+def buffers_path(filepath):
+    """
+    :param filepath: Path to the pickle file
+    :return: Path to the sidecar file of out-of-band buffers
+    """
+    return filepath + BUFFERS_EXT
+
+
+def _aligned(offset):
+    """
+    >>> _aligned(0), _aligned(1), _aligned(64)
+    (0, 64, 64)
+    """
+    return (offset + _BUF_ALIGN - 1) // _BUF_ALIGN * _BUF_ALIGN
+
+
+def dump_buffers(buffers, filepath):
+    """
+    Save out-of-band buffers to the sidecar file.
+
+    :param buffers: A list of contiguous memoryview objects
+    :param filepath: Path to the sidecar file
+    """
+    offset = _aligned(len(_BUF_MAGIC) + _BUF_CNT.size +
+                      _BUF_ENT.size * len(buffers))
+    entries = []
+    for buf in buffers:
+        entries.append(_BUF_ENT.pack(offset, buf.nbytes))
+        offset = _aligned(offset + buf.nbytes)
+
+    with open(filepath, "wb") as out:
+        out.write(_BUF_MAGIC + _BUF_CNT.pack(len(buffers)) +
+                  b"".join(entries))
+        for buf in buffers:
+            out.seek(_aligned(out.tell()))
+            out.write(buf)
+
+
+def load_buffers(filepath):
+    """
+    Load out-of-band buffers from the sidecar file mmapped in copy-on-write
+    mode; buffers are writable but changes are not saved.
+
+    :param filepath: Path to the sidecar file
+    :return: A list of memoryview objects refer to the mmapped file
+    """
+    with open(filepath, "rb") as inp:
+        view = memoryview(mmap.mmap(inp.fileno(), 0,
+                                    access=mmap.ACCESS_COPY))
+
+    start = len(_BUF_MAGIC) + _BUF_CNT.size
+    if view[:len(_BUF_MAGIC)].tobytes() != _BUF_MAGIC:
+        raise ValueError("Not a file of pickle buffers: %s" % filepath)
+
+    nbufs = _BUF_CNT.unpack_from(view, len(_BUF_MAGIC))[0]
+    entries = (_BUF_ENT.unpack_from(view, start + _BUF_ENT.size * idx)
+               for idx in range(nbufs))
+    return [view[off:off + size] for off, size in entries]
+
+
+def _check_no_buffers(options):
+    """
+    :param options: A dict of keyword options to dump
+    :raises: ValueError if ac_pickle_buffers is True in `options`
+    """
+    if options.pop("ac_pickle_buffers", False):
+        raise ValueError("ac_pickle_buffers is only supported on dump to "
+                         "files not compressed")
+
+
+def _mkstemp(filepath):
+    """
+    :param filepath: Path to the file to replace with the temporary file
+    :return: Path to the temporary file made in the same dir as `filepath`
+        with the mode of it if exists
+    """
+    mode = os.stat(filepath).st_mode & 0o777 if os.path.exists(filepath) \
+        else 0o644
+    (fdsc, tmp) = tempfile.mkstemp(dir=os.path.dirname(filepath) or '.',
+                                   prefix=".acpkl-")
+    os.close(fdsc)
+    os.chmod(tmp, mode)
+    return tmp
+
 
 class Parser(anyconfig.backend.base.StringStreamFnParser,
              anyconfig.backend.base.BinaryFilesMixin):
@@ -55,4 +175,113 @@ class Parser(anyconfig.backend.base.StringStreamFnParser,
     _dump_to_string_fn = anyconfig.backend.base.to_method(pickle.dumps)
     _dump_to_stream_fn = anyconfig.backend.base.to_method(pickle.dump)
 
+    def load_from_path(self, filepath, container, **options):
+        """
+        Load data from the file `filepath` with out-of-band buffers in the
+        sidecar file if it exists.
+
+        :param filepath: Pickle file path
+        :param container: callble to make a container object
+        :param options: keyword options passed to pickle.load
+
+        :return: container object holding the configuration data
+        """
+        if HAS_OOB and os.path.exists(buffers_path(filepath)):
+            options["buffers"] = load_buffers(buffers_path(filepath))
+
+        with self.ropen(filepath) as inp:
+            return self.load_from_stream(inp, container, **options)
+
+    def dump_to_string(self, cnf, **kwargs):
+        """
+        Dump config `cnf` to a string.
+
+        :param cnf: Configuration data to dump
+        :param kwargs: keyword options passed to pickle.dumps
+
+        :return: string represents the configuration
+        :raises: ValueError if ac_pickle_buffers is True
+        """
+        _check_no_buffers(kwargs)
+        return super(Parser, self).dump_to_string(cnf, **kwargs)
+
+    def dump_to_stream(self, cnf, stream, **kwargs):
+        """
+        Dump config `cnf` to a stream.
+
+        :param cnf: Configuration data to dump
+        :param stream: Config file or file like object
+        :param kwargs: keyword options passed to pickle.dump
+        :raises: ValueError if ac_pickle_buffers is True
+        """
+        _check_no_buffers(kwargs)
+        super(Parser, self).dump_to_stream(cnf, stream, **kwargs)
+
+    def dump(self, cnf, path_or_stream, **kwargs):
+        """
+        Dump config `cnf` to a filepath or file-like object `path_or_stream`.
+
+        :param cnf: Configuration data to dump
+        :param path_or_stream: Config file path or file{,-like} object
+        :param kwargs: keyword options, see the base class
+        :raises: ValueError if ac_pickle_buffers is True and `path_or_stream`
+            is not a path of a file not compressed
+        """
+        if kwargs.get("ac_pickle_buffers", False) and \
+                (not isinstance(path_or_stream, anyconfig.compat.STR_TYPES) or
+                 anyconfig.backend.base.is_compressed(path_or_stream)):
+            _check_no_buffers(kwargs)  # Before opening the file to dump.
+
+        super(Parser, self).dump(cnf, path_or_stream, **kwargs)
+
+    def dump_to_path(self, cnf, filepath, ac_pickle_buffers=False,
+                     **kwargs):
+        """
+        Dump config `cnf` to a file `filepath`, and dump out-of-band buffers
+        into the sidecar file if `ac_pickle_buffers` is True.
+
+        Both are written to temporary files and renamed to them, so that
+        files are not broken if it failed.
+
+        :param cnf: Configuration data to dump
+        :param filepath: Config file path
+        :param ac_pickle_buffers: Dump large buffers out-of-band
+        :param kwargs: keyword options passed to pickle.dump
+        """
+        buffers = None
+        if ac_pickle_buffers and not HAS_OOB:
+            LOGGER.warning("Pickle protocol %d is not available and buffers "
+                           "are dumped in-band", OOB_PROTOCOL)
+        elif ac_pickle_buffers:
+            buffers = []
+
+            def _callback(pbuf):
+                """Keep contiguous buffers and dump others in-band."""
+                try:
+                    buffers.append(pbuf.raw())
+                except BufferError:
+                    return True
+                return False
+
+            kwargs["protocol"] = max(kwargs.get("protocol") or 0,
+                                     OOB_PROTOCOL)
+            kwargs["buffer_callback"] = _callback
+
+        bpath = buffers_path(filepath)
+        tmps = [_mkstemp(filepath)]
+        try:
+            with self.wopen(tmps[0]) as out:
+                self.dump_to_stream(cnf, out, **kwargs)
+            if buffers is not None:
+                tmps.append(_mkstemp(bpath))
+                dump_buffers(buffers, tmps[1])
+                os.rename(tmps.pop(), bpath)
+            os.rename(tmps.pop(), filepath)
+        finally:
+            for tmp in tmps:
+                os.remove(tmp)
+
+        if buffers is None and os.path.exists(bpath):
+            os.remove(bpath)  # Stale buffers of the previous one.
+
 # vim:sw=4:ts=4:et:
@@ -0,0 +1,323 @@
+#
+# Copyright (C) 2017 Satoru SATOH <ssato @ redhat.com>
+# License: MIT
+#
+r"""Snapshot backend:
+
+- Format to support: Snapshots of configs compiled by
+  :func:`anyconfig.api.compile`, loaded, merged and validated already
+- Requirements: It should be available always (marshal and pickle in the
+  python standard library are used).
+- Development Status :: 3 - Alpha
+- Limitations:
+
+  - Snapshots are specific to python versions; these made with other
+    versions are regarded as stale and configs are reloaded from sources.
+  - Templates included from template config files are not tracked as
+    sources and changes of them are not detected.
+  - Snapshots may contain pickled data so that snapshots from untrusted
+    sources must not be loaded, same as pickle files.
+
+- Special options:
+
+  - ac_snapshot_check: Check if sources were changed (modified, added or
+    removed) since the snapshot was made, and reload configs from them and
+    update the snapshot if so. True by default.
+
+Format: A snapshot consists of a magic string, b'ACSNAP1\\n', the length of
+the header (unsigned 32 bit int in big endian), the header (JSON) and the
+payload, data serialized with marshal or pickle (if marshal cannot).
+
+The header has the following keys:
+
+- format: 'marshal' or 'pickle'
+- python: Version of python, e.g. '3.6'
+- sha256: SHA-256 digest of the payload
+- sources: List of [path, mtime, size] of sources, input files and schema
+- path_specs: Path specs passed to :func:`anyconfig.api.compile` or null
+- options: Options passed to :func:`anyconfig.api.compile` to reload configs
+  (options cannot be serialized in JSON, e.g. ac_dict and ac_context of
+  objects, are refused)
+
+Changelog:
+
+    .. versionadded:: 0.9.4
+"""
+from __future__ import absolute_import
+
+import hashlib
+import json
+import logging
+import marshal
+import os
+import os.path
+import struct
+import sys
+import tempfile
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+import anyconfig.backend.base
+import anyconfig.utils
+
+
+LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"ACSNAP1\n"
+_HDR_LEN = struct.Struct(">I")
+_PYTHON = "%d.%d" % sys.version_info[:2]
+
+
+class SnapshotError(ValueError):
+    """Raise if given data is not a snapshot or broken."""
+    pass
+
+
+def list_sources(path_specs, ac_schema=None, ac_marker='*', **_options):
+    """
+    :param path_specs: Path specs passed to :func:`anyconfig.api.load`
+    :param ac_schema: Path to the schema file or None
+    :param ac_marker: Glob marker to detect path patterns
+    :return: List of [path, mtime, size] of sources
+    """
+    paths = anyconfig.utils.norm_paths(path_specs, marker=ac_marker)
+    if not all(anyconfig.utils.is_path(p) for p in paths):
+        raise ValueError("Sources must be paths: %r" % path_specs)
+
+    if anyconfig.utils.is_path(ac_schema):
+        paths.append(ac_schema)
+
+    sources = []
+    for path in paths:
+        path = os.path.abspath(anyconfig.utils.normpath(path))
+        try:
+            stt = os.stat(path)
+            sources.append([path, stt.st_mtime, stt.st_size])
+        except OSError:  # Missing files may be ignored on load.
+            sources.append([path, None, None])
+
+    return sources
+
+
+def _jsonable_options(options):
+    """
+    :param options: A dict of keyword options
+    :return: A dict of options can be serialized in JSON
+    :raises: SnapshotError if some of options cannot be serialized in JSON
+        because configs reloaded without them may differ
+    """
+    for key, val in options.items():
+        try:
+            json.dumps(val)
+        except (TypeError, ValueError):
+            raise SnapshotError("Option '%s' cannot be kept in snapshots: "
+                                "%r" % (key, val))
+
+    return options
+
+
+def dumps(cnf, path_specs=None, sources=None, options=None):
+    """
+    Make a snapshot of `cnf`.
+
+    :param cnf: Mapping object represents configs
+    :param path_specs: Path specs configs were loaded from or None
+    :param sources: List of [path, mtime, size] of sources
+    :param options: A dict of options to reload configs from sources
+
+    :return: Snapshot data, a byte string
+    """
+    try:
+        (fmt, payload) = ("marshal", marshal.dumps(cnf))
+    except ValueError:  # It has objects marshal cannot serialize.
+        (fmt, payload) = ("pickle",
+                          pickle.dumps(cnf, pickle.HIGHEST_PROTOCOL))
+
+    if path_specs is not None and not isinstance(path_specs, list):
+        path_specs = [path_specs]
+
+    hdr = dict(format=fmt, python=_PYTHON,
+               sha256=hashlib.sha256(payload).hexdigest(),
+               sources=sources or [], path_specs=path_specs,
+               options=_jsonable_options(options or {}))
+    hdr = json.dumps(hdr).encode("utf-8")
+
+    return MAGIC + _HDR_LEN.pack(len(hdr)) + hdr + payload
+
+
+def dump(cnf, filepath, path_specs=None, sources=None, options=None):
+    """
+    Save a snapshot of `cnf` to `filepath` atomically; readers never see
+    snapshots partially written.
+
+    :param filepath: Path to the snapshot file
+    :param cnf, path_specs, sources, options: See :func:`dumps`
+    """
+    content = dumps(cnf, path_specs, sources, options)
+    mode = os.stat(filepath).st_mode & 0o777 if os.path.exists(filepath) \
+        else 0o644
+    (fdsc, tmp) = tempfile.mkstemp(dir=os.path.dirname(filepath) or '.',
+                                   prefix=".acsnap-")
+    try:
+        with os.fdopen(fdsc, "wb") as out:
+            out.write(content)
+        os.chmod(tmp, mode)
+        os.rename(tmp, filepath)
+    except (IOError, OSError):
+        os.remove(tmp)
+        raise
+
+
+def load_header(content):
+    """
+    :param content: Snapshot data, a byte string
+    :return: A tuple of (header, a dict, payload, a byte string)
+    :raises: :class:`SnapshotError` if `content` is not a snapshot or broken
+    """
+    start = len(MAGIC) + _HDR_LEN.size
+    if not content.startswith(MAGIC) or len(content) < start:
+        raise SnapshotError("Not a snapshot")
+
+    end = start + _HDR_LEN.unpack(content[len(MAGIC):start])[0]
+    try:
+        hdr = json.loads(content[start:end].decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        raise SnapshotError("Broken header of the snapshot")
+
+    if not isinstance(hdr, dict):
+        raise SnapshotError("Broken header of the snapshot")
+
+    payload = content[end:]
+    if hashlib.sha256(payload).hexdigest() != hdr.get("sha256"):
+        raise SnapshotError("Broken payload of the snapshot")
+
+    return (hdr, payload)
+
+
+def is_stale(hdr):
+    """
+    :param hdr: A dict of the header of a snapshot
+    :return: True if sources were changed, added or removed since the snapshot
+        was made or it was made with other python version
+    """
+    if hdr.get("python") != _PYTHON:
+        return True
+
+    path_specs = hdr.get("path_specs")
+    if path_specs is None:
+        return False
+
+    try:
+        return list_sources(path_specs, **hdr["options"]) != hdr["sources"]
+    except ValueError:
+        return True
+
+
+def _loads_payload(hdr, payload):
+    """
+    :param hdr: A dict of the header of a snapshot
+    :param payload: Payload of the snapshot
+    """
+    if hdr["format"] == "marshal":
+        return marshal.loads(payload)
+
+    return pickle.loads(payload)
+
+
+def _reload(hdr, filepath=None):
+    """
+    Reload configs from sources and update the snapshot if possible.
+
+    :param hdr: A dict of the header of a snapshot
+    :param filepath: Path to the snapshot file or None
+    :return: Mapping object represents configs
+    """
+    import anyconfig.api  # Avoid circular imports.
+
+    if not hdr.get("path_specs"):
+        raise SnapshotError("Cannot reload as sources are unknown")
+
+    LOGGER.info("Sources were changed, reloading: %s",
+                ", ".join(hdr["path_specs"]))
+    if filepath is None:
+        return anyconfig.api.load(hdr["path_specs"], **hdr["options"])
+
+    try:
+        return anyconfig.api.compile(hdr["path_specs"], filepath,
+                                     **hdr["options"])
+    except (IOError, OSError) as exc:
+        LOGGER.warning("Failed to update the snapshot: %s: %r", filepath, exc)
+        return anyconfig.api.load(hdr["path_specs"], **hdr["options"])
+
+
+class Parser(anyconfig.backend.base.StringParser,
+             anyconfig.backend.base.BinaryFilesMixin):
+    """
+    Loader and dumper of snapshots.
+    """
+    _type = "snapshot"
+    _extensions = ["acsnap"]
+    _load_opts = ["ac_snapshot_check"]
+
+    def _load(self, content, container, filepath=None,
+              ac_snapshot_check=True):
+        """
+        :param content: Snapshot data, a byte string
+        :param container: callble to make a container object
+        :param filepath: Path to the snapshot file or None
+        :param ac_snapshot_check: Check if the snapshot is stale
+        """
+        (hdr, payload) = load_header(content)
+        stale = is_stale(hdr) if ac_snapshot_check else \
+            hdr.get("python") != _PYTHON
+        if stale:
+            cnf = _reload(hdr, filepath)
+        else:
+            cnf = _loads_payload(hdr, payload)
+
+        if cnf is None:
+            return container()
+
+        return cnf if type(cnf) is container else container(cnf)
+
+    def load_from_string(self, content, container, **options):
+        """
+        Load config from given snapshot data `content`.
+
+        :param content: Snapshot data, a byte string
+        :param container: callble to make a container object
+        :param options: keyword options may have 'ac_snapshot_check'
+
+        :return: Dict-like object holding config parameters
+        """
+        return self._load(content, container, **options)
+
+    def load_from_path(self, filepath, container, **options):
+        """
+        Load config from the snapshot file `filepath` and update the file if
+        it's stale.
+
+        :param filepath: Path to the snapshot file
+        :param container: callble to make a container object
+        :param options: keyword options may have 'ac_snapshot_check'
+
+        :return: Dict-like object holding config parameters
+        """
+        with self.ropen(filepath) as inp:
+            return self._load(inp.read(), container, filepath, **options)
+
+    def dump_to_string(self, cnf, **kwargs):
+        """
+        Make a snapshot of `cnf` does not have info of sources.
+
+        :param cnf: Configuration data to dump
+        :param kwargs: optional keyword parameters (ignored)
+
+        :return: Snapshot data, a byte string
+        """
+        return dumps(cnf)
+
+# vim:sw=4:ts=4:et:
@@ -41,6 +41,11 @@ r"""XML backend:
 
 Changelog:
 
+.. versionchanged:: 0.9.4
+
+   - Load from streams of compressed files and others cannot be opened again
+     by their paths
+
 .. versionchanged:: 0.8.2
 
    - Add special options, tags, merge_attrs and ac_parse_value
@@ -478,14 +483,15 @@ class Parser(anyconfig.backend.base.Parser,
         Load config from XML snippet (a string `content`).
 
         :param content:
-            XML snippet string of str (python 2) or bytes (python 3) type
+            XML snippet string of str (python 2) or bytes (python 3) type,
+            or text string read from streams opened in text mode
         :param container: callble to make a container object
         :param opts: optional keyword parameters passed to
 
         :return: Dict-like object holding config parameters
         """
         root = ET.fromstring(content)
-        if anyconfig.compat.IS_PYTHON_3:
+        if isinstance(content, bytes):
             stream = BytesIO(content)
         else:
             stream = anyconfig.compat.StringIO(content)
@@ -514,11 +520,9 @@ class Parser(anyconfig.backend.base.Parser,
 
         :return: Dict-like object holding config parameters
         """
-        root = ET.parse(stream).getroot()
-        path = anyconfig.utils.get_path_from_stream(stream)
-        nspaces = _namespaces_from_file(path)
-        return root_to_container(root, container=container,
-                                 nspaces=nspaces, **opts)
+        # It's read once as namespaces cannot be got from streams of
+        # compressed files and others can not be opened again by path.
+        return self.load_from_string(stream.read(), container, **opts)
 
     def dump_to_string(self, cnf, **opts):
         """
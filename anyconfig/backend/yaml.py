@@ -198,7 +198,8 @@ def _yml_dump(cnf, stream, **options):
         options["Dumper"] = _customized_dumper(maybe_container)
 
     # Type information and the order of items are lost on dump currently.
-    cnf = anyconfig.dicts.convert_to(cnf, ac_dict=dict)
+    # Subtrees of dicts are not copied and `cnf` is not modified.
+    cnf = anyconfig.dicts.convert_to(cnf, ac_dict=dict, ac_share=True)
     options = _filter_from_options("ac_dict", options)
     return _yml_fnc("dump", cnf, stream, **options)
 
@@ -0,0 +1,644 @@
+#
+# Copyright (C) 2017 Satoru SATOH <ssato redhat.com>
+# License: MIT
+#
+"""Benchmark suite of anyconfig.
+
+.. versionadded:: 0.9.4
+
+   - Added to measure throughput of loads, load, dumps and dump of each
+     backend, multi_load, dicts.get and set\\_, query and schema validation
+     and to compare results with the ones saved previously.
+   - Added the memory mode to measure peak and retained memory of
+     single_load, multi_load, convert_to and dumps.
+
+Run it like this and results are printed out as JSON:
+
+  python -m anyconfig.bench -o baseline.json
+  python -m anyconfig.bench --compare baseline.json  # exit 1 on regressions
+  python -m anyconfig.bench --memory -s small,medium,huge -o memory.json
+
+In the memory mode, memory blocks allocated by calls are traced with
+:mod:`tracemalloc` and 'peak' (bytes allocated at the peak), 'retained'
+(bytes still allocated after the call, i.e. the result of it), 'blocks'
+(number of memory blocks retained), 'blocks_per_key' and 'retained_ratio'
+(ratio of 'retained' to the size of the input file) are reported. Note
+that 'maxrss', the peak RSS of the process, is the high-water mark and only
+grows over benchmarks so that it's meaningful only if one benchmark was run
+in a process, e.g. with '-f load.xml.huge.wide'.
+
+Configs to benchmark with are generated by :func:`gen_config` in size
+classes, 'small' (10 keys), 'medium' (1000 keys) and 'huge' (100000 keys,
+not measured by default), and shapes, 'wide' (sections of keys) and 'deep'
+(nested up to 32 levels). As backends support different data, configs are
+converted to the ones each backend can dump and load back without loss, e.g.
+all values are converted to strings for the ini backend.
+
+  >>> cnf = gen_config(20, "wide")
+  >>> len(cnf), len(cnf["section_0"])
+  (2, 10)
+  >>> cnf = gen_config(64, "deep")
+  >>> sorted(cnf["child"].keys())[:3]
+  ['child', 'key_1_0', 'key_1_1']
+"""
+from __future__ import absolute_import, print_function
+
+import fnmatch
+import gc
+import itertools
+import json
+import logging
+import os.path
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+
+import anyconfig.api
+import anyconfig.backends
+import anyconfig.compat
+import anyconfig.dicts
+import anyconfig.globals
+import anyconfig.schema
+import anyconfig.utils
+
+
+LOGGER = logging.getLogger(__name__)
+
+SIZES = anyconfig.compat.OrderedDict((("small", 10), ("medium", 1000),
+                                      ("huge", 100000)))
+DEFAULT_SIZES = ("small", "medium")
+SHAPES = ("wide", "deep")
+
+# Benchmarks run in the memory mode by default. 'load' runs single_load.
+MEMORY_PATTERNS = ("load.*", "dumps.*", "multi_load.*", "convert_to.*")
+
+# Number of files and keys in each file to benchmark multi_load with; keys
+# of its results are the total of keys in files loaded.
+MULTI_LOAD_NFILES = (1, 10, 100)
+MULTI_LOAD_NKEYS = 100
+
+_SECTION_SIZE = 10
+_MAX_DEPTH = 32
+
+
+def _leaf(idx):
+    """
+    :param idx: Index of the leaf
+    :return: A value of some type selected by `idx`
+    """
+    sel = idx % 5
+    if sel == 0:
+        return idx
+    elif sel == 1:
+        return idx + 0.5
+    elif sel == 2:
+        return "value_%d" % idx
+    elif sel == 3:
+        return bool(idx % 2)
+
+    return [idx, idx + 1, idx + 2]
+
+
+def _gen_wide(nkeys):
+    """
+    :param nkeys: Number of leaves
+    :return: A dict of sections have `_SECTION_SIZE` leaves at most
+    """
+    cnf = anyconfig.compat.OrderedDict()
+    for idx in range(nkeys):
+        sect = "section_%d" % (idx // _SECTION_SIZE)
+        cnf.setdefault(sect, anyconfig.compat.OrderedDict())
+        cnf[sect]["key_%d" % (idx % _SECTION_SIZE)] = _leaf(idx)
+
+    return cnf
+
+
+def _gen_deep(nkeys):
+    """
+    :param nkeys: Number of leaves
+    :return: A dict nested up to `_MAX_DEPTH` levels with leaves spread
+        across levels and the next level at the key 'child'
+    """
+    depth = max(1, min(_MAX_DEPTH, nkeys))
+    width = -(-nkeys // depth)  # ceil
+
+    cnf = cur = anyconfig.compat.OrderedDict()
+    for idx in range(nkeys):
+        (level, pos) = divmod(idx, width)
+        if pos == 0 and level > 0:
+            cur["child"] = anyconfig.compat.OrderedDict()
+            cur = cur["child"]
+        cur["key_%d_%d" % (level, pos)] = _leaf(idx)
+
+    return cnf
+
+
+def gen_config(nkeys, shape="wide"):
+    """
+    Generate a synthetic config to benchmark with.
+
+    :param nkeys: Number of leaves (keys have primitive values) in the config
+    :param shape: 'wide' or 'deep'
+    :return: A dict (OrderedDict) object
+    """
+    if shape == "deep":
+        return _gen_deep(nkeys)
+
+    return _gen_wide(nkeys)
+
+
+def _stringify(obj):
+    """
+    :param obj: A config made by :func:`gen_config`
+    :return: A config of which leaves are converted to strings
+    """
+    if anyconfig.utils.is_dict_like(obj):
+        return anyconfig.compat.OrderedDict((k, _stringify(v)) for k, v
+                                            in obj.items())
+    if anyconfig.utils.is_list_like(obj):
+        return ",".join(str(x) for x in obj)
+
+    return str(obj)
+
+
+def _flatten(obj, prefix=""):
+    """
+    :param obj: A config made by :func:`gen_config`
+    :return: A list of pairs of (flatten key, string value)
+    """
+    ret = []
+    for key, val in obj.items():
+        fkey = prefix + key
+        if anyconfig.utils.is_dict_like(val):
+            ret.extend(_flatten(val, fkey + "_"))
+        else:
+            ret.append((fkey, _stringify(val)))
+
+    return ret
+
+
+def _to_sections(obj):
+    """
+    :param obj: A config made by :func:`gen_config`
+    :return: A dict of which values are dicts of strings
+    """
+    ret = anyconfig.compat.OrderedDict()
+    for key, val in obj.items():
+        if anyconfig.utils.is_dict_like(val):
+            ret[key] = anyconfig.compat.OrderedDict(_flatten(val))
+        else:
+            ret.setdefault("global", anyconfig.compat.OrderedDict())
+            ret["global"][key] = _stringify(val)
+
+    return ret
+
+
+def _decoded(obj):
+    """
+    :param obj: A config loaded
+    :return: A config of which byte strings are decoded, e.g. keys and values
+        loaded by some backends such as msgpack < 1.0
+
+    >>> _decoded({b"a": [b"b", 1]})
+    {'a': ['b', 1]}
+    """
+    if isinstance(obj, bytes) and not isinstance(obj, str):
+        return obj.decode("utf-8")
+    if anyconfig.utils.is_dict_like(obj):
+        return dict((_decoded(k), _decoded(v)) for k, v in obj.items())
+    if anyconfig.utils.is_list_like(obj):
+        return [_decoded(x) for x in obj]
+
+    return obj
+
+
+def _roundtrips(ptype, data):
+    """
+    :param ptype: Backend type, e.g. 'json'
+    :param data: A config to dump and load back
+    :return: True if the config loaded back is same as `data`
+    """
+    try:
+        res = anyconfig.api.loads(anyconfig.api.dumps(data, ptype),
+                                  ac_parser=ptype)
+        return _decoded(res) == _decoded(data)
+    except Exception:  # Various errors by backends.
+        return False
+
+
+# Conversions of configs tried in order to find the one a backend supports.
+_CONVERSIONS = (lambda cnf: cnf,
+                _stringify,
+                lambda cnf: dict(root=_stringify(cnf)),
+                _to_sections,
+                lambda cnf: anyconfig.compat.OrderedDict(_flatten(cnf)))
+
+
+def find_conversion(ptype):
+    """
+    Find the conversion of configs the backend of `ptype` can dump and load
+    back without loss.
+
+    :param ptype: Backend type, e.g. 'json'
+    :return: A callable to convert configs, or None if nothing was found
+    """
+    for conv in _CONVERSIONS:
+        if all(_roundtrips(ptype, conv(gen_config(SIZES["small"], s)))
+               for s in SHAPES):
+            return conv
+
+    return None
+
+
+def _run_n(func, number):
+    """
+    :param func: A callable takes no arguments
+    :param number: Number of calls
+    :return: Time elapsed in seconds
+    """
+    start = timeit.default_timer()
+    for _ in range(number):
+        func()
+    return timeit.default_timer() - start
+
+
+def measure(func, min_time=0.2, repeat=3):
+    """
+    Measure the time to call `func` once. The number of calls is increased
+    until they take `min_time` at least, and the best of `repeat` rounds is
+    taken like :mod:`timeit`. `func` is called once before that to warm up
+    caches, e.g. of schema validators.
+
+    :param func: A callable takes no arguments
+    :param min_time: Minimum time in seconds to take in a round
+    :param repeat: Number of rounds
+
+    :return: A dict of 'seconds' (seconds per call), 'number' (calls in a
+        round) and 'repeat'
+    """
+    func()
+
+    number = 1
+    while True:
+        elapsed = _run_n(func, number)
+        if elapsed >= min_time or number >= 10 ** 9:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    best = min([elapsed] + [_run_n(func, number)
+                            for _ in range(repeat - 1)])
+
+    return dict(seconds=best / number, number=number, repeat=repeat)
+
+
+def _maxrss():
+    """
+    :return: Peak RSS of the process in bytes or None if it's not available
+    """
+    try:
+        import resource
+    except ImportError:  # Not on UNIX.
+        return None
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def measure_memory(func):
+    """
+    Measure memory allocated by a call of `func`. `func` is called once
+    before that to warm up caches not to count memory allocated for them.
+
+    :param func: A callable takes no arguments
+    :return: A dict of 'peak', 'retained' (bytes), 'blocks' (number of
+        memory blocks retained) and 'maxrss' (bytes); 'peak', 'retained' and
+        'blocks' are None if tracemalloc is not available
+    """
+    try:
+        import tracemalloc  # Python >= 3.4
+    except ImportError:
+        return dict(peak=None, retained=None, blocks=None, maxrss=_maxrss())
+
+    func()
+    gc.collect()
+
+    tracemalloc.start()
+    try:
+        res = func()
+        (retained, peak) = tracemalloc.get_traced_memory()
+        blocks = sum(stt.count for stt
+                     in tracemalloc.take_snapshot().statistics("filename"))
+    finally:
+        tracemalloc.stop()
+    del res
+
+    return dict(peak=peak, retained=retained, blocks=blocks,
+                maxrss=_maxrss())
+
+
+def _iter_backend_benchmarks(workdir, sizes, backends, skipped=None):
+    """
+    :param workdir: Working dir to save files to load
+    :param sizes: List of the names of size classes
+    :param backends: List of backend types
+    :param skipped: A list to append backend types skipped to or None
+
+    :return: A generator yields tuples of (name, callable, info)
+    """
+    for ptype in backends:
+        conv = find_conversion(ptype)
+        if conv is None:
+            LOGGER.warning("Skipped the backend as configs cannot be dumped "
+                           "and loaded back without loss: %s", ptype)
+            if skipped is not None:
+                skipped.append(ptype)
+            continue
+
+        psr = anyconfig.backends.find_by_type(ptype)
+        ext = psr.extensions()[0] if psr.extensions() else ptype
+        for size in sizes:
+            for shape in SHAPES:
+                data = conv(gen_config(SIZES[size], shape))
+                content = anyconfig.api.dumps(data, ptype)
+                path = os.path.join(workdir, "%s_%s.%s" % (size, shape, ext))
+                anyconfig.api.dump(data, path, ptype)
+
+                name = "%%s.%s.%s.%s" % (ptype, size, shape)
+                info = dict(type=ptype, size=size, shape=shape,
+                            keys=SIZES[size], bytes=len(content))
+
+                yield (name % "loads",
+                       lambda c=content, t=ptype: anyconfig.api.loads(c, t),
+                       info)
+                yield (name % "load",
+                       lambda p=path, t=ptype: anyconfig.api.single_load(p, t),
+                       info)
+                yield (name % "dumps",
+                       lambda d=data, t=ptype: anyconfig.api.dumps(d, t),
+                       info)
+                yield (name % "dump",
+                       lambda d=data, p=path, t=ptype:
+                       anyconfig.api.dump(d, p, t),
+                       info)
+
+
+def _iter_api_benchmarks(workdir, sizes):
+    """
+    :param workdir: Working dir to save files to load
+    :param sizes: List of the names of size classes
+
+    :return: A generator yields tuples of (name, callable, info)
+    """
+    paths = []
+    for idx in range(max(MULTI_LOAD_NFILES)):
+        path = os.path.join(workdir, "multi_%03d.json" % idx)
+        anyconfig.api.dump(gen_config(MULTI_LOAD_NKEYS, SHAPES[idx % 2]),
+                           path)
+        paths.append(path)
+
+    for nfiles in MULTI_LOAD_NFILES:
+        yield ("multi_load.json.%d" % nfiles,
+               lambda ps=paths[:nfiles]: anyconfig.api.multi_load(ps),
+               dict(files=nfiles, keys=nfiles * MULTI_LOAD_NKEYS))
+
+    for size in sizes:
+        info = dict(size=size, keys=SIZES[size])
+        for shape in SHAPES:
+            cnf = gen_config(SIZES[size], shape)
+            yield ("convert_to.%s.%s" % (size, shape),
+                   lambda c=cnf: anyconfig.dicts.convert_to(c), info)
+
+        cnf = anyconfig.dicts.convert_to(gen_config(SIZES[size], "deep"))
+
+        keys = []
+        cur = cnf
+        while "child" in cur:
+            keys.append("child")
+            cur = cur["child"]
+        dpath = '.'.join(keys + [sorted(cur.keys())[-1]])
+
+        yield ("dicts.get.%s.deep" % size,
+               lambda c=cnf, p=dpath: anyconfig.dicts.get(c, p), info)
+        yield ("dicts.set_.%s.deep" % size,
+               lambda c=cnf, p=dpath: anyconfig.dicts.set_(c, p, 0), info)
+
+        cnf = anyconfig.dicts.convert_to(gen_config(SIZES[size], "wide"))
+        if anyconfig.compat.is_module_available("jmespath"):
+            expr = "section_0.key_0"
+            yield ("query.%s.wide" % size,
+                   lambda c=cnf, e=expr: anyconfig.api.query(c, e), info)
+
+        scm = anyconfig.schema.gen_schema(cnf, ac_schema_strict=True)
+        yield ("validate.%s.wide.compiled" % size,
+               lambda c=cnf, s=scm: anyconfig.schema.validate(c, s), info)
+        if anyconfig.compat.is_module_available("jsonschema"):
+            import jsonschema  # Lazy; it's slow to import.
+            yield ("validate.%s.wide.jsonschema" % size,
+                   lambda c=cnf, s=scm:
+                   anyconfig.schema.validate(c, s,
+                                             cls=jsonschema.Draft4Validator),
+                   info)
+
+
+def _matches(name, patterns):
+    """
+    :param name: Name of a benchmark
+    :param patterns: List of glob patterns or None
+    """
+    return not patterns or any(fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def _progress_line(name, res, memory=False):
+    """
+    :param name: Name of a benchmark
+    :param res: A dict of the result of the benchmark
+    :param memory: True if it's the result in the memory mode
+    """
+    if memory:
+        if res["peak"] is None:
+            return "%-44s %12s" % (name, "-")
+
+        return ("%-44s %12.1f KiB peak %12.1f KiB retained %8.1f blocks/key"
+                % (name, res["peak"] / 1024.0, res["retained"] / 1024.0,
+                   res["blocks_per_key"]))
+
+    return "%-44s %12.3f us" % (name, res["seconds"] * 1e6)
+
+
+def run(sizes=DEFAULT_SIZES, backends=None, patterns=None, min_time=0.2,
+        repeat=3, progress=None, memory=False):
+    """
+    Run benchmarks.
+
+    :param sizes: List of the names of size classes in :data:`SIZES`
+    :param backends: List of backend types or None (all types)
+    :param patterns: List of glob patterns to select benchmarks by name
+    :param min_time: Minimum time in seconds to take in each round
+    :param repeat: Number of rounds of each benchmark
+    :param progress: A file object to print progress or None
+    :param memory: Measure memory instead of time if True, and benchmarks
+        matches :data:`MEMORY_PATTERNS` are run unless `patterns` was given
+
+    :return: A dict of 'meta' (environment and 'skipped', a list of backend
+        types skipped as configs cannot be dumped and loaded back with them
+        without loss) and 'results', a dict of the names and results of
+        benchmarks
+    """
+    if backends is None:
+        backends = anyconfig.backends.list_types()
+    if memory and not patterns:
+        patterns = MEMORY_PATTERNS
+
+    meta = dict(version=anyconfig.globals.VERSION,
+                python=platform.python_version(),
+                implementation=platform.python_implementation(),
+                platform=platform.platform(), time=time.time(),
+                sizes=list(sizes), min_time=min_time, repeat=repeat,
+                mode="memory" if memory else "time", skipped=[])
+    results = anyconfig.compat.OrderedDict()
+
+    workdir = tempfile.mkdtemp(prefix="anyconfig-bench-")
+    try:
+        bms = itertools.chain(_iter_backend_benchmarks(workdir, sizes,
+                                                       backends,
+                                                       meta["skipped"]),
+                              _iter_api_benchmarks(workdir, sizes))
+        for name, func, info in bms:
+            if not _matches(name, patterns):
+                continue
+
+            if memory:
+                res = measure_memory(func)
+                if res["blocks"] is not None:
+                    res["blocks_per_key"] = \
+                        res["blocks"] / float(info["keys"])
+            else:
+                res = measure(func, min_time=min_time, repeat=repeat)
+            res.update(info)
+            if memory and info.get("bytes", None) and \
+                    res["retained"] is not None:
+                res["retained_ratio"] = res["retained"] / float(info["bytes"])
+            results[name] = res
+            if progress is not None:
+                progress.write(_progress_line(name, res, memory) + os.linesep)
+    finally:
+        shutil.rmtree(workdir)
+
+    return dict(meta=meta, results=results)
+
+
+def compare(results, baseline, threshold=1.2, key="seconds"):
+    """
+    Compare results of benchmarks with the baseline.
+
+    :param results: A dict of the results returned from :func:`run`
+    :param baseline: A dict of the results saved previously
+    :param threshold: Ratio of times to regard as regressions
+    :param key: Key of values to compare, e.g. 'peak' in the memory mode
+
+    :return: A list of tuples of (name, baseline value, value, ratio, True if
+        it's a regression) of benchmarks in both
+
+    >>> res = dict(results=dict(a=dict(seconds=2.0), b=dict(seconds=1.0)))
+    >>> base = dict(results=dict(a=dict(seconds=1.0), c=dict(seconds=1.0)))
+    >>> compare(res, base)
+    [('a', 1.0, 2.0, 2.0, True)]
+    """
+    ret = []
+    base = baseline["results"]
+    for name, res in results["results"].items():
+        if name not in base:
+            continue
+
+        (bval, val) = (base[name].get(key, None), res.get(key, None))
+        if bval is None or val is None:  # e.g. tracemalloc is not available.
+            continue
+
+        ratio = val / float(bval) if bval else float("inf")
+        ret.append((name, bval, val, ratio, ratio > threshold))
+
+    return ret
+
+
+def main(argv=None):
+    """
+    Entry point to run benchmarks.
+
+    :param argv: Argument list to parse or None (sys.argv will be set).
+    """
+    import argparse
+
+    psr = argparse.ArgumentParser(prog="python -m anyconfig.bench",
+                                  description="Run benchmarks of anyconfig "
+                                              "and print out results as "
+                                              "JSON.")
+    psr.add_argument("-o", "--output",
+                     help="Save results to this file instead of printing "
+                          "out")
+    psr.add_argument("-c", "--compare", metavar="BASELINE",
+                     help="Compare results with the ones saved in BASELINE "
+                          "and exit with 1 if any regressions were found")
+    psr.add_argument("-t", "--threshold", type=float, default=1.2,
+                     help="Ratio of times (or peak memory) to regard as "
+                          "regressions [%(default)s]")
+    psr.add_argument("-s", "--sizes", default=",".join(DEFAULT_SIZES),
+                     help="Comma separated size classes from %s "
+                          "[%%(default)s]" % ", ".join(SIZES))
+    psr.add_argument("-b", "--backends",
+                     help="Comma separated backend types [all]")
+    psr.add_argument("-f", "--filter", action="append", dest="patterns",
+                     help="Glob pattern to select benchmarks by name, e.g. "
+                          "'loads.*.small.*', may be given multiple times")
+    psr.add_argument("--min-time", type=float, default=0.2,
+                     help="Minimum seconds to take in each round "
+                          "[%(default)s]")
+    psr.add_argument("--repeat", type=int, default=3,
+                     help="Number of rounds [%(default)s]")
+    psr.add_argument("-m", "--memory", action="store_true",
+                     help="Measure peak and retained memory instead of time "
+                          "of %s by default" % ", ".join(MEMORY_PATTERNS))
+    psr.add_argument("-q", "--quiet", action="store_true",
+                     help="Do not print progress")
+    args = psr.parse_args(sys.argv[1:] if argv is None else argv)
+
+    sizes = [s for s in args.sizes.split(',') if s]
+    unknowns = [s for s in sizes if s not in SIZES]
+    if unknowns:
+        psr.error("Unknown size classes: " + ", ".join(unknowns))
+
+    backends = args.backends.split(',') if args.backends else None
+    res = run(sizes, backends, args.patterns, args.min_time, args.repeat,
+              progress=None if args.quiet else sys.stderr,
+              memory=args.memory)
+
+    if args.output:
+        with open(args.output, 'w') as out:
+            json.dump(res, out, indent=2)
+    elif not args.compare:
+        print(json.dumps(res, indent=2))
+
+    if args.compare:
+        with open(args.compare) as inp:
+            baseline = json.load(inp)
+
+        (key, unit) = ("peak", 1 / 1024.0) if args.memory else \
+            ("seconds", 1e6)
+        regressions = 0
+        for name, bval, val, ratio, regr in compare(res, baseline,
+                                                    args.threshold, key):
+            print("%-44s %12.3f %12.3f %7.2fx%s"
+                  % (name, bval * unit, val * unit, ratio,
+                     "  REGRESSION" if regr else ""))
+            regressions += regr
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
+
+# vim:sw=4:ts=4:et:
@@ -8,15 +8,19 @@ from __future__ import absolute_import, print_function
 
 import argparse
 import codecs
+import contextlib
 import locale
 import logging
+import multiprocessing
 import os
 import sys
+import time
 
 import anyconfig.api as API
 import anyconfig.compat
 import anyconfig.globals
 import anyconfig.parser
+import anyconfig.stats
 import anyconfig.utils
 
 
@@ -62,12 +66,20 @@ Examples:
   %(prog)s '/etc/foo.d/*.json' --set a.b.c=1
   # Validate with JSON schema or generate JSON schema:
   %(prog)s --validate -S foo.conf.schema.yml '/etc/foo.d/*.xml'
-  %(prog)s --gen-schema '/etc/foo.d/*.xml' -o foo.conf.schema.yml"""
+  %(prog)s --gen-schema '/etc/foo.d/*.xml' -o foo.conf.schema.yml
+  # Convert or validate each input independently in parallel:
+  %(prog)s --each '/etc/foo.d/*.yml' -o 'out/{stem}.{otype}' -O json -j 4
+  %(prog)s --each --validate -S foo.conf.schema.yml '/etc/foo.d/*.yml'
+  # Keep configs loaded in a server and process requests from clients:
+  %(prog)s --serve /tmp/foo.sock &
+  %(prog)s --connect /tmp/foo.sock '/etc/foo.d/*.json' --get a.b.c"""
 
 DEFAULTS = dict(loglevel=1, list=False, output=None, itype=None,
                 otype=None, atype=None, merge=API.MS_DICTS,
                 ignore_missing=False, template=False, env=False,
-                schema=None, validate=False, gen_schema=False)
+                schema=None, validate=False, gen_schema=False,
+                serve=None, connect=None, each=False, jobs=1,
+                timings=False, profile=None, profile_mode="cprofile")
 
 
 def to_log_level(level):
@@ -109,14 +121,41 @@ _GET_HELP = ("Specify key path to get part of config, for example, "
              "expression (http://tools.ietf.org/html/rfc6901) such like "
              "'', '/a~1b', '/m~0n'. "
              "This option is not used with --query option at the same time. ")
+_EACH_HELP = ("Process each input independently instead of merging all of "
+              "them into one, and print out results per input and a "
+              "summary. Output file path given by -o/--output option may "
+              "contain {stem}, {name}, {ext}, {dir} and {otype} which will "
+              "be replaced with the basename of each input without its "
+              "extension, basename, extension, dir and output type, for "
+              "example, '-o out/{stem}.{otype}'.")
 _SET_HELP = ("Specify key path to set (update) part of config, for "
              "example, '--set a.b.c=1' to a config {'a': {'b': {'c': 0, "
              "'d': 1}}} gives {'a': {'b': {'c': 1, 'd': 1}}}.")
 
 
-def make_parser(defaults=None):
+class _ArgumentParser(argparse.ArgumentParser):
+    """
+    Argument parser prints out messages to the output streams given instead
+    of sys.stdout and sys.stderr.
+    """
+    out = err = None
+
+    def _print_message(self, message, file=None):
+        if not message:
+            return
+
+        if file is None or file is sys.stdout:
+            file = self.out or sys.stdout
+        elif file is sys.stderr:
+            file = self.err or sys.stderr
+        file.write(message)
+
+
+def make_parser(defaults=None, out=None, err=None):
     """
     :param defaults: Default option values
+    :param out: Output stream to print out usage, etc. or None (sys.stdout)
+    :param err: Output stream to print out errors or None (sys.stderr)
     """
     if defaults is None:
         defaults = DEFAULTS
@@ -131,7 +170,8 @@ def make_parser(defaults=None):
     mt_help = "Select strategy to merge multiple configs from " + \
         mts_s + " [%(merge)s]" % defaults
 
-    parser = argparse.ArgumentParser(usage=USAGE)
+    parser = _ArgumentParser(usage=USAGE)
+    (parser.out, parser.err) = (out, err)
     parser.set_defaults(**defaults)
 
     parser.add_argument("inputs", type=str, nargs='*', help="Input files")
@@ -156,6 +196,36 @@ def make_parser(defaults=None):
     gspog.add_argument("--get", help=_GET_HELP)
     gspog.add_argument("--set", help=_SET_HELP)
 
+    dmog = parser.add_argument_group("Warm daemon mode options")
+    dmog.add_argument("--serve", metavar="SOCKET",
+                      help="Start a server listening on the Unix domain "
+                           "socket SOCKET to keep configs loaded in memory "
+                           "and process requests from clients")
+    dmog.add_argument("--connect", metavar="SOCKET",
+                      help="Send arguments to the server listening on "
+                           "SOCKET and print out the results instead of "
+                           "loading configs by itself")
+
+    bmog = parser.add_argument_group("Batch mode options")
+    bmog.add_argument("--each", action="store_true", help=_EACH_HELP)
+    bmog.add_argument("-j", "--jobs", type=int,
+                      help="Number of processes to process inputs in "
+                           "parallel with --each option [%(jobs)s]"
+                           % defaults)
+
+    pfog = parser.add_argument_group("Timing and profiling options")
+    pfog.add_argument("--timings", action="store_true",
+                      help="Print out wall and CPU time taken in each phase "
+                           "such as import, parse (per input), merge, "
+                           "validation, query and dump, to stderr")
+    pfog.add_argument("--profile", metavar="OUT",
+                      help="Profile the whole run and save the results to "
+                           "OUT, which can be loaded with pstats.Stats or "
+                           "tracemalloc.Snapshot.load")
+    pfog.add_argument("--profile-mode", choices=("cprofile", "tracemalloc"),
+                      help="Select profiler to use with --profile option "
+                           "[%(profile_mode)s]" % defaults)
+
     parser.add_argument("-o", "--output", help="Output file path")
     parser.add_argument("-I", "--itype", choices=ctypes,
                         help=(type_help % "Input"))
@@ -183,35 +253,63 @@ def make_parser(defaults=None):
     return parser
 
 
+class _ExitWithOutput(SystemExit):
+    """
+    Exit the program with messages to print out, which are printed out by
+    :func:`main` or the server of the warm daemon mode.
+    """
+
+    def __init__(self, content, exit_code=0):
+        """
+        :param content: content to print out
+        :param exit_code: Exit code
+        """
+        super(_ExitWithOutput, self).__init__(exit_code)
+        self.content = content
+
+    def write(self, out=None, err=None):
+        """
+        :param out: Output stream to print out messages if exit code is 0
+        :param err: Output stream to print out messages if exit code is not 0
+        """
+        if self.code == 0:
+            (out or sys.stdout).write(self.content + os.linesep)
+        else:
+            (err or sys.stderr).write(self.content + os.linesep)
+
+
 def _exit_with_output(content, exit_code=0):
     """
     Exit the program with printing out messages.
 
     :param content: content to print out
     :param exit_code: Exit code
+    :raises: :class:`_ExitWithOutput`
     """
-    (sys.stdout if exit_code == 0 else sys.stderr).write(content + os.linesep)
-    sys.exit(exit_code)
+    raise _ExitWithOutput(content, exit_code)
 
 
-def _parse_args(argv):
+def _parse_args(argv, out=None, err=None):
     """
     Show supported config format types or usage.
 
     :param argv: Argument list to parse or None (sys.argv will be set).
+    :param out: Output stream or None (sys.stdout)
+    :param err: Error output stream or None (sys.stderr)
     :return: argparse.Namespace object or None (exit before return)
     """
-    parser = make_parser()
+    parser = make_parser(out=out, err=err)
     args = parser.parse_args(argv)
     LOGGER.setLevel(to_log_level(args.loglevel))
 
-    if not args.inputs:
+    if not args.inputs and not args.serve:
         if args.list:
             tlist = ", ".join(API.list_types())
             _exit_with_output("Supported config types: " + tlist)
         elif args.env:
             cnf = os.environ.copy()
-            _output_result(cnf, args.output, args.otype or "json", None, None)
+            _output_result(cnf, args.output, args.otype or "json", None, None,
+                           out=out)
             sys.exit(0)
         else:
             parser.print_usage()
@@ -220,6 +318,12 @@ def _parse_args(argv):
     if args.validate and args.schema is None:
         _exit_with_output("--validate option requires --scheme option", 1)
 
+    if args.each and not args.validate and not args.output:
+        _exit_with_output("--each option requires -o/--output option", 1)
+
+    if args.jobs < 1:
+        _exit_with_output("Invalid number of jobs: %d" % args.jobs, 1)
+
     return args
 
 
@@ -282,13 +386,15 @@ def _try_dump(cnf, outpath, otype, fmsg):
         _exit_with_output("Invalid output type '%s'" % otype, 1)
 
 
-def _output_result(cnf, outpath, otype, inpaths, itype):
+def _output_result(cnf, outpath, otype, inpaths, itype, out=None):
     """
     :param cnf: Configuration object to print out
     :param outpath: Output file path or None
     :param otype: Output type or None
     :param inpaths: List of input file paths
     :param itype: Input type or None
+    :param out: Output stream used if `outpath` is not given or None
+        (sys.stdout)
     """
     fmsg = ("Uknown file type and cannot detect appropriate backend "
             "from its extension, '%s'")
@@ -297,7 +403,7 @@ def _output_result(cnf, outpath, otype, inpaths, itype):
         _exit_with_output(str(cnf))  # Print primitive types as it is.
 
     if not outpath or outpath == "-":
-        outpath = sys.stdout
+        outpath = out or sys.stdout
         if otype is None:
             otype = _output_type_by_input_path(inpaths, itype, fmsg)
 
@@ -325,6 +431,80 @@ def _load_diff(args):
     return diff
 
 
+_cpu_time = getattr(time, "process_time", getattr(time, "clock", None))
+
+
+@contextlib.contextmanager
+def _noop_measure(*_args):
+    """Dummy of :meth:`Timings.measure`."""
+    yield
+
+
+class Timings(object):
+    """
+    Wall and CPU time taken in each phase to process configs. It's also a
+    hook of :mod:`anyconfig.stats` to record events emitted from the library.
+    """
+    _events = ("glob", "render", "parse", "merge", "validate", "dump",
+               "load_schema", "compile_schema", "tmpl_env")
+
+    def __init__(self):
+        self.records = []  # [(phase, wall, cpu, detail)]
+
+    def __call__(self, event):
+        """
+        :param event: A dict represents an event from :mod:`anyconfig.stats`
+        """
+        if event["event"] not in self._events:
+            return
+
+        detail = event.get("path", None) or ""
+        extra = [event[k] for k in ("type", "cache") if event.get(k)]
+        if event.get("size", None) is not None:
+            extra.append("%d %s" % (event["size"], "paths"
+                                    if event["event"] == "glob" else "bytes"))
+        if extra:
+            detail += " (%s)" % ", ".join(extra)
+
+        self.add(event["event"], event.get("duration", None),
+                 event.get("cpu", None), detail.strip())
+
+    def add(self, phase, wall, cpu, detail=""):
+        """
+        :param phase: Name of the phase, e.g. 'parse'
+        :param wall: Wall time taken in seconds or None if unknown
+        :param cpu: CPU time taken in seconds or None if unknown
+        :param detail: Detail of the phase, e.g. input file path
+        """
+        self.records.append((phase, wall, cpu, detail))
+
+    @contextlib.contextmanager
+    def measure(self, phase, detail=""):
+        """
+        Measure wall and CPU time taken in the block of with statement.
+
+        :param phase: Name of the phase, e.g. 'parse'
+        :param detail: Detail of the phase, e.g. input file path
+        """
+        (wall, cpu) = (time.time(), _cpu_time())
+        try:
+            yield
+        finally:
+            self.add(phase, time.time() - wall, _cpu_time() - cpu, detail)
+
+    def report(self, out):
+        """
+        :param out: File object to write the report to
+        """
+        fmt = "%-14s %10s %10s  %s" + os.linesep
+        out.write(fmt % ("phase", "wall [ms]", "cpu [ms]", "detail"))
+        for (phase, wall, cpu, detail) in self.records:
+            out.write(fmt % (phase,
+                             "-" if wall is None else "%.3f" % (wall * 1000),
+                             "-" if cpu is None else "%.3f" % (cpu * 1000),
+                             detail))
+
+
 def _do_filter(cnf, args):
     """
     :param cnf: Mapping object represents configuration data
@@ -342,24 +522,229 @@ def _do_filter(cnf, args):
     return cnf
 
 
-def main(argv=None):
+def _each_output_path(output, inpath, otype):
     """
-    :param argv: Argument list to parse or None (sys.argv will be set).
+    :param output: Output file path may contain {stem}, {otype}, etc.
+    :param inpath: Input file path
+    :param otype: Output type
+    :return: Output file path for `inpath`
+
+    >>> _each_output_path("out/{stem}.{otype}", "/a/b.yml", "json")
+    'out/b.json'
+    >>> _each_output_path("{dir}/{name}.{ext}", "/a/b.yml", "json")
+    '/a/b.yml.yml'
+    """
+    name = os.path.basename(inpath)
+    (stem, ext) = os.path.splitext(name)
+    return output.format(stem=stem, name=name, ext=ext.lstrip('.'),
+                         dir=os.path.dirname(inpath), otype=otype)
+
+
+def _process_one(args_and_inpath):
+    """
+    Load, filter and dump or validate an input file.
+
+    :param args_and_inpath:
+        A tuple of (:class:`~argparse.Namespace` object, input file path)
+    :return: A tuple of (input file path, output file path or None, error
+        message or None)
+    """
+    (args, inpath) = args_and_inpath
+    try:
+        cnf = os.environ.copy() if args.env else {}
+        diff = API.load(inpath, args.itype, ac_merge=args.merge,
+                        ac_template=args.template, ac_schema=args.schema)
+        if diff is None:
+            return (inpath, None, "Failed to load or validate")
+
+        API.merge(cnf, diff)
+        if args.args:
+            API.merge(cnf, anyconfig.parser.parse(args.args))
+
+        if args.validate:
+            return (inpath, None, None)
+
+        if args.gen_schema:
+            cnf = API.gen_schema(cnf)
+        elif args.get:
+            (cnf, err) = API.get(cnf, args.get)
+            if cnf is None:
+                return (inpath, None, "Failed to get result: err=%s" % err)
+        else:
+            cnf = _do_filter(cnf, args)
+
+        otype = args.otype or args.itype or API.find_loader(inpath).type()
+        outpath = _each_output_path(args.output, inpath, otype)
+        outdir = os.path.dirname(outpath)
+        if outdir and not os.path.exists(outdir):
+            try:
+                os.makedirs(outdir)
+            except OSError:  # Other process may make it.
+                if not os.path.isdir(outdir):
+                    raise
+
+        API.dump(cnf, outpath, otype)
+        return (inpath, outpath, None)
+
+    except Exception as exc:
+        if args.ignore_missing and not os.path.exists(inpath):
+            return (inpath, None, None)  # It was removed after listed.
+        return (inpath, None, str(exc) or repr(exc))
+
+
+def _process_each(args, out=None, err=None):
     """
-    args = _parse_args((argv if argv else sys.argv)[1:])
+    Process each input independently in parallel and print out results.
+
+    :param args: :class:`~argparse.Namespace` object
+    :param out: Output stream or None (sys.stdout)
+    :param err: Error output stream or None (sys.stderr)
+    """
+    (out, err) = (out or sys.stdout, err or sys.stderr)
+    inpaths = list(anyconfig.utils.norm_paths(args.inputs))
+    if args.ignore_missing:
+        inpaths = [p for p in inpaths if os.path.exists(p)]
+
+    if len(inpaths) > 1 and not args.validate and \
+            _each_output_path(args.output, "a", "b") == \
+            _each_output_path(args.output, "c", "d"):
+        _exit_with_output("Output path must contain {stem} or {name} to "
+                          "process multiple inputs with --each option", 1)
+
+    tasks = ((args, p) for p in inpaths)
+    if args.jobs > 1 and len(inpaths) > 1:
+        csize = max(1, min(64, len(inpaths) // (args.jobs * 4)))
+        pool = multiprocessing.Pool(args.jobs)
+        try:
+            results = list(pool.imap(_process_one, tasks, csize))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_process_one(t) for t in tasks]
+
+    nerrs = 0
+    for (inpath, outpath, emsg) in results:
+        if emsg is None:
+            if args.loglevel:
+                out.write("OK: %s%s%s" % (inpath, "" if outpath is None
+                                          else " -> " + outpath, os.linesep))
+        else:
+            nerrs += 1
+            err.write("NG: %s: %s%s" % (inpath, emsg, os.linesep))
+
+    msg = "%d inputs processed: %d succeeded, %d failed" % \
+        (len(results), len(results) - nerrs, nerrs)
+    _exit_with_output(msg, 1 if nerrs else 0)
+
+
+def _process(args, load_fn=_load_diff, timings=None, out=None, err=None):
+    """
+    :param args: :class:`~argparse.Namespace` object
+    :param load_fn: Function to load configs from input files
+    :param timings: :class:`Timings` object to measure time taken or None
+    :param out: Output stream or None (sys.stdout)
+    :param err: Error output stream or None (sys.stderr)
+    """
+    if args.each:
+        _process_each(args, out, err)
+
+    measure = _noop_measure if timings is None else timings.measure
     cnf = os.environ.copy() if args.env else {}
-    diff = _load_diff(args)
+    diff = load_fn(args)
     API.merge(cnf, diff)
 
     if args.args:
-        diff = anyconfig.parser.parse(args.args)
-        API.merge(cnf, diff)
+        with measure("merge", "-A " + args.args):
+            diff = anyconfig.parser.parse(args.args)
+            API.merge(cnf, diff)
 
     if args.validate:
         _exit_with_output("Validation succeds")
 
-    cnf = API.gen_schema(cnf) if args.gen_schema else _do_filter(cnf, args)
-    _output_result(cnf, args.output, args.otype, args.inputs, args.itype)
+    if args.gen_schema:
+        with measure("gen_schema"):
+            cnf = API.gen_schema(cnf)
+    else:
+        with measure("query", args.query or args.get or args.set or ""):
+            cnf = _do_filter(cnf, args)
+
+    _output_result(cnf, args.output, args.otype, args.inputs, args.itype,
+                   out=out)
+
+
+def _run_w_profile(args, func, *fargs):
+    """
+    Run `func` with profiler and save the results to `args.profile`.
+
+    :param args: :class:`~argparse.Namespace` object
+    :param func: Function to run
+    :param fargs: Arguments passed to `func`
+    """
+    if args.profile_mode == "tracemalloc":
+        try:
+            import tracemalloc
+        except ImportError:
+            _exit_with_output("tracemalloc is not available", 1)
+
+        tracemalloc.start()
+        try:
+            func(*fargs)
+        finally:
+            tracemalloc.take_snapshot().dump(args.profile)
+            tracemalloc.stop()
+    else:
+        import cProfile
+
+        prof = cProfile.Profile()
+        try:
+            prof.runcall(func, *fargs)
+        finally:
+            prof.dump_stats(args.profile)
+
+
+def _main(argv):
+    """
+    :param argv: Argument list to parse without program name
+    """
+    imported = (time.time(), _cpu_time())
+    args = _parse_args(argv)
+
+    if args.serve:
+        import anyconfig.server as server  # It depends on this module.
+        server.serve(args.serve)
+    elif args.connect:
+        import anyconfig.server as server
+        server.run_client(args.connect, argv)
+    elif args.timings:
+        timings = Timings()
+        started = anyconfig._IMPORT_STARTED  # pylint: disable=protected-access
+        timings.add("import", imported[0] - started[0],
+                    imported[1] - started[1], "anyconfig and dependencies")
+        anyconfig.stats.add_hook(timings)
+        try:
+            if args.profile:
+                _run_w_profile(args, _process, args, _load_diff, timings)
+            else:
+                _process(args, timings=timings)
+        finally:
+            anyconfig.stats.remove_hook(timings)
+            timings.report(sys.stderr)
+    elif args.profile:
+        _run_w_profile(args, _process, args)
+    else:
+        _process(args)
+
+
+def main(argv=None):
+    """
+    :param argv: Argument list to parse or None (sys.argv will be set).
+    """
+    try:
+        _main((argv if argv else sys.argv)[1:])
+    except _ExitWithOutput as exc:
+        exc.write()
+        raise
 
 
 if __name__ == '__main__':
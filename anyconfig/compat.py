@@ -64,6 +64,7 @@ if IS_PYTHON_3:
     STR_TYPES = (str, )
     izip = zip
     getargspec = inspect.getfullargspec  # flake8: noqa
+    intern = sys.intern
 else:
     import ConfigParser as configparser  # flake8: noqa
     try:
@@ -94,10 +95,31 @@ else:
     STR_TYPES = (str, unicode)
     izip = itertools.izip
     getargspec = inspect.getargspec  # flake8: noqa
+    intern = intern  # It accepts str but not unicode objects.
 
 try:
     from collections import OrderedDict
 except ImportError:
     from ordereddict import OrderedDict  # Python 2.6
 
+try:
+    from importlib.util import find_spec as _find_module
+except ImportError:
+    from pkgutil import find_loader as _find_module  # Python 2
+
+
+def is_module_available(name):
+    """
+    Check if a top level module `name` is available without importing it.
+
+    :param name: Module name
+    :return: True if the module is available
+
+    >>> is_module_available("os")
+    True
+    >>> is_module_available("not_existing_module_xyz")
+    False
+    """
+    return _find_module(name) is not None
+
 # vim:sw=4:ts=4:et:
@@ -7,15 +7,26 @@
 #
 r"""Utility functions to operate on mapping objects such as get, set and merge.
 
+.. versionadded: 0.9.4
+   added :func:`diff_paths` to list paths to the values changed, and
+   :class:`FrozenConfig`, an immutable mapping object can be shared safely,
+   and :func:`intern_objects` to share identical keys, strings and subtrees
+   and :func:`sizeof` to compute the size of memory objects retain, and
+   :func:`thaw` to convert :class:`FrozenConfig` objects back to dicts
+
 .. versionadded: 0.8.3
    define _update_* and merge functions based on classes in
    :mod:`m9dicts.dicts`
 
 """
 from __future__ import absolute_import
+import collections
 import functools
 import operator
 import re
+import sys
+import anyconfig.compat
+import anyconfig.stats
 import anyconfig.utils
 
 
@@ -28,6 +39,9 @@ MERGE_STRATEGIES = (MS_REPLACE, MS_NO_REPLACE, MS_DICTS, MS_DICTS_AND_LISTS)
 
 PATH_SEPS = ('/', '.')
 
+# Max length of string values to intern. Keys are interned regardless of it.
+INTERN_MAX_LEN = 64
+
 _JSNP_GET_ARRAY_IDX_REG = re.compile(r"(?:0|[1-9][0-9]*)")
 _JSNP_SET_ARRAY_IDX = re.compile(r"(?:0|[1-9][0-9]*|-)")
 
@@ -231,7 +245,7 @@ def _update_with_merge(self, other, key, val=None, merge_lists=False,
     if key in self:
         val0 = self[key]  # Original value
         if anyconfig.utils.is_dict_like(val0):  # It needs recursive updates.
-            merge(self[key], val, merge_lists=merge_lists, **options)
+            _merge(self[key], val, merge_lists=merge_lists, **options)
         elif merge_lists and _are_list_like(val, val0):
             _merge_list(self, key, val)
         else:
@@ -287,6 +301,17 @@ def merge(self, other, ac_merge=MS_DICTS, **options):
     :param another: optional keyword arguments to update self more
     :param ac_merge: Merge strategy to choose
     """
+    tmr = anyconfig.stats.timer()
+    _merge(self, other, ac_merge=ac_merge, **options)
+    if tmr is not None:
+        tmr.emit("merge", strategy=ac_merge if isinstance(ac_merge, str)
+                 else getattr(ac_merge, "__name__", None))
+
+
+def _merge(self, other, ac_merge=MS_DICTS, **options):
+    """
+    Implementation of :func:`merge` called recursively.
+    """
     _update_fn = _get_update_fn(ac_merge)
 
     if hasattr(other, "keys"):
@@ -300,43 +325,424 @@ def merge(self, other, ac_merge=MS_DICTS, **options):
             raise type(exc)("%s other=%r" % (str(exc), other))
 
 
-def _make_recur(obj, make_fn, ac_ordered=False, ac_dict=None, **options):
+def diff_paths(old, new, path=()):
     """
-    :param obj: A mapping objects or other primitive object
-    :param make_fn: Function to make/convert to
-    :param ac_ordered: Use OrderedDict instead of dict to keep order of items
-    :param ac_dict: Callable to convert `obj` to mapping object
-    :param options: Optional keyword arguments.
+    List paths to the values changed between mapping objects `old` and `new`.
+    Mapping objects are compared recursively and lists of same length are
+    compared item by item, and other values are compared as a whole.
+
+    :param old: A mapping object or other object of the previous one
+    :param new: A mapping object or other object of the current one
+    :param path: A tuple of keys and indices to `old` and `new`
+
+    :return: A list of tuples of keys and indices to the values changed
 
-    :return: Mapping object
+    >>> old = dict(a=1, b=dict(c=2, d=[0, 1]), e=3)
+    >>> new = dict(a=1, b=dict(c=0, d=[0, 2]), f=4)
+    >>> sorted(diff_paths(old, new))
+    [('b', 'c'), ('b', 'd', 1), ('e',), ('f',)]
+    >>> diff_paths(old, old)
+    []
     """
-    if ac_dict is None:
-        ac_dict = anyconfig.compat.OrderedDict if ac_ordered else dict
+    if old is new:
+        return []
+
+    if anyconfig.utils.is_dict_like(old) and \
+            anyconfig.utils.is_dict_like(new):
+        paths = [path + (key, ) for key in old if key not in new]
+        for key in new:
+            if key in old:
+                paths.extend(diff_paths(old[key], new[key], path + (key, )))
+            else:
+                paths.append(path + (key, ))
+        return paths
+
+    if isinstance(old, list) and isinstance(new, list) and \
+            len(old) == len(new):
+        return anyconfig.utils.concat(diff_paths(oval, nval, path + (idx, ))
+                                      for idx, (oval, nval)
+                                      in enumerate(zip(old, new)))
+
+    return [] if old == new else [path]
+
+
+def _freeze(obj):
+    """
+    :param obj: A mapping object, list, set or other primitive object
+    :return: :class:`FrozenConfig`, tuple, frozenset object or `obj` itself
+    """
+    if isinstance(obj, (FrozenConfig, frozenset)):
+        return obj
+    elif anyconfig.utils.is_dict_like(obj):
+        return FrozenConfig(obj)
+    elif isinstance(obj, (list, tuple)):
+        res = tuple(_freeze(v) for v in obj)
+        if isinstance(obj, tuple) and all(x is y for x, y in zip(res, obj)):
+            return obj  # Not to copy tuples shared.
+        return res
+    elif isinstance(obj, set):
+        return frozenset(_freeze(v) for v in obj)
 
-    return ac_dict((k, None if v is None else make_fn(v, **options))
-                   for k, v in obj.items())
+    return obj
 
 
-def _make_iter(obj, make_fn, **options):
+class FrozenConfig(collections.Mapping):
     """
-    :param obj: A mapping objects or other primitive object
-    :param make_fn: Function to make/convert to
-    :param options: Optional keyword arguments.
+    Immutable and hashable mapping object. Mapping objects, lists and sets in
+    values are converted to FrozenConfig, tuples and frozensets recursively
+    (lists and sets in results of :func:`convert_to` with
+    ac_dict=FrozenConfig are converted as well).
+
+    As it cannot be modified, it can be shared among threads without copies,
+    :func:`copy.copy` and :func:`copy.deepcopy` return itself. The hash value
+    is computed from the contents once and cached, and it's compared first
+    with another one's if both are computed, and subtrees shared are regarded
+    as equal without comparing contents.
+
+    >>> cnf = FrozenConfig(a=1, b=dict(c=[1, {'d': 2}]))
+    >>> cnf["b"]["c"]
+    (1, FrozenConfig({'d': 2}))
+    >>> cnf == dict(a=1, b=dict(c=[1, dict(d=2)]))
+    True
+    >>> hash(cnf) == hash(FrozenConfig(cnf))
+    True
+    >>> cnf["a"] = 2  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    TypeError: 'FrozenConfig' object does not support item assignment
+    """
+    __slots__ = ("_items", "_hash")
+
+    def __init__(self, *args, **kwargs):
+        """
+        :param args: A mapping object or an iterable yields (key, value)
+        :param kwargs: Items as keyword arguments
+        """
+        items = dict(*args, **kwargs)
+        for key, val in items.items():
+            items[key] = _freeze(val)
+
+        object.__setattr__(self, "_items", items)
+        object.__setattr__(self, "_hash", None)
+
+    def __setattr__(self, name, val):
+        raise AttributeError("%r object is immutable"
+                             % self.__class__.__name__)
+
+    __delattr__ = __setattr__
+
+    def __getitem__(self, key):
+        return self._items[key]
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        return self._items.get(key, default)
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, "_hash",
+                               hash(frozenset(self._items.items())))
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+
+        if isinstance(other, FrozenConfig):
+            if len(self) != len(other) or \
+                    (self._hash is not None and other._hash is not None and
+                     self._hash != other._hash):
+                return False
+
+            oitems = other._items
+            return all(key in oitems and (val is oitems[key] or
+                                          val == oitems[key])
+                       for key, val in self._items.items())
+
+        if anyconfig.utils.is_dict_like(other):
+            return self == FrozenConfig(other)  # Lists to tuples, etc.
+
+        return NotImplemented
+
+    def __ne__(self, other):
+        res = self.__eq__(other)
+        return res if res is NotImplemented else not res
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self._items)
+
+    def __reduce__(self):
+        return (self.__class__, (self._items, ))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def thaw(obj):
+    """
+    Convert :class:`FrozenConfig` objects, and tuples and frozensets in them
+    back to dicts, lists and sets recursively, to pass them to functions
+    expect mutable ones such as dumpers of backends and validators.
+
+    :param obj: A :class:`FrozenConfig` object or any other object
+    :return: A dict made from `obj` or `obj` itself if it's not
+        :class:`FrozenConfig` object
+
+    >>> thaw(FrozenConfig(a=dict(b=[1, 2])))
+    {'a': {'b': [1, 2]}}
+    >>> dic = dict(a=(1, 2))
+    >>> thaw(dic) is dic
+    True
+    """
+    if not isinstance(obj, FrozenConfig):
+        return obj
+
+    return _thaw(obj)
+
+
+def _thaw(obj):
+    """
+    :param obj: An object in :class:`FrozenConfig` objects
+    :return: A mutable copy of `obj` or `obj` itself if it's primitive
+    """
+    if isinstance(obj, FrozenConfig):
+        return dict((k, _thaw(v)) for k, v in obj.items())
+    elif isinstance(obj, tuple):
+        return [_thaw(v) for v in obj]
+    elif isinstance(obj, frozenset):
+        return set(_thaw(v) for v in obj)
+
+    return obj
+
+
+def is_immutable_type(factory):
+    """
+    :param factory: A class or function to make mapping objects, or None
+    :return: True if `factory` is a class of immutable mapping objects
+
+    >>> is_immutable_type(FrozenConfig)
+    True
+    >>> is_immutable_type(dict), is_immutable_type(None)
+    (False, False)
+    """
+    return isinstance(factory, type) and \
+        issubclass(factory, collections.Mapping) and \
+        not issubclass(factory, collections.MutableMapping)
+
+
+def _intern_str(val, memo):
+    """
+    :param val: A string
+    :param memo: A dict to keep objects shared
+    """
+    try:
+        return anyconfig.compat.intern(val)
+    except TypeError:  # unicode objects in python 2.
+        return memo.setdefault(val, val)
+
+
+def _is_leaf(val):
+    """
+    :param val: Any object
+    :return: True if `val` is None or a primitive object, bool, int, etc.
+    """
+    return val is None or isinstance(val, anyconfig.compat.STR_TYPES +
+                                     (bool, int, float))
+
+
+def _hash_consed(obj, items, memo):
+    """
+    :param obj: A tuple, frozenset or :class:`FrozenConfig` object
+    :param items: Items of `obj` to compare
+    :param memo: A dict to keep objects shared
+    :return: The object equal to `obj` found in `memo` or `obj` itself
+    """
+    if not all(_is_leaf(v) for v in items):
+        return obj  # Only leaf subtrees are shared.
+
+    # Types are compared also not to regard 1, 1.0 and True as same.
+    key = (type(obj), tuple((type(v), v) for v in items))
+    return memo.setdefault(key, obj)
+
 
-    :return: Mapping object
+def intern_objects(obj, memo=None, max_len=INTERN_MAX_LEN):
     """
-    return type(obj)(make_fn(v, **options) for v in obj)
+    Intern keys of mapping objects and short string values in `obj` with
+    :func:`sys.intern`, and share identical leaf subtrees which consist of
+    primitive values and are immutable, tuples, frozensets and
+    :class:`FrozenConfig` objects, recursively. Mutable mapping objects and
+    lists are updated in place, and immutable ones are made again.
 
+    .. note::
+       Mutable mapping objects and lists are never shared even if they are
+       identical, as modifying one of them would change others. Make them
+       :class:`FrozenConfig` objects and tuples to share them.
 
-def convert_to(obj, ac_ordered=False, ac_dict=None, **options):
+    :param obj: A mapping object, list or other object
+    :param memo: A dict to keep objects shared, may be shared among calls to
+        share objects among results of them
+    :param max_len: Max length of string values to intern
+    :return: `obj` itself or an object equal to it
+
+    >>> memo = {}
+    >>> cnfs = [intern_objects(FrozenConfig(a=(1, 2)), memo)
+    ...         for _ in range(2)]
+    >>> cnfs[0]["a"] is cnfs[1]["a"]
+    True
+    """
+    if memo is None:
+        memo = {}
+
+    if isinstance(obj, anyconfig.compat.STR_TYPES):
+        return _intern_str(obj, memo) if len(obj) <= max_len else obj
+
+    if anyconfig.utils.is_dict_like(obj):
+        items = [(_intern_str(k, memo)
+                  if isinstance(k, anyconfig.compat.STR_TYPES) else k,
+                  intern_objects(v, memo, max_len)) for k, v in obj.items()]
+        if isinstance(obj, FrozenConfig):
+            obj = FrozenConfig(items)
+            return _hash_consed(obj, [k for k, _v in items] +
+                                [v for _k, v in items], memo)
+        if isinstance(obj, collections.MutableMapping):
+            obj.clear()  # Keys must be replaced.
+            obj.update(items)
+        return obj
+
+    if isinstance(obj, list):
+        obj[:] = [intern_objects(v, memo, max_len) for v in obj]
+    elif isinstance(obj, (tuple, frozenset)) and \
+            not anyconfig.utils.is_namedtuple(obj):
+        items = [intern_objects(v, memo, max_len) for v in obj]
+        return _hash_consed(type(obj)(items), items, memo)
+
+    return obj
+
+
+def sizeof(obj):
+    """
+    Compute the size of memory `obj` and objects in it retain in bytes. Each
+    object shared in `obj` is counted only once.
+
+    :param obj: A mapping object, list or other object
+    :return: Size in bytes
+
+    >>> sizeof([1, 1]) == sys.getsizeof([1, 1]) + sys.getsizeof(1)
+    True
+    """
+    (size, seen, objs) = (0, set(), [obj])
+    while objs:
+        obj = objs.pop()
+        if id(obj) in seen:
+            continue
+
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, FrozenConfig):
+            objs.append(obj._items)  # pylint: disable=protected-access
+        elif anyconfig.utils.is_dict_like(obj):
+            objs.extend(obj.keys())
+            objs.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            objs.extend(obj)
+
+    return size
+
+
+# Types of objects never need conversion, to check them quickly.
+_LEAF_TYPES = anyconfig.compat.STR_TYPES + (bool, int, float, type(None))
+
+
+def _container_items(obj):
+    """
+    :param obj: A mapping object or a list-like object
+    :return: A list of pairs of (key or None, value)
+    """
+    if type(obj) is dict or anyconfig.utils.is_dict_like(obj):
+        return list(obj.items())
+
+    return [(None, val) for val in obj]
+
+
+def _is_container(obj):
+    """
+    :param obj: Any object
+    :return: True if `obj` is a mapping object or a list-like object
+    """
+    return anyconfig.utils.is_dict_like(obj) or \
+        anyconfig.utils.is_list_like(obj)
+
+
+def _make_container(obj, items, vals, changed, ac_dict, ac_inplace=False,
+                    ac_share=False):
+    """
+    :param obj: A mapping object or a list-like object to convert
+    :param items: A list of pairs of (key or None, value) of `obj`
+    :param vals: A list of values converted
+    :param changed: True if any of `vals` is not the original value
+    :param ac_dict: Callable to make mapping objects
+    :param ac_inplace: Return `obj` itself if nothing needs conversion or
+        update it in place if possible instead of making a new object
+    :param ac_share: Return `obj` itself if nothing needs conversion
+
+    :return: `obj` itself or new object
+    """
+    share = ac_inplace or ac_share
+    if type(obj) is dict or anyconfig.utils.is_dict_like(obj):
+        if type(obj) is ac_dict:  # Exactly the target type.
+            if not changed and (share or is_immutable_type(ac_dict)):
+                return obj
+            if ac_inplace and isinstance(obj, collections.MutableMapping):
+                for (key, _val), val in zip(items, vals):
+                    obj[key] = val
+                return obj
+
+        return ac_dict(zip((k for k, _v in items), vals))
+
+    if not changed and (share or isinstance(obj, (tuple, frozenset))):
+        return obj
+    if ac_inplace and isinstance(obj, list):
+        obj[:] = vals
+        return obj
+
+    return type(obj)(vals)
+
+
+def convert_to(obj, ac_ordered=False, ac_dict=None, ac_inplace=False,
+               ac_share=False, **options):
     """
     Convert a mapping objects to a dict or object of `to_type` recursively.
     Borrowed basic idea and implementation from bunch.unbunchify. (bunch is
     distributed under MIT license same as this.)
 
+    .. versionchanged:: 0.9.4
+
+       Objects are traversed iteratively to convert deeply nested ones without
+       hitting the recursion limit. Mapping objects and lists are copied as
+       before unless ac_inplace is True, with which ones of which items need
+       no conversion are returned as they are and the others are updated in
+       place to avoid copies, or only ones of which items need no conversion
+       are returned as they are if ac_share is True.
+
     :param obj: A mapping objects or other primitive object
     :param ac_ordered: Use OrderedDict instead of dict to keep order of items
     :param ac_dict: Callable to convert `obj` to mapping object
+    :param ac_inplace: Return mapping objects of the target type and lists
+        as they are if their items need no conversion, or update them in place
+        if their items were converted, instead of making new ones
+    :param ac_share: Return mapping objects of the target type and lists as
+        they are if their items need no conversion, and make new ones of the
+        others without modifying `obj`; results may share subtrees with `obj`
     :param options: Optional keyword arguments.
 
     :return: A dict or OrderedDict or object of `cls`
@@ -346,13 +752,45 @@ def convert_to(obj, ac_ordered=False, ac_dict=None, **options):
     {'a': 1}
     >>> convert_to(OD((('a', OD((('b', OD((('c', 1), ))), ))), )), cls=dict)
     {'a': {'b': {'c': 1}}}
-    """
-    options.update(ac_ordered=ac_ordered, ac_dict=ac_dict)
-    if anyconfig.utils.is_dict_like(obj):
-        return _make_recur(obj, convert_to, **options)
-    elif anyconfig.utils.is_list_like(obj):
-        return _make_iter(obj, convert_to, **options)
+    >>> convert_to(dict(a=dict(b=[1, 2])), ac_dict=FrozenConfig)
+    FrozenConfig({'a': FrozenConfig({'b': (1, 2)})})
+    >>> dic = dict(a=dict(b=[1, 2]))
+    >>> convert_to(dic) is dic, convert_to(dic, ac_inplace=True) is dic
+    (False, True)
+    >>> res = convert_to(dict(a=OD(b=1), c=dic), ac_share=True)
+    >>> type(res["a"]) is dict, res["c"] is dic
+    (True, True)
+    """
+    if not _is_container(obj):
+        return obj
 
-    return obj
+    if ac_dict is None:
+        ac_dict = anyconfig.compat.OrderedDict if ac_ordered else dict
+
+    # Frames of [object, items, index of the next item, values converted,
+    # True if any of values changed].
+    stack = [[obj, _container_items(obj), 0, [], False]]
+    while True:
+        frame = stack[-1]
+        (items, vals) = (frame[1], frame[3])
+        while frame[2] < len(items):
+            val = items[frame[2]][1]
+            frame[2] += 1
+            if type(val) in _LEAF_TYPES or not _is_container(val):
+                vals.append(val)
+            else:
+                stack.append([val, _container_items(val), 0, [], False])
+                break
+        else:
+            cur = frame[0]
+            res = _make_container(cur, items, vals, frame[4], ac_dict,
+                                  ac_inplace, ac_share)
+            stack.pop()
+            if not stack:
+                return res
+
+            stack[-1][3].append(res)
+            if res is not cur:
+                stack[-1][4] = True
 
 # vim:sw=4:ts=4:et:
@@ -6,16 +6,15 @@ r"""anyconfig.query module to support query data with JMESPath expressions.
 
 Changelog:
 
+.. versionchanged:: 0.9.4
+
+   - jmespath is imported on demand, only when it's needed
+
 .. versionadded:: 0.8.3
 
    - Added to query config data with JMESPath expression, http://jmespath.org
 """
 from __future__ import absolute_import
-try:
-    import jmespath
-except ImportError:
-    pass
-
 from anyconfig.globals import LOGGER
 
 
@@ -37,12 +36,13 @@ def query(data, **options):
         return data
 
     try:
+        import jmespath  # Lazy; it's slow to import.
         pexp = jmespath.compile(expression)
         return pexp.search(data)
     except ValueError as exc:  # jmespath.exceptions.*Error inherit from it.
         LOGGER.warning("Failed to compile or search: exp=%s, exc=%r",
                        expression, exc)
-    except (NameError, AttributeError):
+    except (ImportError, AttributeError):
         LOGGER.warning("Filter module (jmespath) is not available. "
                        "Do nothing.")
 
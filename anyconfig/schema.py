@@ -4,6 +4,33 @@
 #
 """anyconfig.schema module.
 
+.. versionadded:: 0.9.4
+   Added new API :func:`compile_schema` to compile schema objects to validator
+   objects and cache them to avoid checking schema objects again and again
+
+.. versionadded:: 0.9.4
+   Validators specialized for schema objects are generated and compiled to
+   python byte code if these only use keywords :func:`gen_schema` generates,
+   and jsonschema is used as a fallback for other keywords
+
+.. versionadded:: 0.9.4
+   Added options, ac_schema_jobs, ac_schema_chunk_size and
+   ac_schema_max_errors, to validate large arrays in parallel and stop
+   validation early, and new API :func:`validate_many` to validate objects
+   independently in parallel
+
+.. versionadded:: 0.9.4
+   Added :class:`IncrementalValidator` to validate only the parts of data
+   changed since the last validation
+
+.. versionadded:: 0.9.4
+   Schema of items in arrays are inferred from all or sampled items
+   (ac_schema_sample_rate option) and merged, and added new API
+   :func:`merge_schema` to merge schema objects :func:`gen_schema` generated
+
+.. versionchanged:: 0.9.4
+   jsonschema is imported on demand, only when it's needed
+
 .. versionchanged:: 0.9.4
    Change parameter passed to :func:`validate`, s/.*safe/ac_schema_safe/g
 
@@ -21,12 +48,18 @@
    Added new API :func:`validate` to validate config with JSON schema
 """
 from __future__ import absolute_import
-try:
-    import jsonschema
-except ImportError:
-    pass
+
+import collections
+import hashlib
+import itertools
+import json
+import multiprocessing
+import numbers
+import os
 
 import anyconfig.compat
+import anyconfig.dicts
+import anyconfig.stats
 import anyconfig.utils
 
 
@@ -46,8 +79,637 @@ if not anyconfig.compat.IS_PYTHON_3:
     except NameError:
         pass
 
+# Cache of compiled validators: {(schema_digest, cls): validator}
+_VALIDATORS = {}
+_VALIDATORS_MAX = 128
+
+_CHUNK_SIZE = 10000
+_VALIDATE_OPTS = ("cls", "ac_schema_jobs", "ac_schema_chunk_size",
+                  "ac_schema_max_errors", "ac_schema_error_paths")
+
+# Data to validate shared with worker processes forked.
+_SHARED = {}
+
+
+def _schema_digest(schema):
+    """
+    :param schema: Schema object (a dict or a dict-like object)
+    :return: A digest string computed from the content of `schema`
+
+    >>> _schema_digest({"a": 1, "b": 2}) == _schema_digest({"b": 2, "a": 1})
+    True
+    """
+    content = json.dumps(schema, sort_keys=True, default=repr)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def _is_validator(obj):
+    """
+    :return: True if given `obj` is a validator object already compiled
+    """
+    return callable(getattr(obj, "iter_errors", None))
+
+
+# Keywords code generator can process; other keywords such as 'pattern' and
+# '$ref' make it fallback to jsonschema.
+_CG_KEYWORDS = frozenset(("type", "properties", "items", "required",
+                          "minItems", "maxItems", "uniqueItems", "enum",
+                          "anyOf"))
+_CG_ANNOTATIONS = frozenset(("$schema", "id", "title", "description",
+                             "default"))
+
+_CG_TYPE_CHECKS = dict(array="isinstance(%(v)s, list)",
+                       boolean="isinstance(%(v)s, bool)",
+                       integer=("isinstance(%(v)s, _INT_TYPES) and "
+                                "not isinstance(%(v)s, bool)"),
+                       null="%(v)s is None",
+                       number=("isinstance(%(v)s, numbers.Number) and "
+                               "not isinstance(%(v)s, bool)"),
+                       object="isinstance(%(v)s, dict)",
+                       string="isinstance(%(v)s, _STR_TYPES)")
+
+if anyconfig.compat.IS_PYTHON_3:
+    _INT_TYPES = (int, )
+else:
+    _INT_TYPES = (int, long)  # flake8: noqa
+
+
+class ValidationError(ValueError):
+    """
+    Validation error yielded from validators made by :func:`compile_schema`.
+    It has `message` and `path` attributes same as jsonschema.ValidationError.
+    """
+    def __init__(self, message, path=()):
+        super(ValidationError, self).__init__(message)
+        self.message = message
+        self.path = collections.deque(path)
+
+
+def _to_jsonschema_error(exc):
+    """
+    :param exc: An exception raised on validation
+    :return: jsonschema.ValidationError made from `exc` if it's a
+        :class:`ValidationError` and jsonschema is available, or `exc`
+    """
+    if not isinstance(exc, ValidationError):
+        return exc
+
+    try:
+        import jsonschema.exceptions
+    except ImportError:
+        return exc
+
+    return jsonschema.exceptions.ValidationError(exc.message, path=exc.path)
+
+
+def _check_schema(schema, cls=None):
+    """
+    Check `schema` itself with jsonschema if it's available.
+
+    :param schema: Schema object (a dict or a dict-like object)
+    :param cls: Validator class or None to select it from `schema`
+    :return: Validator class selected or None if jsonschema is not available
+    :raises: jsonschema.SchemaError if `schema` is not valid
+    """
+    try:
+        import jsonschema.validators  # Lazy; it's slow to import.
+    except ImportError:
+        return None
+
+    if cls is None:
+        cls = jsonschema.validators.validator_for(
+            schema, default=jsonschema.validators.Draft4Validator
+        )
+    cls.check_schema(schema)
+    return cls
+
+
+def _unique_key(item):
+    """
+    :param item: An item of arrays
+    :return: A hashable object identifies `item`, e.g. distinguishes True and 1
+
+    >>> _unique_key(1) == _unique_key(1.0), _unique_key(1) == _unique_key(True)
+    (True, False)
+    >>> _unique_key({"a": [1]}) == _unique_key({"a": [1]})
+    True
+    """
+    if anyconfig.utils.is_dict_like(item):
+        return ("{}", frozenset((k, _unique_key(v)) for k, v in item.items()))
+    if isinstance(item, (list, tuple)):
+        return ("[]", tuple(_unique_key(i) for i in item))
+    try:
+        hash(item)
+    except TypeError:
+        return ("repr", repr(item))
+
+    return (isinstance(item, bool), item)
+
+
+def _is_unique(arr):
+    """
+    :param arr: A list of items
+    :return: True if all items of `arr` are unique
+
+    >>> _is_unique([1, True, "a", [1], {"b": 2}])
+    True
+    >>> _is_unique([1, True, 1.0])
+    False
+    >>> _is_unique([{"a": 1}, {"a": 1}])
+    False
+    """
+    seen = set()
+    for item in arr:
+        key = _unique_key(item)
+        if key in seen:
+            return False
+        seen.add(key)
+
+    return True
+
+
+def _is_valid(iter_errors_fn, val):
+    """
+    :param iter_errors_fn: A function :class:`_CodeGen` generated
+    :return: True if `val` is valid
+    """
+    return next(iter_errors_fn(val), None) is None
+
+
+def _in_enum(val, enum):
+    """
+    >>> _in_enum(1, [1, 2]), _in_enum(True, [1, 2]), _in_enum("a", ["b"])
+    (True, False, False)
+    """
+    return any(isinstance(val, bool) == isinstance(x, bool) and val == x
+               for x in enum)
+
 
-def _validate_all(data, schema):
+def _is_compilable(schema):
+    """
+    :param schema: Schema object (a dict or a dict-like object)
+    :return: True if checks can be generated from `schema` by :class:`_CodeGen`
+    """
+    if not anyconfig.utils.is_dict_like(schema):
+        return False
+
+    if any(k not in _CG_KEYWORDS and k not in _CG_ANNOTATIONS
+           for k in schema.keys()):
+        return False
+
+    if "draft-04" not in schema.get("$schema", "draft-04"):
+        return False
+
+    types = schema.get("type", [])
+    if any(t not in _CG_TYPE_CHECKS for t in
+           ([types] if isinstance(types, anyconfig.compat.STR_TYPES)
+            else types)):
+        return False
+
+    if not all(isinstance(schema.get(k, 0), _INT_TYPES) and
+               schema.get(k, 0) >= 0 for k in ("minItems", "maxItems")):
+        return False
+
+    if not isinstance(schema.get("uniqueItems", False), bool) or \
+            not anyconfig.utils.is_list_like(schema.get("required", [])) or \
+            not anyconfig.utils.is_list_like(schema.get("enum", [None])):
+        return False
+
+    items = schema.get("items", None)
+    if anyconfig.utils.is_list_like(items):
+        if not all(_is_compilable(s) for s in items):
+            return False
+    elif items is not None and not _is_compilable(items):
+        return False
+
+    alts = schema.get("anyOf", None)
+    if alts is not None and (not anyconfig.utils.is_list_like(alts) or
+                             not alts or
+                             not all(_is_compilable(s) for s in alts)):
+        return False
+
+    props = schema.get("properties", {})
+    return anyconfig.utils.is_dict_like(props) and \
+        all(_is_compilable(s) for s in props.values())
+
+
+class _CodeGen(object):
+    """
+    Generate the source code of a generator function yields (path, message)
+    for each validation error from a schema object :func:`_is_compilable`
+    accepts, that is, checks done in the interpreter of jsonschema are
+    unrolled into plain python statements specialized for that schema.
+    """
+    def __init__(self, name="_iter_errors", parent=None):
+        """
+        :param name: Name of the function to generate
+        :param parent: Parent :class:`_CodeGen` object shares constants and
+            functions with this
+        """
+        self.lines = ["def %s(v0):" % name]
+        if parent is None:
+            (self.consts, self.fns) = ({}, [])
+            self.counter = itertools.count(1)
+        else:
+            (self.consts, self.fns) = (parent.consts, parent.fns)
+            self.counter = parent.counter
+
+    def emit(self, depth, line):
+        """Append a line of code indented by `depth`."""
+        self.lines.append("    " * depth + line)
+
+    def new_var(self, prefix='v'):
+        """Make a new unique variable name."""
+        return "%s%d" % (prefix, next(self.counter))
+
+    def new_fn(self, schema):
+        """
+        Generate another function from `schema` and make a name refers to it.
+        """
+        name = self.new_var("_f")
+        cgen = _CodeGen(name, self)
+        cgen.gen(schema, "v0", [])
+        self.fns.append(cgen.source(with_fns=False))
+        return name
+
+    def new_const(self, val):
+        """Make a new name refers to a constant value `val`."""
+        name = self.new_var("_c")
+        self.consts[name] = val
+        return name
+
+    def emit_error(self, depth, path, msg, var=None):
+        """
+        Emit a statement yields an error.
+
+        :param path: A list of expressions make a path to the value
+        :param msg: Message or its format string takes `var` if given
+        :param var: A variable of the value not valid
+        """
+        path_s = "(%s, )" % ", ".join(path) if path else "()"
+        msg_s = repr(msg) if var is None else "%r %% (%s, )" % (msg, var)
+        self.emit(depth, "yield (%s, %s)" % (path_s, msg_s))
+
+    def gen(self, schema, var, path, depth=1):
+        """
+        Generate checks for the value `var` from `schema`.
+
+        :param schema: Schema object accepted by :func:`_is_compilable`
+        :param var: A variable name of the value to check
+        :param path: A list of expressions make a path to the value
+        :param depth: Indentation depth
+        """
+        types = schema.get("type", None)
+        if types is not None:
+            if isinstance(types, anyconfig.compat.STR_TYPES):
+                types = [types]
+            cond = " or ".join("(%s)" % _CG_TYPE_CHECKS[t] % dict(v=var)
+                               for t in types)
+            self.emit(depth, "if not (%s):" % (cond or "False"))
+            self.emit_error(depth + 1, path,
+                            "%r is not of type " +
+                            ", ".join(repr(t) for t in types), var)
+
+        if "enum" in schema:
+            self.emit(depth, "if not _in_enum(%s, %s):" %
+                      (var, self.new_const(list(schema["enum"]))))
+            enum_s = repr(list(schema["enum"])).replace('%', "%%")
+            self.emit_error(depth + 1, path, "%r is not one of " + enum_s,
+                            var)
+
+        if "anyOf" in schema:
+            fns = [self.new_fn(scm) for scm in schema["anyOf"]]
+            self.emit(depth, "if not any(_is_valid(f, %s) for f in (%s, )):"
+                      % (var, ", ".join(fns)))
+            self.emit_error(depth + 1, path,
+                            "%r is not valid under any of the given schemas",
+                            var)
+
+        if any(k in schema for k in ("properties", "required")):
+            self.emit(depth, "if isinstance(%s, dict):" % var)
+            self.emit(depth + 1, "pass")
+            for key in schema.get("required", []):
+                self.emit(depth + 1, "if %r not in %s:" % (key, var))
+                self.emit_error(depth + 2, path,
+                                "%r is a required property" % key)
+
+            for key, scm in schema.get("properties", {}).items():
+                if not scm:
+                    continue
+                cvar = self.new_var()
+                self.emit(depth + 1, "if %r in %s:" % (key, var))
+                self.emit(depth + 2, "%s = %s[%r]" % (cvar, var, key))
+                self.gen(scm, cvar, path + [repr(key)], depth + 2)
+
+        if any(k in schema for k in ("items", "minItems", "maxItems",
+                                     "uniqueItems")):
+            self.gen_array(schema, var, path, depth)
+
+    def gen_array(self, schema, var, path, depth):
+        """
+        Generate checks for the value `var` from `schema` for arrays.
+        """
+        self.emit(depth, "if isinstance(%s, list):" % var)
+        self.emit(depth + 1, "pass")
+        if "minItems" in schema:
+            self.emit(depth + 1, "if len(%s) < %d:" % (var,
+                                                       schema["minItems"]))
+            self.emit_error(depth + 2, path, "%r is too short", var)
+
+        if "maxItems" in schema:
+            self.emit(depth + 1, "if len(%s) > %d:" % (var,
+                                                       schema["maxItems"]))
+            self.emit_error(depth + 2, path, "%r is too long", var)
+
+        if schema.get("uniqueItems", False):
+            self.emit(depth + 1, "if not _is_unique(%s):" % var)
+            self.emit_error(depth + 2, path, "%r has non-unique elements",
+                            var)
+
+        items = schema.get("items", {})
+        if anyconfig.utils.is_list_like(items):
+            for idx, scm in enumerate(items):
+                cvar = self.new_var()
+                self.emit(depth + 1, "if len(%s) > %d:" % (var, idx))
+                self.emit(depth + 2, "%s = %s[%d]" % (cvar, var, idx))
+                self.gen(scm, cvar, path + [str(idx)], depth + 2)
+        elif items:
+            (idx, cvar) = (self.new_var('i'), self.new_var())
+            self.emit(depth + 1,
+                      "for %s, %s in enumerate(%s):" % (idx, cvar, var))
+            self.gen(items, cvar, path + [idx], depth + 2)
+            self.emit(depth + 2, "pass")
+
+    def source(self, with_fns=True):
+        """
+        :param with_fns: Include the functions generated for sub schemas
+        :return: The source code of the function generated
+        """
+        return "\n".join((self.fns if with_fns else []) + self.lines +
+                         ["    if False:", "        yield None", ""])
+
+
+class CompiledValidator(object):
+    """
+    Validator runs the checks generated from a schema object and compiled to
+    python byte code. It provides a subset of the APIs of jsonschema
+    validators, :meth:`iter_errors`, :meth:`is_valid` and :meth:`validate`.
+    """
+    def __init__(self, schema):
+        """
+        :param schema: Schema object accepted by :func:`_is_compilable`
+        :raises: SyntaxError if `schema` is too deeply nested to compile
+        """
+        cgen = _CodeGen()
+        cgen.gen(schema, "v0", [])
+
+        self.schema = schema
+        self.source = cgen.source()
+
+        nspace = dict(numbers=numbers, _INT_TYPES=_INT_TYPES,
+                      _STR_TYPES=anyconfig.compat.STR_TYPES,
+                      _in_enum=_in_enum, _is_unique=_is_unique,
+                      _is_valid=_is_valid)
+        nspace.update(cgen.consts)
+        exec(compile(self.source, "<anyconfig.schema>", "exec"), nspace)
+        self._iter_errors = nspace["_iter_errors"]
+
+    def iter_errors(self, instance):
+        """
+        :param instance: Target object to validate
+        :yield: :class:`ValidationError` objects
+        """
+        for path, msg in self._iter_errors(instance):
+            yield ValidationError(msg, path)
+
+    def is_valid(self, instance):
+        """
+        :param instance: Target object to validate
+        :return: True if `instance` is valid
+        """
+        return next(self._iter_errors(instance), None) is None
+
+    def validate(self, instance):
+        """
+        :param instance: Target object to validate
+        :raises: :class:`ValidationError` if `instance` is not valid
+        """
+        for error in self.iter_errors(instance):
+            raise error
+
+
+def compile_schema(schema, cls=None):
+    """
+    Compile given schema object to a validator object, or get the one compiled
+    and cached previously from the same content.
+
+    A :class:`CompiledValidator` is made if `cls` was not given and `schema`
+    only consists of Draft 4 keywords code can be generated from, 'type',
+    'properties', 'items', 'required', 'minItems', 'maxItems', 'uniqueItems',
+    'enum' and 'anyOf'. Otherwise, a validator of jsonschema is made and its
+    class is selected from the '$schema' keyword of `schema` (Draft4Validator
+    is used if it's missing) unless `cls` was given, and `schema` itself is
+    checked only once on compilation.
+
+    :param schema: Schema object (a dict or a dict-like object) or a validator
+        object compiled previously
+    :param cls: Validator class to use instead of the one selected
+
+    :return: A validator object or None if `schema` needs jsonschema but it is
+        not available
+    :raises: jsonschema.SchemaError if `schema` is not valid
+    """
+    if _is_validator(schema):
+        return schema
+
+    try:
+        key = (_schema_digest(schema), cls)
+        vldtr = _VALIDATORS.get(key, None)
+        if anyconfig.stats.HOOKS:
+            anyconfig.stats.emit("compile_schema",
+                                 cache="miss" if vldtr is None else "hit")
+        if vldtr is None and cls is None and _is_compilable(schema):
+            _check_schema(schema)
+            try:
+                vldtr = CompiledValidator(schema)
+            except (SyntaxError, RuntimeError):  # Too deeply nested.
+                pass
+
+        if vldtr is None:
+            cls = _check_schema(schema, cls)
+            if cls is None:
+                raise ImportError(_NA_MSG)
+            vldtr = cls(schema)
+
+        if key not in _VALIDATORS:
+            if len(_VALIDATORS) >= _VALIDATORS_MAX:
+                _VALIDATORS.clear()
+            _VALIDATORS[key] = vldtr
+
+        return vldtr
+
+    except ImportError:
+        return None
+
+
+def _first_error(vldtr, data):
+    """
+    :param vldtr: A validator object :func:`compile_schema` returns
+    :param data: Target object to validate
+    :return: The most relevant validation error or None
+    """
+    if isinstance(vldtr, CompiledValidator):
+        return next(vldtr.iter_errors(data), None)
+
+    import jsonschema.exceptions
+    return jsonschema.exceptions.best_match(vldtr.iter_errors(data))
+
+
+def _format_error(path, msg):
+    """
+    :param path: A sequence of keys and indices point to the value not valid
+    :param msg: Error message
+    :return: Error message with JSON Pointer to the value not valid prepended
+
+    >>> _format_error((), "'a' is a required property")
+    "'a' is a required property"
+    >>> _format_error(("a/b", 0), "1 is not of type 'string'")
+    "/a~1b/0: 1 is not of type 'string'"
+    """
+    if not path:
+        return msg
+
+    ptr = ''.join('/' + str(p).replace('~', "~0").replace('/', "~1")
+                  for p in path)
+    return "%s: %s" % (ptr, msg)
+
+
+def _error_message(path, msg, paths=False):
+    """
+    :param path: A sequence of keys and indices point to the value not valid
+    :param msg: Error message
+    :param paths: Prepend JSON Pointer to the value not valid if True
+    :return: Error message
+
+    >>> _error_message(("a", ), "1 is not of type 'string'")
+    "1 is not of type 'string'"
+    >>> _error_message(("a", ), "1 is not of type 'string'", True)
+    "/a: 1 is not of type 'string'"
+    """
+    return _format_error(path, msg) if paths else msg
+
+
+def _validator_cls(vldtr):
+    """
+    :return: A validator class to pass to :func:`compile_schema`
+    """
+    return None if isinstance(vldtr, CompiledValidator) else type(vldtr)
+
+
+def _validate_chunk(args):
+    """
+    Validate items in a chunk of an array. This is run in worker processes.
+
+    :param args: A tuple of (schema of items, validator class, start index,
+        end index, items or None if the array is shared, max errors)
+    :return: A list of (path, error message)
+    """
+    (schema, cls, start, end, items, max_errors) = args
+    if items is None:
+        items = _SHARED["data"][start:end]
+
+    vldtr = compile_schema(schema, cls=cls)
+    errors = []
+    for idx, item in enumerate(items, start):
+        for err in vldtr.iter_errors(item):
+            errors.append(((idx, ) + tuple(err.path), err.message))
+            if max_errors and len(errors) >= max_errors:
+                return errors
+
+    return errors
+
+
+def _is_forked():
+    """
+    :return: True if worker processes will be forked
+    """
+    try:
+        return multiprocessing.get_start_method() == "fork"
+    except AttributeError:  # python < 3.4
+        return os.name == "posix"
+
+
+def _list_items_errors(vldtr, arr, jobs, chunk_size=_CHUNK_SIZE,
+                       max_errors=None):
+    """
+    Split the array `arr` into chunks and validate items in each chunk with
+    `vldtr` in worker processes.
+
+    :param vldtr: A validator object to validate each item of `arr`
+    :param arr: A list of items to validate
+    :param jobs: Number of worker processes
+    :param chunk_size: Number of items in each chunk
+    :param max_errors: Stop validation if errors more than this were found
+    :return: A list of (path, error message)
+    """
+    shared = _is_forked()
+    chunks = ((vldtr.schema, _validator_cls(vldtr), start,
+               start + chunk_size,
+               None if shared else arr[start:start + chunk_size], max_errors)
+              for start in range(0, len(arr), chunk_size))
+    errors = []
+
+    _SHARED["data"] = arr
+    pool = multiprocessing.Pool(jobs)
+    try:
+        for cerrs in pool.imap(_validate_chunk, chunks):
+            errors.extend(cerrs)
+            if max_errors and len(errors) >= max_errors:
+                break
+    finally:
+        pool.terminate()
+        pool.join()
+        _SHARED.clear()
+
+    return errors[:max_errors] if max_errors else errors
+
+
+def _list_errors(vldtr, data, ac_schema_jobs=None,
+                 ac_schema_chunk_size=_CHUNK_SIZE, ac_schema_max_errors=None):
+    """
+    Validate `data` with `vldtr` and list errors.
+
+    Items of a large array `data` are validated in parallel if
+    `ac_schema_jobs` > 1 and its schema has 'items' keyword of a schema object.
+
+    :return: A list of (path, error message)
+    """
+    items = vldtr.schema.get("items", None)
+    if ac_schema_jobs and ac_schema_jobs > 1 and isinstance(data, list) and \
+            len(data) > ac_schema_chunk_size and \
+            anyconfig.utils.is_dict_like(items):
+        cls = _validator_cls(vldtr)
+        rest = dict((k, v) for k, v in vldtr.schema.items() if k != "items")
+        errors = _list_errors(compile_schema(rest, cls=cls), data,
+                              ac_schema_max_errors=ac_schema_max_errors)
+        if not ac_schema_max_errors or len(errors) < ac_schema_max_errors:
+            errors += _list_items_errors(
+                compile_schema(items, cls=cls), data, ac_schema_jobs,
+                ac_schema_chunk_size,
+                ac_schema_max_errors and ac_schema_max_errors - len(errors)
+            )
+        return errors
+
+    errors = ((tuple(err.path), err.message) for err
+              in vldtr.iter_errors(data))
+    if ac_schema_max_errors:
+        errors = itertools.islice(errors, ac_schema_max_errors)
+
+    return list(errors)
+
+
+def _validate_all(data, schema, ac_schema_safe=True, cls=None,
+                  ac_schema_error_paths=True, **options):
     """
     See the descritpion of :func:`validate` for more details of parameters and
     return value.
@@ -56,18 +718,25 @@ def _validate_all(data, schema):
     a section of 'iter_errors' especially
     """
     try:
-        vldtr = jsonschema.Draft4Validator(schema)  # :raises: SchemaError, ...
-        errors = list(vldtr.iter_errors(data))
+        vldtr = compile_schema(schema, cls=cls)
+        if vldtr is None:
+            return (True, _NA_MSG)
 
-        return (not errors, [err.message for err in errors])
+        errors = _list_errors(vldtr, data, **options)
 
-    except NameError:
-        return (True, _NA_MSG)
+        return (not errors, [_error_message(path, msg, ac_schema_error_paths)
+                             for path, msg in errors])
+
+    except Exception as exc:  # jsonschema.SchemaError, etc.
+        if ac_schema_safe:
+            return (False, [str(exc)])
+        raise
 
     return (True, '')
 
 
-def _validate(data, schema, ac_schema_safe=True, **options):
+def _validate(data, schema, ac_schema_safe=True, cls=None,
+              ac_schema_error_paths=False, **options):
     """
     See the descritpion of :func:`validate` for more details of parameters and
     return value.
@@ -75,18 +744,34 @@ def _validate(data, schema, ac_schema_safe=True, **options):
     Validate target object `data` with given schema object.
     """
     try:
-        jsonschema.validate(data, schema, **options)
-        return (True, '')
+        vldtr = compile_schema(schema, cls=cls)
+        if vldtr is None:
+            return (True, _NA_MSG)
 
-    except NameError:
-        return (True, _NA_MSG)
+        if options.get("ac_schema_jobs", None):
+            options["ac_schema_max_errors"] = 1
+            errors = _list_errors(vldtr, data, **options)
+            if errors:
+                (path, msg) = errors[0]
+                raise ValidationError(_error_message(path, msg,
+                                                     ac_schema_error_paths),
+                                      path)
+        else:
+            error = _first_error(vldtr, data)
+            if error is not None:
+                raise error
 
-    except (jsonschema.ValidationError, jsonschema.SchemaError,
-            Exception) as exc:
+        return (True, '')
+
+    # ValidationError, jsonschema.{ValidationError,SchemaError}, etc.
+    except Exception as exc:
         if ac_schema_safe:
             return (False, str(exc))  # Validation was failed.
-        else:
+
+        err = _to_jsonschema_error(exc)
+        if err is exc:
             raise
+        raise err
 
     return (True, '')
 
@@ -98,9 +783,11 @@ def validate(data, schema, ac_schema_safe=True, ac_schema_errors=False,
 
     See also: https://python-jsonschema.readthedocs.org/en/latest/validate/
 
-    :parae data: Target object (a dict or a dict-like object) to validate
+    :parae data: Target object (a dict or a dict-like object) to validate,
+        :class:`~anyconfig.dicts.FrozenConfig` objects are converted to dicts
     :param schema: Schema object (a dict or a dict-like object)
-        instantiated from schema JSON file or schema JSON string
+        instantiated from schema JSON file or schema JSON string, or a
+        validator object returned from :func:`compile_schema`
     :param options: Other keyword options such as:
 
         - ac_schema_safe: Exception (jsonschema.ValidationError or
@@ -111,13 +798,201 @@ def validate(data, schema, ac_schema_safe=True, ac_schema_errors=False,
         - ac_schema_errors: Lazily yield each of the validation errors and
           returns all of them if validation fails.
 
+        - ac_schema_error_paths: Prefix error messages with JSON Pointer to
+          the value not valid, e.g. '/a/0: ...'. It's True by default if
+          ac_schema_errors is True, and False otherwise.
+
+        - ac_schema_jobs: Number of worker processes to validate items of a
+          large array `data` in parallel. Items are validated in the current
+          process by default.
+
+        - ac_schema_chunk_size: Number of items of the array `data` each
+          worker process validates at once, 10000 by default. Arrays not
+          longer than this are validated in the current process.
+
+        - ac_schema_max_errors: Stop validation after this number of errors
+          were found.
+
     :return: (True if validation succeeded else False, error message[s])
     """
-    options = anyconfig.utils.filter_options(("cls", ), options)
+    tmr = anyconfig.stats.timer()
+    options = anyconfig.utils.filter_options(_VALIDATE_OPTS, options)
+    (data, schema) = (anyconfig.dicts.thaw(data), anyconfig.dicts.thaw(schema))
     if ac_schema_errors:
-        return _validate_all(data, schema, **options)
+        res = _validate_all(data, schema, ac_schema_safe, **options)
+    else:
+        res = _validate(data, schema, ac_schema_safe, **options)
+
+    if tmr is not None:
+        tmr.emit("validate", valid=res[0])
+
+    return res
+
+
+def validate_many(objs, schema, ac_schema_safe=True, **options):
+    """
+    Validate each of target objects independently with given schema object.
+
+    :param objs: A list of target objects to validate
+    :param schema: Schema object or a validator object, see :func:`validate`
+    :param options: Other keyword options such as ac_schema_safe,
+        ac_schema_jobs, ac_schema_chunk_size and ac_schema_max_errors. See
+        :func:`validate` for more details of them. Please note that
+        ac_schema_chunk_size is 1 by default in this function.
+
+    :return: (True if validation of all objects succeeded else False, a list
+        of error messages prefixed with the index of the object not valid)
+    """
+    options = anyconfig.utils.filter_options(_VALIDATE_OPTS, options)
+    options.setdefault("ac_schema_chunk_size", 1)
+    if _is_validator(schema):
+        (schema, options["cls"]) = (schema.schema, _validator_cls(schema))
+    schema = anyconfig.dicts.thaw(schema)
 
-    return _validate(data, schema, ac_schema_safe, **options)
+    # Keep '$schema' at the top to select the validator class by it.
+    wrapped = dict(items=schema)
+    if "$schema" in schema:
+        wrapped["$schema"] = schema["$schema"]
+
+    return _validate_all([anyconfig.dicts.thaw(o) for o in objs], wrapped,
+                         ac_schema_safe, **options)
+
+
+# Keywords have subschemas applied to the values other than the ones
+# 'properties' and 'items' point to.
+_INDIRECT_KEYWORDS = frozenset(("additionalProperties", "patternProperties",
+                                "additionalItems", "dependencies", "allOf",
+                                "anyOf", "oneOf", "not", "$ref"))
+
+
+def _is_path_prefix(prefix, path):
+    """
+    >>> _is_path_prefix(('a', ), ('a', 0)), _is_path_prefix(('a', 0), ('a', ))
+    (True, False)
+    """
+    return path[:len(prefix)] == prefix
+
+
+class IncrementalValidator(object):
+    """
+    Validator remembers the errors found previously and validates only the
+    parts of data changed since then.
+
+    Subschemas for the values changed are looked up by following
+    'properties' and 'items' keywords along their paths, and the values are
+    validated with them, and the values of their parents are validated with
+    the rest of keywords of their schemas. Errors found previously in other
+    parts are kept as they are.
+
+    .. note::
+       The whole data is validated if its schema has '$ref' keyword.
+
+    Example::
+
+      vldtr = IncrementalValidator(schema)
+      (valid, errors) = vldtr.validate(cnf)
+      ...
+      cnf2 = anyconfig.load(paths)  # Reload.
+      (valid, errors) = vldtr.validate(cnf2, previous=cnf)
+    """
+    def __init__(self, schema, cls=None):
+        """
+        :param schema: Schema object (a dict or a dict-like object)
+        :param cls: Validator class, see :func:`compile_schema`
+        """
+        self.schema = schema
+        self._cls = cls
+        self._has_ref = '"$ref"' in json.dumps(schema, default=repr)
+        self._errors = None  # [(path, message)]
+
+    def _list_errors(self, data, schema, prefix=()):
+        """
+        :return: A list of (path, message) of errors in `data`
+        """
+        vldtr = compile_schema(schema, cls=self._cls)
+        if vldtr is None:
+            return []
+
+        return [(prefix + path, msg) for path, msg
+                in _list_errors(vldtr, data)]
+
+    def _revalidate(self, data, path):
+        """
+        Validate the value at `path` in `data` and its parents again, and
+        replace the errors found previously with the new ones.
+
+        :param data: Target object to validate
+        :param path: A tuple of keys and indices to the value changed
+        """
+        (val, scm, cur) = (data, self.schema, ())
+        for key in path:
+            if not anyconfig.utils.is_dict_like(scm) or \
+                    any(k in scm for k in _INDIRECT_KEYWORDS):
+                break  # Validate the whole of this value again.
+
+            self._errors = [e for e in self._errors if e[0] != cur]
+            rest = dict((k, v) for k, v in scm.items()
+                        if k not in ("properties", "items"))
+            self._errors += self._list_errors(val, rest, cur)
+
+            if isinstance(val, list):
+                try:
+                    key = int(key)
+                    val = val[key]
+                except (ValueError, IndexError):
+                    (val, scm, cur) = (None, None, cur + (key, ))
+                    break  # Removed.
+
+                items = scm.get("items", {})
+                if anyconfig.utils.is_dict_like(items):
+                    scm = items
+                else:
+                    scm = items[key] if key < len(items) else {}
+            elif anyconfig.utils.is_dict_like(val) and key in val:
+                val = val[key]
+                scm = scm.get("properties", {}).get(key, {})
+            else:
+                (val, scm, cur) = (None, None, cur + (key, ))
+                break  # Removed.
+
+            cur += (key, )
+
+        self._errors = [e for e in self._errors
+                        if not _is_path_prefix(cur, e[0])]
+        if scm:
+            self._errors += self._list_errors(val, scm, cur)
+
+    def validate(self, data, changed=None, previous=None):
+        """
+        Validate target object `data`. The whole of `data` is validated at
+        the first time, and only the parts of it changed are validated after
+        that.
+
+        :param data: Target object to validate
+        :param changed: A list of paths to the values changed in `data` since
+            the last validation. Each path is a tuple of keys and indices, or
+            a path expression string :func:`anyconfig.dicts.get` accepts.
+        :param previous: Target object validated last time. Paths to the values
+            changed are computed with :func:`anyconfig.dicts.diff_paths` from
+            this and `data` if `changed` was not given.
+
+        :return: (True if validation succeeded else False, error messages)
+        """
+        if changed is None and previous is not None:
+            changed = anyconfig.dicts.diff_paths(previous, data)
+
+        if self._errors is None or changed is None or self._has_ref:
+            self._errors = self._list_errors(data, self.schema)
+        else:
+            for path in changed:
+                if isinstance(path, anyconfig.compat.STR_TYPES):
+                    # pylint: disable=protected-access
+                    path = [anyconfig.dicts._jsnp_unescape(p) for p
+                            in anyconfig.dicts._split_path(path)]
+                self._revalidate(data, tuple(path))
+
+        errors = sorted(self._errors, key=lambda e: [str(p) for p in e[0]])
+        return (not errors, [_format_error(*err) for err in errors])
 
 
 def _process_options(**options):
@@ -130,27 +1005,159 @@ def _process_options(**options):
             bool(options.get("ac_schema_strict", False)))
 
 
+def _sampling_step(**options):
+    """
+    :return: Interval of items to sample in arrays, computed from the option
+        'ac_schema_sample_rate', a float in (0.0, 1.0]
+
+    >>> _sampling_step()
+    1
+    >>> _sampling_step(ac_schema_sample_rate=0.1)
+    10
+    """
+    rate = options.get("ac_schema_sample_rate", None)
+    if not rate or rate >= 1:
+        return 1
+
+    if rate < 0:
+        raise ValueError("Invalid sample rate: %r" % rate)
+
+    return max(int(round(1.0 / rate)), 1)
+
+
+_NUM_TYPES = frozenset(("integer", "number"))
+
+
+def _merge_alts(alts, scm):
+    """
+    Merge JSON schema `scm` into one of alternative schemas `alts` of the
+    same type or append it to them.
+    """
+    for idx, alt in enumerate(alts):
+        if alt == scm:
+            return
+        if "anyOf" not in alt and alt.get("type") == scm.get("type"):
+            alts[idx] = merge_schema(alt, scm)
+            return
+        if set((alt.get("type"), scm.get("type"))) == _NUM_TYPES:
+            alts[idx] = merge_schema(alt, scm)
+            return
+
+    alts.append(scm)
+
+
+def merge_schema(scm0, scm1):
+    """
+    Merge two JSON schema objects generated by :func:`gen_schema` into a JSON
+    schema which both data the original schemas were generated from conform.
+    Schema objects of different types will be merged into a schema with
+    'anyOf' keyword, and schema objects of 'integer' and 'number' types into a
+    'number' schema.
+
+    This is useful to generate a schema of many data incrementally, e.g. from
+    each fragment loaded by multi_load, one by one.
+
+    :param scm0: A dict represents JSON schema
+    :param scm1: Another dict represents JSON schema
+    :return: A dict represents JSON schema merged
+
+    >>> merge_schema({"type": "integer"}, {"type": "number"})
+    {'type': 'number'}
+    >>> scm = merge_schema({"type": "integer"}, {"type": "string"})
+    >>> sorted(s["type"] for s in scm["anyOf"])
+    ['integer', 'string']
+    """
+    if scm0 == scm1:
+        return scm0
+
+    if "anyOf" in scm0 or "anyOf" in scm1:
+        alts = list(scm0.get("anyOf", [scm0]))
+        for scm in scm1.get("anyOf", [scm1]):
+            _merge_alts(alts, scm)
+        return dict(anyOf=alts) if len(alts) > 1 else alts[0]
+
+    (typ0, typ1) = (scm0.get("type"), scm1.get("type"))
+    if typ0 != typ1:
+        if set((typ0, typ1)) == _NUM_TYPES:
+            return dict(type="number")
+        return dict(anyOf=[scm0, scm1])
+
+    scm = dict(scm0)
+    if "properties" in scm0 or "properties" in scm1:
+        props = dict(scm0.get("properties", {}))
+        for key, pscm in scm1.get("properties", {}).items():
+            props[key] = merge_schema(props[key], pscm) if key in props \
+                else pscm
+        scm["properties"] = props
+
+    if "required" in scm0 and "required" in scm1:
+        scm["required"] = sorted(set(scm0["required"]) &
+                                 set(scm1["required"]))
+    else:
+        scm.pop("required", None)
+
+    if "items" in scm0 and "items" in scm1:
+        scm["items"] = merge_schema(scm0["items"], scm1["items"])
+    elif "items" in scm1:  # scm0 was generated from an empty array.
+        scm["items"] = scm1["items"]
+
+    if "minItems" in scm0 and "minItems" in scm1:
+        scm["minItems"] = min(scm0["minItems"], scm1["minItems"])
+    else:
+        scm.pop("minItems", None)
+
+    if "uniqueItems" in scm0 and "uniqueItems" in scm1:
+        scm["uniqueItems"] = scm0["uniqueItems"] and scm1["uniqueItems"]
+    else:
+        scm.pop("uniqueItems", None)
+
+    return scm
+
+
 def array_to_schema(arr, **options):
     """
     Generate a JSON schema object with type annotation added for given object.
 
+    Schema of items are inferred from all items or items sampled in `arr` and
+    merged into a schema, with 'anyOf' keyword if types of them are different,
+    by iterating `arr` only once and without copying it.
+
     :param arr: Array of dict or MergeableDict objects
     :param options: Other keyword options such as:
 
         - ac_schema_strict: True if more strict (precise) schema is needed
         - ac_schema_typemap: Type to JSON schema type mappings
+        - ac_schema_sample_rate: Rate of items to sample to infer the schema
+          of items, a float in (0.0, 1.0]; all items will be sampled by
+          default.
 
     :return: Another MergeableDict instance represents JSON schema of items
     """
     (typemap, strict) = _process_options(**options)
+    step = _sampling_step(**options)
+
+    # Keys of items seen to check uniqueness, or None if it's not needed.
+    (iscm, nitems, seen) = (None, 0, set() if strict else None)
+    for idx, item in enumerate(arr):
+        nitems += 1
+        if seen is not None:
+            key = _unique_key(item)
+            if key in seen:
+                seen = None  # Not unique; no need to remember the rest.
+            else:
+                seen.add(key)
+        if idx % step:
+            continue
 
-    arr = list(arr)
-    scm = dict(type=typemap[list],
-               items=gen_schema(arr[0] if arr else "str", **options))
+        scm = gen_schema(item, **options)
+        iscm = scm if iscm is None else merge_schema(iscm, scm)
+
+    scm = dict(type=typemap[list])
+    if iscm is not None:  # Schema of items is unknown if `arr` is empty.
+        scm["items"] = iscm
     if strict:
-        nitems = len(arr)
         scm["minItems"] = nitems
-        scm["uniqueItems"] = len(set(arr)) == nitems
+        scm["uniqueItems"] = seen is not None
 
     return scm
 
@@ -188,12 +1195,16 @@ def gen_schema(data, **options):
 
         - ac_schema_strict: True if more strict (precise) schema is needed
         - ac_schema_typemap: Type to JSON schema type mappings
+        - ac_schema_sample_rate: Rate of items in arrays to sample to infer
+          the schema of these items, a float in (0.0, 1.0]
 
     :return: A dict represents JSON schema of this node
     """
     if data is None:
         return dict(type="null")
 
+    data = anyconfig.dicts.thaw(data)
+
     _type = type(data)
 
     if _type in _SIMPLE_TYPES:
@@ -0,0 +1,305 @@
+#
+# Copyright (C) 2017 Satoru SATOH <ssato redhat.com>
+# License: MIT
+#
+# pylint: disable=protected-access
+"""Server and client of the warm daemon mode of anyconfig_cli.
+
+.. versionadded:: 0.9.4
+
+   - Added to keep configs loaded in memory and process requests of
+     anyconfig_cli from clients over an Unix domain socket.
+
+The server started by 'anyconfig_cli --serve SOCKET' caches configs loaded
+and merged, and reuses them while input files (and schema file) are not
+modified. The client, 'anyconfig_cli --connect SOCKET [Options...] INPUTS',
+sends its arguments to the server and prints out the results instead of
+loading configs by itself.
+
+Protocol: A client sends a request, a JSON object in a line, and shuts down
+writing to the socket, then the server sends back a response, a JSON object,
+and closes the connection.
+
+- Request: {"argv": [ARG_0, ...], "cwd": DIR} to process the arguments
+  of anyconfig_cli in the dir DIR, {"op": "reload"} to clear caches and
+  {"op": "shutdown"} to stop the server
+- Response: {"rc": EXIT_CODE, "stdout": OUTPUT, "stderr": ERROR_OUTPUT}
+
+So any clients can send requests like this:
+
+  echo '{"argv": ["--get", "a.b", "/etc/xyz/a.yml"]}' | nc -U -N SOCKET
+"""
+from __future__ import absolute_import
+
+import copy
+import json
+import logging
+import os
+import socket
+import stat
+import sys
+
+import anyconfig.cli
+import anyconfig.compat
+import anyconfig.utils
+
+
+LOGGER = logging.getLogger(__name__)
+
+_BUFSIZE = 65536
+_TIMEOUT = 10  # Timeout of connections from clients in seconds.
+_CACHE_MAX = 128
+
+
+def _recv_all(sock):
+    """
+    :param sock: A connected socket object
+    :return: Bytes received until EOF
+    """
+    chunks = []
+    while True:
+        chunk = sock.recv(_BUFSIZE)
+        if not chunk:
+            break
+        chunks.append(chunk)
+
+    return b"".join(chunks)
+
+
+def _send_msg(sock, msg):
+    """
+    :param sock: A connected socket object
+    :param msg: A dict to send as JSON
+    """
+    sock.sendall(json.dumps(msg).encode("utf-8") + b"\n")
+
+
+def _abspaths(args, basedir):
+    """
+    Make paths in arguments absolute paths from `basedir` to process them
+    without changing the current dir of the server process.
+
+    :param args: :class:`~argparse.Namespace` object
+    :param basedir: Dir to process the arguments in
+    """
+    join = os.path.join
+    args.inputs = [join(basedir, p) for p in args.inputs]
+    for attr in ("output", "schema", "profile"):
+        path = getattr(args, attr, None)
+        # {dir} in output paths of --each option will be an absolute path.
+        if path and path != "-" and not path.startswith("{dir}"):
+            setattr(args, attr, join(basedir, path))
+
+
+def _stat(path):
+    """
+    :param path: File path
+    :return: A tuple of (path, mtime, size) or (path, None, None) if missing
+    """
+    try:
+        stt = os.stat(path)
+        return (path, stt.st_mtime, stt.st_size)
+    except OSError:
+        return (path, None, None)
+
+
+class Server(object):
+    """
+    Server of the warm daemon mode of anyconfig_cli.
+    """
+
+    def __init__(self, sockpath, timeout=_TIMEOUT):
+        """
+        :param sockpath: Path to the Unix domain socket to listen on
+        :param timeout: Timeout of connections from clients in seconds
+        """
+        self.sockpath = sockpath
+        self.timeout = timeout
+        self._cache = {}  # {key: (stamps, diff)}
+        self._running = False
+
+    def stamps(self, args):
+        """
+        :param args: :class:`~argparse.Namespace` object
+        :return: A tuple of stamps of input files and schema file to detect
+            modifications of them
+        """
+        paths = list(anyconfig.utils.norm_paths(args.inputs))
+        if args.schema:
+            paths.append(args.schema)
+
+        return tuple(_stat(os.path.abspath(p)) for p in paths)
+
+    def load(self, args):
+        """
+        Load configs from input files or get them from the cache if these
+        are not modified since loaded last time.
+
+        :param args: :class:`~argparse.Namespace` object
+        :return: Mapping object represents configs loaded and merged
+        """
+        key = (tuple(args.inputs), args.itype, args.ignore_missing,
+               args.merge, args.template, args.schema)
+        stamps = self.stamps(args)
+
+        (cstamps, diff) = self._cache.get(key, (None, None))
+        if cstamps != stamps:
+            LOGGER.debug("Loading: %s", ", ".join(args.inputs))
+            diff = anyconfig.cli._load_diff(args)
+            if len(self._cache) >= _CACHE_MAX:
+                self._cache.clear()
+            self._cache[key] = (stamps, diff)
+
+        if args.set or args.args:  # These may modify configs.
+            return copy.deepcopy(diff)
+
+        return diff
+
+    def process(self, argv, cwd=None):
+        """
+        Process the arguments of anyconfig_cli same as it does.
+
+        :param argv: Argument list of anyconfig_cli without program name
+        :param cwd: Dir to process the arguments in; relative paths in
+            arguments are resolved from it instead of the current dir
+        :return: A dict of exit code, output and error output
+        """
+        (out, err) = (anyconfig.compat.StringIO(),
+                      anyconfig.compat.StringIO())
+        try:
+            args = anyconfig.cli._parse_args(argv, out=out, err=err)
+            if args.serve or args.env:
+                raise ValueError("--serve and --env options are not "
+                                 "supported in requests to servers")
+
+            _abspaths(args, cwd or os.getcwd())
+            anyconfig.cli._process(args, load_fn=self.load, out=out,
+                                   err=err)
+            rcode = 0
+        except anyconfig.cli._ExitWithOutput as exc:
+            rcode = exc.code
+            exc.write(out, err)
+        except SystemExit as exc:
+            rcode = exc.code if isinstance(exc.code, int) else \
+                (0 if exc.code is None else 1)
+            if exc.code is not None and not isinstance(exc.code, int):
+                err.write(str(exc.code) + os.linesep)
+        except Exception as exc:
+            rcode = 1
+            err.write("Error: %r%s" % (exc, os.linesep))
+
+        return dict(rc=rcode, stdout=out.getvalue(), stderr=err.getvalue())
+
+    def handle(self, req):
+        """
+        :param req: A dict represents a request from a client
+        :return: A dict represents a response to the client
+        """
+        oper = req.get("op", None)
+        if oper == "reload":
+            self._cache.clear()
+            return dict(rc=0, stdout="", stderr="")
+
+        if oper == "shutdown":
+            self._running = False
+            return dict(rc=0, stdout="", stderr="")
+
+        argv = req.get("argv", None)
+        if not isinstance(argv, list):
+            return dict(rc=1, stdout="", stderr="Invalid request" + os.linesep)
+
+        return self.process(argv, req.get("cwd", None))
+
+    def _bind(self):
+        """
+        :return: A socket object bound to `self.sockpath` and listening
+        """
+        if os.path.exists(self.sockpath):
+            if not stat.S_ISSOCK(os.stat(self.sockpath).st_mode):
+                raise OSError("Not a socket: " + self.sockpath)
+            os.remove(self.sockpath)  # Left by a server exited.
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)  # Only the owner can connect to it.
+        try:
+            sock.bind(self.sockpath)
+        finally:
+            os.umask(umask)
+        sock.listen(16)
+
+        return sock
+
+    def serve_forever(self):
+        """
+        Process requests from clients until a shutdown request comes.
+        """
+        sock = self._bind()
+        self._running = True
+        try:
+            while self._running:
+                (conn, _addr) = sock.accept()
+                conn.settimeout(self.timeout)
+                try:
+                    try:
+                        req = json.loads(_recv_all(conn).decode("utf-8"))
+                        res = self.handle(req)
+                    except ValueError as exc:
+                        res = dict(rc=1, stdout="",
+                                   stderr="Invalid request: %r" % exc)
+                    _send_msg(conn, res)
+                except (IOError, OSError) as exc:
+                    LOGGER.warning("Failed to process a request: %r", exc)
+                finally:
+                    conn.close()
+        finally:
+            sock.close()
+            os.remove(self.sockpath)
+
+
+def serve(sockpath):
+    """
+    Start a server listening on `sockpath` and process requests from clients.
+
+    :param sockpath: Path to the Unix domain socket to listen on
+    """
+    Server(sockpath).serve_forever()
+
+
+def request(sockpath, req):
+    """
+    Send a request to a server and get the response.
+
+    :param sockpath: Path to the Unix domain socket the server listens on
+    :param req: A dict represents a request, see the module docstring
+    :return: A dict represents the response
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(sockpath)
+        _send_msg(sock, req)
+        sock.shutdown(socket.SHUT_WR)
+        return json.loads(_recv_all(sock).decode("utf-8"))
+    finally:
+        sock.close()
+
+
+def run_client(sockpath, argv):
+    """
+    Send the arguments of anyconfig_cli to a server, print out the results
+    and exit with the exit code the server returned.
+
+    :param sockpath: Path to the Unix domain socket the server listens on
+    :param argv: Argument list of anyconfig_cli without program name
+    """
+    try:
+        res = request(sockpath, dict(argv=argv, cwd=os.getcwd()))
+    except (IOError, OSError) as exc:
+        sys.stderr.write("Failed to connect to %s: %s%s"
+                         % (sockpath, exc, os.linesep))
+        sys.exit(1)
+
+    sys.stdout.write(res.get("stdout", ""))
+    sys.stderr.write(res.get("stderr", ""))
+    sys.exit(res.get("rc", 1))
+
+# vim:sw=4:ts=4:et:
@@ -0,0 +1,394 @@
+#
+# Copyright (C) 2017 Satoru SATOH <ssato redhat.com>
+# License: MIT
+#
+"""Publish configs loaded and merged in shared memory for worker processes.
+
+.. versionadded:: 0.9.4
+
+   - Added to load and merge configs once in a parent process and publish
+     them in shared memory, from which worker processes read configs
+     without loading them by themselves.
+
+It needs :mod:`multiprocessing.shared_memory` available in python >= 3.8.
+
+A parent process, e.g. the master process of pre-fork worker pools, loads
+configs and publishes them with :func:`publish`, and worker processes
+attach to them by the name with :func:`attach`:
+
+.. code-block:: python
+
+  # In the parent process:
+  pub = anyconfig.shm.publish("/etc/xyz/conf.d/*.yml", name="xyz")
+  ...
+  pub.load("/etc/xyz/conf.d/*.yml")  # Reload and publish a new version.
+  ...
+  pub.close()  # Remove shared memory segments on exit.
+
+  # In worker processes:
+  cnf = anyconfig.shm.attach("xyz")
+  cnf["a"]["b"]
+  cnf.refresh()  # Switch to the latest version, e.g. per request.
+
+Configs are kept in two kinds of shared memory segments:
+
+- The control segment, named `name`, has the version and the name of the
+  data segment of the latest configs. It's updated with a sequence lock so
+  that readers never see partial updates.
+- Data segments, named '<name>_<version>', have configs serialized with
+  marshal (or pickle if marshal cannot) and indexed by top level keys.
+  Values of keys are deserialized on access and only once in each version.
+
+Configs are immutable once published. New versions are published in new
+data segments and old ones are unlinked; workers still attached to old ones
+may keep reading them until they refresh.
+"""
+from __future__ import absolute_import
+
+import collections
+import logging
+import marshal
+import struct
+import time
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:
+    resource_tracker = shared_memory = None
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+import anyconfig.api
+import anyconfig.compat
+
+
+LOGGER = logging.getLogger(__name__)
+SUPPORTED = shared_memory is not None
+
+MAGIC = b"ACSHM1\n"
+_FORMATS = {b"M": marshal, b"P": pickle}
+
+# Control segment: seq, version, pid of the resource tracker and the name of
+# the data segment; seq is odd while it's being updated.
+_SEQ = struct.Struct(">Q")
+_CTRL = struct.Struct(">QQQ64s")
+
+# Data segment: magic, format, length of the index and the index.
+_IDX_LEN = struct.Struct(">I")
+_IDX_START = len(MAGIC) + 1 + _IDX_LEN.size
+
+_MAX_RETRIES = 1000
+
+
+def _check_supported():
+    """
+    :raises: NotImplementedError if shared memory is not available
+    """
+    if not SUPPORTED:
+        raise NotImplementedError("Shared memory is not available; it "
+                                  "needs python >= 3.8")
+
+
+def _tracker_pid():
+    """
+    :return: PID of the resource tracker process of this process or 0
+    """
+    tracker = getattr(resource_tracker, "_resource_tracker", None)
+    return getattr(tracker, "_pid", None) or 0
+
+
+def _attach_segment(name, tracker_pid=None):
+    """
+    Attach to the shared memory segment `name` made by other processes.
+
+    Segments attached are registered to the resource tracker, which unlinks
+    them when the process exits before python 3.13, so that unregister them
+    unless the tracker is the one shared with the publisher (forked).
+
+    :param name: Name of the segment
+    :param tracker_pid: PID of the resource tracker of the publisher or None
+        to read it from the segment, the control segment
+    :return: A :class:`multiprocessing.shared_memory.SharedMemory` object
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # python < 3.13
+        pass
+
+    shm = shared_memory.SharedMemory(name=name)
+    if tracker_pid is None:
+        tracker_pid = _CTRL.unpack_from(shm.buf, 0)[2]
+    if _tracker_pid() != tracker_pid:
+        resource_tracker.unregister(getattr(shm, "_name", name),
+                                    "shared_memory")
+    return shm
+
+
+def dumps(cnf):
+    """
+    Serialize `cnf` into the content of data segments.
+
+    :param cnf: Mapping object represents configs
+    :return: A byte string
+
+    >>> cnf = loads(dumps(dict(a=1, b=dict(c=[1, 2]))))
+    >>> sorted(cnf.items())
+    [('a', 1), ('b', {'c': [1, 2]})]
+    """
+    if not isinstance(cnf, collections.Mapping):
+        raise ValueError("Configs to publish must be mappings: %r" % cnf)
+
+    try:
+        (fmt, vals) = (b"M", [marshal.dumps(v) for v in cnf.values()])
+        marshal.dumps(list(cnf.keys()))
+    except ValueError:  # It has objects marshal cannot serialize.
+        (fmt, vals) = (b"P", [pickle.dumps(v, pickle.HIGHEST_PROTOCOL)
+                              for v in cnf.values()])
+
+    offset = 0
+    index = []
+    for key, val in zip(cnf.keys(), vals):
+        index.append((key, offset, len(val)))
+        offset += len(val)
+
+    index = _FORMATS[fmt].dumps(index)
+    return b"".join([MAGIC, fmt, _IDX_LEN.pack(len(index)), index] + vals)
+
+
+def _load_index(buf):
+    """
+    :param buf: A buffer object of the data segment
+    :return: A tuple of (module to deserialize values, index, a list of
+        tuples of (key, start, end))
+    """
+    if bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a data segment of configs")
+
+    mod = _FORMATS[bytes(buf[len(MAGIC):len(MAGIC) + 1])]
+    start = _IDX_START + _IDX_LEN.unpack_from(buf, len(MAGIC) + 1)[0]
+    with buf[_IDX_START:start] as view:
+        index = mod.loads(view)
+
+    return (mod, [(k, start + o, start + o + n) for k, o, n in index])
+
+
+def loads(content):
+    """
+    Deserialize all of configs from `content`.
+
+    :param content: A byte string made by :func:`dumps`
+    :return: A dict represents configs
+    """
+    buf = memoryview(content)
+    (mod, index) = _load_index(buf)
+    return dict((k, mod.loads(buf[s:e])) for k, s, e in index)
+
+
+class Publisher(object):
+    """
+    Publish configs in shared memory and swap them with new versions.
+    """
+
+    def __init__(self, name=None):
+        """
+        :param name: Name of the control segment or None to generate it
+        """
+        _check_supported()
+        self._ctrl = shared_memory.SharedMemory(name=name, create=True,
+                                                size=_CTRL.size)
+        self._data = None
+        self.name = self._ctrl.name
+        self.version = 0
+        _CTRL.pack_into(self._ctrl.buf, 0, 0, 0, _tracker_pid(), b"")
+
+    def publish(self, cnf):
+        """
+        Publish configs `cnf` as a new version.
+
+        :param cnf: Mapping object represents configs
+        :return: The new version
+        """
+        content = dumps(cnf)
+        version = self.version + 1
+        data = shared_memory.SharedMemory(name="%s_%d" % (self.name, version),
+                                          create=True, size=len(content))
+        data.buf[:len(content)] = content
+
+        buf = self._ctrl.buf
+        seq = _SEQ.unpack_from(buf, 0)[0]
+        _SEQ.pack_into(buf, 0, seq + 1)
+        _CTRL.pack_into(buf, 0, seq + 1, version, _tracker_pid(),
+                        data.name.encode("utf-8"))
+        _SEQ.pack_into(buf, 0, seq + 2)
+
+        (old, self._data, self.version) = (self._data, data, version)
+        if old is not None:
+            old.close()
+            old.unlink()
+
+        LOGGER.debug("Published configs: %s, version=%d, size=%d",
+                     self.name, version, len(content))
+        return version
+
+    def load(self, path_specs, **options):
+        """
+        Load configs with :func:`anyconfig.api.load` and publish them.
+
+        :param path_specs: Path specs passed to :func:`anyconfig.api.load`
+        :param options: Keyword options passed to :func:`anyconfig.api.load`
+        :return: The new version
+        """
+        return self.publish(anyconfig.api.load(path_specs, **options))
+
+    def close(self):
+        """Close and unlink shared memory segments."""
+        for shm in (self._data, self._ctrl):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+        (self._data, self._ctrl) = (None, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        self.close()
+
+
+def publish(path_specs, name=None, **options):
+    """
+    Load configs and publish them in shared memory.
+
+    :param path_specs: Path specs passed to :func:`anyconfig.api.load`
+    :param name: Name of the control segment or None to generate it
+    :param options: Keyword options passed to :func:`anyconfig.api.load`
+    :return: A :class:`Publisher` object
+    """
+    pub = Publisher(name)
+    try:
+        pub.load(path_specs, **options)
+    except Exception:
+        pub.close()
+        raise
+
+    return pub
+
+
+class SharedConfig(collections.Mapping):
+    """
+    Read-only mapping object of configs published in shared memory.
+
+    Values are shared among accesses in a version and must not be modified.
+    """
+
+    def __init__(self, name):
+        """
+        :param name: Name of the control segment
+        """
+        _check_supported()
+        self._ctrl = _attach_segment(name)
+        self._data = None
+        self._mod = None
+        self._index = {}
+        self._cache = {}
+        self.name = name
+        self.version = 0
+        self.refresh()
+
+    def _read_ctrl(self):
+        """
+        :return: A tuple of (version, pid of the resource tracker and the
+            name of the data segment) read consistently
+        """
+        buf = self._ctrl.buf
+        for _ in range(_MAX_RETRIES):
+            seq = _SEQ.unpack_from(buf, 0)[0]
+            if seq % 2 == 0:
+                ctrl = _CTRL.unpack_from(buf, 0)
+                if _SEQ.unpack_from(buf, 0)[0] == seq == ctrl[0]:
+                    return (ctrl[1], ctrl[2],
+                            ctrl[3].rstrip(b"\0").decode("utf-8"))
+            time.sleep(0)
+
+        raise RuntimeError("Control segment is busy: %s" % self.name)
+
+    def refresh(self):
+        """
+        Switch to the latest version of configs if it was published.
+
+        :return: True if it was switched
+        """
+        for _ in range(_MAX_RETRIES):
+            (version, tracker_pid, dname) = self._read_ctrl()
+            if not version:
+                raise ValueError("Nothing was published yet: %s" % self.name)
+            if version == self.version:
+                return False
+            try:
+                data = _attach_segment(dname, tracker_pid)
+                break
+            except OSError:  # Swapped with a newer version meanwhile.
+                continue
+        else:
+            raise RuntimeError("Failed to attach: %s" % self.name)
+
+        self._close_data()
+        (self._mod, index) = _load_index(data.buf)
+        self._index = anyconfig.compat.OrderedDict((k, (s, e)) for k, s, e
+                                                   in index)
+        (self._data, self.version) = (data, version)
+        return True
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            (start, end) = self._index[key]
+
+        with self._data.buf[start:end] as view:
+            val = self._cache[key] = self._mod.loads(view)
+        return val
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def _close_data(self):
+        """Close the data segment attached and clear caches."""
+        if self._data is not None:
+            self._data.close()
+        (self._data, self._index, self._cache) = (None, {}, {})
+
+    def close(self):
+        """Detach from shared memory segments."""
+        self._close_data()
+        if self._ctrl is not None:
+            self._ctrl.close()
+            self._ctrl = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        self.close()
+
+
+def attach(name):
+    """
+    Attach to configs published in shared memory.
+
+    :param name: Name of the control segment
+    :return: A :class:`SharedConfig` object
+    """
+    return SharedConfig(name)
+
+# vim:sw=4:ts=4:et:
@@ -0,0 +1,206 @@
+#
+# Copyright (C) 2017 Satoru SATOH <ssato redhat.com>
+# License: MIT
+#
+"""anyconfig.stats module to get events and statistics of processing.
+
+.. versionadded:: 0.9.4
+
+   - Added to get events emitted in load, parse, merge, validate, render and
+     dump processes by hooks and aggregate statistics of them.
+
+Hooks are callables take an event, a dict has the name of the event with the
+key 'event' and other info such like 'duration' (wall time in seconds),
+'cpu' (CPU time in seconds), 'size' (bytes), 'type' (backend type), 'path'
+and 'cache' ('hit' or 'miss'). Events are:
+
+- load: :func:`anyconfig.api.single_load` loaded a file (path, type)
+- glob: :func:`anyconfig.api.multi_load` expanded glob patterns and
+  normalized paths, or :func:`anyconfig.api.single_load` normalized a path
+  (size: number of paths)
+- parse: A backend parsed a file or a string (path, type, size)
+- merge: :func:`anyconfig.dicts.merge` merged mapping objects
+- validate: :func:`anyconfig.schema.validate` validated data (valid)
+- render: :func:`anyconfig.template.try_render` rendered a template (path,
+  size)
+- dump: A backend dumped data (path, type, size)
+- preload: :func:`anyconfig.api.preload` preloaded configs (size: bytes
+  retained by them)
+- load_schema, compile_schema, tmpl_env: Caches of schema objects,
+  validators and template environments were looked up (cache)
+
+Nothing will be done and no time will be measured if no hooks are added.
+
+  >>> reg = Registry()
+  >>> add_hook(reg)
+  >>> emit("parse", type="json", size=10, duration=0.1, cpu=0.1)
+  >>> reg.snapshot()["parse.json"]["size"]
+  10
+  >>> remove_hook(reg)
+"""
+from __future__ import absolute_import
+
+import logging
+import time
+
+
+LOGGER = logging.getLogger(__name__)
+
+# List of hooks. Events will be emitted only if it's not empty.
+HOOKS = []
+
+_cpu_time = getattr(time, "process_time", getattr(time, "clock", None))
+
+
+def add_hook(hook):
+    """
+    :param hook: A callable takes an event, a dict
+    """
+    if hook not in HOOKS:
+        HOOKS.append(hook)
+
+
+def remove_hook(hook):
+    """
+    :param hook: A callable added by :func:`add_hook`
+    """
+    if hook in HOOKS:
+        HOOKS.remove(hook)
+
+
+def enabled():
+    """
+    :return: True if any hooks were added
+    """
+    return bool(HOOKS)
+
+
+def emit(event, **info):
+    """
+    Pass an event to hooks. Exceptions hooks raised are logged and ignored.
+
+    :param event: Name of the event
+    :param info: Info of the event
+    """
+    if not HOOKS:
+        return
+
+    info["event"] = event
+    for hook in list(HOOKS):
+        try:
+            hook(info)
+        except Exception as exc:
+            LOGGER.warning("Hook %r failed: %r", hook, exc)
+
+
+def nbytes(content):
+    """
+    :param content: A byte or text string
+    :return: Size of `content` in bytes, encoded in UTF-8 if it's a text
+
+    >>> nbytes(b"abc"), nbytes(u"\\u3042")
+    (3, 3)
+    """
+    if isinstance(content, bytes):
+        return len(content)
+
+    return len(content.encode("utf-8"))
+
+
+class Timer(object):
+    """
+    Measure wall and CPU time since it was made.
+    """
+    __slots__ = ("wall", "cpu")
+
+    def __init__(self):
+        (self.wall, self.cpu) = (time.time(), _cpu_time())
+
+    def emit(self, event, **info):
+        """
+        Emit an event with the wall and CPU time since it was made.
+
+        :param event: Name of the event
+        :param info: Info of the event
+        """
+        emit(event, duration=time.time() - self.wall,
+             cpu=_cpu_time() - self.cpu, **info)
+
+
+def timer():
+    """
+    :return: A :class:`Timer` object if any hooks were added, or None
+    """
+    return Timer() if HOOKS else None
+
+
+class Registry(object):
+    """
+    A hook to aggregate events into counters of each event and of each pair
+    of an event and a backend type, e.g. 'parse' and 'parse.yaml'.
+    """
+
+    def __init__(self):
+        self.counters = {}
+
+    def reset(self):
+        """Reset counters."""
+        self.counters = {}
+
+    def _count(self, name, event):
+        """
+        :param name: Name of the counter
+        :param event: A dict represents an event
+        """
+        cnt = self.counters.get(name, None)
+        if cnt is None:
+            cnt = self.counters[name] = dict(count=0, duration=0.0, cpu=0.0,
+                                             size=0, hit=0, miss=0)
+        cnt["count"] += 1
+        cnt["duration"] += event.get("duration", 0.0)
+        cnt["cpu"] += event.get("cpu", 0.0)
+        cnt["size"] += event.get("size", None) or 0
+
+        cache = event.get("cache", None)
+        if cache in ("hit", "miss"):
+            cnt[cache] += 1
+
+    def __call__(self, event):
+        """
+        :param event: A dict represents an event
+        """
+        self._count(event["event"], event)
+        if event.get("type", None):
+            self._count("%s.%s" % (event["event"], event["type"]), event)
+
+    def snapshot(self):
+        """
+        :return: A dict of the names and copies of counters
+        """
+        return dict((name, dict(cnt)) for name, cnt in self.counters.items())
+
+
+# The default registry
+REGISTRY = Registry()
+
+
+def enable(registry=REGISTRY):
+    """
+    Start aggregating events into `registry`.
+
+    :param registry: A :class:`Registry` object
+    :return: `registry`
+    """
+    add_hook(registry)
+    return registry
+
+
+def disable(registry=REGISTRY):
+    """
+    Stop aggregating events into `registry`.
+
+    :param registry: A :class:`Registry` object
+    """
+    remove_hook(registry)
+
+# vim:sw=4:ts=4:et:
@@ -8,42 +8,131 @@
 """anyconfig.template module
 
 Template rendering module for jinja2-based template config files.
+
+.. versionadded:: 0.9.4
+   Cache jinja2 Environment objects by template search paths, and enable
+   jinja2's bytecode cache on disk to avoid compiling templates on each load
+   only if the bytecode cache dir was set with the environment variable
+   ANYCONFIG_TEMPLATE_CACHE_DIR.
+
+.. versionadded:: 0.9.4
+   Added new API :func:`precompile` to compile templates in dirs ahead of
+   time and save the results into the bytecode cache dir, which can be run
+   as a console script, anyconfig_precompile, or by
+   'python -m anyconfig.template [Options...] DIR [DIR ...]'
+
+.. versionchanged:: 0.9.4
+   jinja2 is imported on demand, only when templates are rendered, and
+   TemplateNotFound, jinja2's one, is also resolved on demand
 """
-from __future__ import absolute_import
+from __future__ import absolute_import, print_function
 
 import codecs
+import fnmatch
 import locale
 import logging
 import os
+import sys
 
 import anyconfig.compat
+import anyconfig.stats
 
 LOGGER = logging.getLogger(__name__)
-SUPPORTED = False
-try:
-    import jinja2
-    from jinja2.exceptions import TemplateNotFound
+SUPPORTED = anyconfig.compat.is_module_available("jinja2")
 
-    SUPPORTED = True
+CACHE_DIR_ENVVAR = "ANYCONFIG_TEMPLATE_CACHE_DIR"
 
-    def tmpl_env(paths):
-        """
-        :param paths: A list of template search paths
-        """
-        return jinja2.Environment(loader=jinja2.FileSystemLoader(paths))
+# Cache of jinja2 Environment objects: {(paths, cache_dir): env}
+_ENVS = {}
+_ENVS_MAX = 128
 
-except ImportError:
+if not SUPPORTED:
     LOGGER.warning("Jinja2 is not available on your system, so "
                    "template support will be disabled.")
 
-    class TemplateNotFound(RuntimeError):
-        """Dummy exception"""
-        pass
 
-    def tmpl_env(*args):
-        """Dummy function"""
+class _TemplateNotFound(RuntimeError):
+    """Dummy exception used if jinja2 is not available"""
+    pass
+
+
+def _template_not_found_cls():
+    """
+    :return: jinja2.exceptions.TemplateNotFound or a dummy exception class if
+        jinja2 is not available
+    """
+    if not SUPPORTED:
+        return _TemplateNotFound
+
+    import jinja2.exceptions
+    return jinja2.exceptions.TemplateNotFound
+
+
+def __getattr__(name):
+    """Resolve TemplateNotFound on demand not to import jinja2 eagerly."""
+    if name == "TemplateNotFound":
+        return _template_not_found_cls()
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+if sys.version_info < (3, 7):  # Module level __getattr__ is not supported.
+    TemplateNotFound = _template_not_found_cls()
+
+
+def _bytecode_cache(cache_dir=None):
+    """
+    :param cache_dir: Bytecode cache dir or None
+    :return: jinja2.FileSystemBytecodeCache object or None if disabled
+    """
+    if not cache_dir:
         return None
 
+    import jinja2
+
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+
+    return jinja2.FileSystemBytecodeCache(cache_dir)
+
+
+def tmpl_env(paths, cache_dir=None):
+    """
+    :param paths: A list of template search paths
+    :param cache_dir: Bytecode cache dir to override the one set by the
+        environment variable, ANYCONFIG_TEMPLATE_CACHE_DIR; bytecode cache is
+        disabled if neither of them is set
+    :return: jinja2.Environment object cached by `paths` or None if jinja2
+        is not available
+    """
+    if not SUPPORTED:
+        return None
+
+    if cache_dir is None:
+        cache_dir = os.environ.get(CACHE_DIR_ENVVAR, None)
+    key = (tuple(paths), cache_dir)
+
+    env = _ENVS.get(key, None)
+    if anyconfig.stats.HOOKS:
+        anyconfig.stats.emit("tmpl_env",
+                             cache="miss" if env is None else "hit")
+    if env is None:
+        import jinja2  # Lazy; it's slow to import.
+
+        try:
+            bcc = _bytecode_cache(cache_dir)
+        except (IOError, OSError) as exc:
+            LOGGER.warning("Bytecode cache is disabled: %r", exc)
+            bcc = None
+
+        env = jinja2.Environment(loader=jinja2.FileSystemLoader(paths),
+                                 bytecode_cache=bcc)
+        if len(_ENVS) >= _ENVS_MAX:
+            _ENVS.clear()
+        _ENVS[key] = env
+
+    return env
+
 
 def copen(filepath, flag='r', encoding=None):
 
@@ -113,7 +202,7 @@ def render_s(tmpl_s, ctx=None, paths=None):
     if ctx is None:
         ctx = {}
 
-    return tmpl_env(paths).from_string(tmpl_s).render(**ctx)
+    return env.from_string(tmpl_s).render(**ctx)
 
 
 def render_impl(template_file, ctx=None, paths=None):
@@ -130,7 +219,8 @@ def render_impl(template_file, ctx=None, paths=None):
     if ctx is None:
         ctx = {}
 
-    return env.get_template(os.path.basename(template_file)).render(**ctx)
+    tmpl = env.get_template(os.path.basename(template_file))
+    return tmpl.render(**ctx)
 
 
 def render(filepath, ctx=None, paths=None, ask=False):
@@ -145,7 +235,7 @@ def render(filepath, ctx=None, paths=None, ask=False):
     """
     try:
         return render_impl(filepath, ctx, paths)
-    except TemplateNotFound as mtmpl:
+    except _template_not_found_cls() as mtmpl:
         if not ask:
             raise
 
@@ -175,14 +265,114 @@ def try_render(filepath=None, content=None, **options):
 
     tmpl_s = filepath or content[:10] + " ..."
     LOGGER.debug("Compiling: %s", tmpl_s)
+    tmr = anyconfig.stats.timer()
     try:
         if content is None:
-            return render(filepath, **options)
+            res = render(filepath, **options)
+        else:
+            res = render_s(content, **options)
 
-        return render_s(content, **options)
+        if tmr is not None:
+            tmr.emit("render", path=filepath,
+                     size=anyconfig.stats.nbytes(res))
+
+        return res
     except Exception as exc:
         LOGGER.warning("Failed to compile '%s'. It may not be a template.%s"
                        "exc=%r", tmpl_s, os.linesep, exc)
         return None
 
+
+def _find_templates(topdir, patterns=None):
+    """
+    :param topdir: Top dir to search template files under
+    :param patterns: A list of glob patterns of template files' basenames
+    :return: A generator yields paths of template files found
+    """
+    if patterns is None:
+        patterns = ["*"]
+
+    for dirpath, dirnames, filenames in os.walk(topdir):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        for fname in sorted(filenames):
+            if any(fnmatch.fnmatch(fname, pat) for pat in patterns):
+                yield os.path.join(dirpath, fname)
+
+
+def precompile(topdirs, patterns=None, paths=None, cache_dir=None):
+    """
+    Compile template files under `topdirs` ahead of time and save the compiled
+    results into the bytecode cache dir to skip compilation of these on load
+    later. Results are keyed by the template paths and hash of the content of
+    templates by jinja2 so that :func:`render` picks them up if these are not
+    modified.
+
+    :param topdirs: A list of top dirs to search template files under
+    :param patterns: A list of glob patterns of template files' basenames
+    :param paths: Template search paths passed to :func:`render` later
+    :param cache_dir: Bytecode cache dir
+    :return: A list of paths of template files compiled
+    """
+    if not SUPPORTED:
+        return []
+
+    if cache_dir is None:
+        cache_dir = os.environ.get(CACHE_DIR_ENVVAR, None)
+    if not cache_dir:
+        LOGGER.warning("Bytecode cache dir is not set, so compiled results "
+                       "will not be saved: set %s", CACHE_DIR_ENVVAR)
+
+    compiled = []
+    for topdir in topdirs:
+        for filepath in _find_templates(topdir, patterns):
+            filepath = os.path.abspath(filepath)
+            env = tmpl_env(make_template_paths(filepath, paths), cache_dir)
+            try:
+                env.get_template(os.path.basename(filepath))
+                compiled.append(filepath)
+            except Exception as exc:
+                LOGGER.debug("Failed to compile '%s'. It may not be a "
+                             "template. exc=%r", filepath, exc)
+
+    return compiled
+
+
+def main(argv=None):
+    """
+    Entry point to compile template files ahead of time.
+
+    :param argv: Argument list to parse or None (sys.argv will be set).
+    """
+    import argparse
+
+    psr = argparse.ArgumentParser(prog="anyconfig_precompile",
+                                  description="Compile template config "
+                                              "files under DIRs ahead of "
+                                              "time.")
+    psr.add_argument("topdirs", metavar="DIR", nargs="+",
+                     help="Top dirs to search template files under")
+    psr.add_argument("-p", "--pattern", action="append", dest="patterns",
+                     help="Glob pattern of template files' basenames, may "
+                          "be given multiple times [*]")
+    psr.add_argument("-P", "--path", action="append", dest="paths",
+                     help="Template search path passed on load")
+    psr.add_argument("-C", "--cache-dir",
+                     help="Bytecode cache dir [$%s]" % CACHE_DIR_ENVVAR)
+    psr.add_argument("-v", "--verbose", action="store_true",
+                     help="Print paths of template files compiled")
+    args = psr.parse_args(sys.argv[1:] if argv is None else argv)
+
+    if not SUPPORTED:
+        sys.exit("Template support is disabled as jinja2 is not available.")
+
+    compiled = precompile(args.topdirs, patterns=args.patterns,
+                          paths=args.paths, cache_dir=args.cache_dir)
+    if args.verbose:
+        for filepath in compiled:
+            print(filepath)
+
+
+if __name__ == '__main__':
+    main()
+
 # vim:sw=4:ts=4:et:
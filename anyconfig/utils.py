@@ -14,6 +14,10 @@ import types
 import anyconfig.compat
 
 
+# Extensions of compressed files can be loaded and dumped transparently.
+COMPRESSION_EXTS = ("gz", "bz2", "xz")
+
+
 def get_file_extension(file_path):
     """
     >>> get_file_extension("/a/b/c")
@@ -30,6 +34,26 @@ def get_file_extension(file_path):
     return ""
 
 
+def split_compression_ext(file_path):
+    """
+    Split the extension of compressed files from `file_path`.
+
+    :param file_path: File path
+    :return: A tuple of (file path without the extension, the extension of
+        compressed files or None)
+
+    >>> split_compression_ext("/a/b.json.gz")
+    ('/a/b.json', 'gz')
+    >>> split_compression_ext("/a/b.json")
+    ('/a/b.json', None)
+    """
+    ext = get_file_extension(file_path)
+    if ext in COMPRESSION_EXTS:
+        return (file_path[:-len(ext) - 1], ext)
+
+    return (file_path, None)
+
+
 def sglob(files_pattern):
     """
     glob.glob alternative of which results sorted always.
@@ -140,7 +164,7 @@ def _try_to_get_extension(path_or_strm):
     if path is None:
         return None
 
-    return get_file_extension(path) or None
+    return get_file_extension(split_compression_ext(path)[0]) or None
 
 
 def are_same_file_types(paths):
@@ -159,6 +183,8 @@ def are_same_file_types(paths):
     True
     >>> are_same_file_types(["a.yml", "b.json"])
     False
+    >>> are_same_file_types(["a.yml", "b.yml.gz"])
+    True
     >>> strm = anyconfig.compat.StringIO()
     >>> are_same_file_types(["a.yml", "b.yml", strm])
     False
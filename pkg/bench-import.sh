@@ -0,0 +1,35 @@
+#! /bin/bash
+#
+# Measure time to import anyconfig and list modules taking long to import.
+#
+# Usage: bash pkg/bench-import.sh [NUMBER_OF_RUNS [NUMBER_OF_MODULES]]
+#
+set -e
+
+curdir=${0%/*}
+topdir=${curdir}/../
+python=${PYTHON:-python}
+export PYTHONPATH=.${PYTHONPATH:+:${PYTHONPATH}}
+nruns=${1:-10}
+nmods=${2:-15}
+
+cd ${topdir}
+
+echo "[Info] Time to import anyconfig (best of ${nruns} runs, in usec):"
+for i in $(seq ${nruns}); do
+    ${python} -X importtime -c 'import anyconfig' 2>&1 | \
+        sed -n 's/^import time: *[0-9]* | *\([0-9]*\) | anyconfig$/\1/p'
+done | sort -n | head -n 1
+
+echo "[Info] Modules taking long to import (cumulative, in usec):"
+${python} -X importtime -c 'import anyconfig' 2>&1 | \
+    sort -t '|' -k 2 -n -r | sed -n "2,$((nmods + 1))p"
+
+echo "[Info] Optional modules imported:"
+${python} -c '
+import sys, anyconfig
+for mod in ("jinja2", "jsonschema", "jmespath"):
+    print("%s: %s" % (mod, mod in sys.modules))
+'
+
+# vim:sw=4:ts=4:et:
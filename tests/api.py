@@ -6,6 +6,8 @@
 from __future__ import absolute_import
 
 import copy
+import gc
+import gzip
 import logging
 import io
 import os
@@ -175,6 +177,17 @@ class Test_20_dumps_and_loads(TestBase):
         self.assertEqual(cnf_2["b"]["b"], CNF_0["b"]["b"])
         self.assertEqual(cnf_2["b"]["c"], CNF_0["b"]["c"])
 
+    def test_48_loads_w_validation__cached_schema(self):
+        cnf_s = TT.dumps(CNF_0, "json")
+        scm_s = TT.dumps(SCM_0, "json")
+        TT._SCHEMAS.clear()
+
+        for _ in range(3):
+            cnf = TT.loads(cnf_s, ac_parser="json", ac_schema=scm_s)
+            self.assertFalse(cnf is None)
+
+        self.assertEqual(len(TT._SCHEMAS), 1)
+
     def test_49_loads_w_validation_error(self):
         cnf_s = """{"a": "aaa"}"""
         scm_s = TT.dumps(SCM_0, "json")
@@ -248,6 +261,19 @@ class Test_30_single_load(TestBaseWithIO):
                               ac_schema=spath)
         self.assertTrue(cnf2 is None)
 
+    def test_17_single_load__template_compressed(self):
+        if not anyconfig.template.SUPPORTED:
+            return
+
+        b_path = os.path.join(self.workdir, "b.yml")
+        cpath = os.path.join(self.workdir, "a.yaml.gz")
+        open(b_path, 'w').write(CNF_TMPL_0)
+        with gzip.open(cpath, "wb") as out:
+            out.write(b"{% include 'b.yml' %}")
+
+        cnf = TT.single_load(cpath, ac_template=True, ac_context=self.cnf)
+        self.assert_dicts_equal(cnf, self.cnf)
+
     def test_18_single_load__templates(self):
         if not anyconfig.template.SUPPORTED:
             return
@@ -293,6 +319,41 @@ class Test_30_single_load(TestBaseWithIO):
         cnf_3 = TT.single_load(cnf_2_path, ac_schema=scm_path)
         self.assertTrue(cnf_3 is None)  # Validation should fail.
 
+    def test_19_single_load__w_validation__cached_schema(self):
+        cnf_path = os.path.join(self.workdir, "cnf_19.json")
+        scm_path = os.path.join(self.workdir, "scm_19.json")
+        TT.dump(CNF_0, cnf_path)
+        TT.dump(SCM_0, scm_path)
+        TT._SCHEMAS.clear()
+
+        self.assertFalse(TT.single_load(cnf_path, ac_schema=scm_path) is None)
+        self.assertEqual(len(TT._SCHEMAS), 1)
+        scm = list(TT._SCHEMAS.values())[0]
+
+        self.assertFalse(TT.single_load(cnf_path, ac_schema=scm_path) is None)
+        self.assertTrue(list(TT._SCHEMAS.values())[0] is scm)
+
+        # The schema should be loaded again if it was changed.
+        TT.dump(dict(type="integer"), scm_path)
+        stat = os.stat(scm_path)
+        os.utime(scm_path, (stat.st_atime, stat.st_mtime + 10))
+        self.assertTrue(TT.single_load(cnf_path, ac_schema=scm_path) is None)
+
+    def test_19_single_load__w_validation__cached_schema_w_query(self):
+        cnf_path = os.path.join(self.workdir, "cnf_19.json")
+        scm_path = os.path.join(self.workdir, "scm_19.json")
+        TT.dump(dict(ok=1, ng=2), cnf_path)
+        TT.dump(dict(ok=dict(type="object"), ng=dict(type="string")),
+                scm_path)
+        TT._SCHEMAS.clear()
+
+        # The schema is queried with ac_query as well as configs.
+        self.assertEqual(TT.load(cnf_path, ac_schema=scm_path,
+                                 ac_query="ok"), 1)
+        self.assertTrue(TT.load(cnf_path, ac_schema=scm_path,
+                                ac_query="ng") is None)
+        self.assertEqual(len(TT._SCHEMAS), 2)
+
     def test_20_dump_and_single_load__w_ordered_option(self):
         TT.dump(self.cnf, self.a_path)
         self.assertTrue(os.path.exists(self.a_path))
@@ -311,6 +372,14 @@ class Test_30_single_load(TestBaseWithIO):
         self.assert_dicts_equal(res, self.cnf, ordered=True)
         self.assertTrue(isinstance(res, MyODict))
 
+    def test_24_dump_and_single_load__w_ac_dict_option__frozen(self):
+        TT.dump(self.cnf, self.a_path)
+
+        res = TT.single_load(self.a_path, ac_dict=TT.FrozenConfig)
+        self.assertTrue(isinstance(res, TT.FrozenConfig))
+        self.assertEqual(res, anyconfig.dicts.convert_to(
+            self.cnf, ac_dict=TT.FrozenConfig))
+
 
 class Test_32_single_load(unittest.TestCase):
 
@@ -480,6 +549,25 @@ class Test_42_multi_load(TestBaseWithIOMultiFiles):
         self.assert_dicts_equal(res0, self.exp)
         self.assert_dicts_equal(res1, self.exp)
 
+    def test_52_multi_load__w_schema_fragments(self):
+        scm_path = os.path.join(self.workdir, "scm.json")
+        TT.dump(dict(type="object", maxProperties=1,
+                     properties=dict(a=dict(type="integer"))), scm_path)
+        TT.dump(dict(a=1), self.a_path)
+        TT.dump(dict(b=2), self.b_path)
+        paths = [self.a_path, self.b_path]
+
+        # Fragments are valid but the merged one is not.
+        self.assertTrue(TT.multi_load(paths, ac_schema=scm_path) is None)
+        for opts in (dict(), dict(ac_schema_jobs=2)):
+            res = TT.multi_load(paths, ac_schema=scm_path,
+                                ac_schema_fragments=True, **opts)
+            self.assertEqual(res, dict(a=1, b=2))
+
+        TT.dump(dict(a="1"), self.b_path)
+        self.assertTrue(TT.multi_load(paths, ac_schema=scm_path,
+                                      ac_schema_fragments=True) is None)
+
     def test_60_multi_load__w_ac_dict_option(self):
         TT.dump(self.dic, self.a_path)
         TT.dump(self.upd, self.b_path)
@@ -488,6 +576,86 @@ class Test_42_multi_load(TestBaseWithIOMultiFiles):
         self.assert_dicts_equal(res, self.exp)
         self.assertTrue(isinstance(res, MyODict))
 
+    def test_61_multi_load__w_ac_intern_option(self):
+        TT.dump(dict(a=dict(name="name_a", tags=[1, 2])), self.a_path)
+        TT.dump(dict(b=dict(name="name_a", tags=[1, 2])), self.b_path)
+
+        res = TT.multi_load(self.g_path, ac_intern=True)
+        self.assertTrue(res["a"]["name"] is res["b"]["name"])
+        self.assertTrue(list(res["a"])[0] is list(res["b"])[0])
+        # Mutable ones are not shared.
+        self.assertFalse(res["a"]["tags"] is res["b"]["tags"])
+
+        res = TT.multi_load(self.g_path, ac_intern=True,
+                            ac_dict=TT.FrozenConfig)
+        self.assertTrue(res["a"]["tags"] is res["b"]["tags"])
+
+    def test_62_multi_load__w_ac_dict_option__frozen(self):
+        TT.dump(self.dic, self.a_path)
+        TT.dump(self.upd, self.b_path)
+
+        res = TT.load(self.g_path, ac_dict=TT.FrozenConfig)
+        self.assertTrue(isinstance(res, TT.FrozenConfig))
+        self.assertEqual(res, anyconfig.dicts.convert_to(
+            self.exp, ac_dict=TT.FrozenConfig))
+
+        res = TT.load(self.g_path, None, TT.FrozenConfig)  # Positional.
+        self.assertTrue(isinstance(res, TT.FrozenConfig))
+        self.assertEqual(res, self.exp)
+
+    def test_64_load__frozen__dump_validate_and_gen_schema(self):
+        TT.dump(self.dic, self.a_path)
+        TT.dump(self.upd, self.b_path)
+
+        res = TT.load(self.g_path, ac_dict=TT.FrozenConfig)
+        self.assertTrue(isinstance(res, TT.FrozenConfig))
+        self.assertEqual(TT.loads(TT.dumps(res, "json"), "json"), self.exp)
+
+        c_path = os.path.join(self.workdir, "c.json")
+        TT.dump(res, c_path)
+        self.assertEqual(TT.load(c_path), self.exp)
+
+        scm = TT.gen_schema(res)
+        self.assertEqual(scm["type"], "object")
+        self.assertEqual(scm, TT.gen_schema(self.exp))
+        self.assertTrue(TT.validate(res, scm)[0])
+        self.assertTrue(TT.validate(res, scm, ac_schema_errors=True)[0])
+        self.assertTrue(TT.validate_many([res], scm)[0])
+
+    def test_70_preload(self):
+        TT.dump(self.dic, self.a_path)
+        TT.dump(self.upd, self.b_path)
+
+        try:
+            (res, size) = TT.preload(self.g_path)
+        finally:
+            if hasattr(gc, "unfreeze"):
+                gc.unfreeze()
+
+        self.assertTrue(isinstance(res, TT.FrozenConfig))
+        self.assertEqual(res, anyconfig.dicts.convert_to(
+            self.exp, ac_dict=TT.FrozenConfig))
+        self.assertEqual(size, anyconfig.dicts.sizeof(res))
+
+    def test_72_preload__validate_and_dump(self):
+        TT.dump(self.dic, self.a_path)
+        TT.dump(self.upd, self.b_path)
+
+        try:
+            (res, _size) = TT.preload(self.g_path)
+        finally:
+            if hasattr(gc, "unfreeze"):
+                gc.unfreeze()
+
+        scm = TT.gen_schema(self.exp)
+        self.assertEqual(TT.gen_schema(res), scm)
+        self.assertTrue(TT.validate(res, scm)[0])
+
+        c_path = os.path.join(self.workdir, "c.json")
+        TT.dump(res, c_path)
+        self.assertEqual(TT.load(c_path), self.exp)
+        self.assertEqual(TT.loads(TT.dumps(res, "json"), "json"), self.exp)
+
 
 class Test_50_load_and_dump(TestBaseWithIOMultiFiles):
 
@@ -507,6 +675,13 @@ class Test_50_load_and_dump(TestBaseWithIOMultiFiles):
         res = TT.load([self.a_path, self.b_path])
         self.assert_dicts_equal(res, self.exp)
 
+    def test_30_dump_and_load__compressed(self):
+        for ext in ("gz", "bz2", "xz"):
+            path = os.path.join(self.workdir, "a.json." + ext)
+            TT.dump(self.dic, path, ac_compresslevel=1)
+            self.assertTrue(os.path.exists(path))
+            self.assert_dicts_equal(TT.load(path), self.dic)
+
     def test_31_dump_and_load__to_from_stream(self):
         with TT.open(self.a_path, mode='w') as strm:
             TT.dump(self.dic, strm)
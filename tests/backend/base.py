@@ -37,6 +37,11 @@ class Test00(unittest.TestCase):
         self.assertEqual(cnf, MZERO)
         self.assertTrue(isinstance(cnf, type(MZERO)))
 
+    def test_40_load_iter__ignore_missing(self):
+        cpath = os.path.join(os.curdir, "conf_file_should_not_exist")
+        cnfs = list(self.psr.load_iter(cpath, ignore_missing=True))
+        self.assertEqual(cnfs, [MZERO])
+
 
 class Test10(unittest.TestCase):
 
@@ -77,4 +82,26 @@ class Test20(unittest.TestCase):
         with TT.BinaryFilesMixin.wopen("/dev/null") as fileobj:
             self.assertEqual(fileobj.mode, 'wb')
 
+
+class Test30(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tests.common.setup_workdir()
+
+    def tearDown(self):
+        tests.common.cleanup_workdir(self.workdir)
+
+    def test_10_ropen_and_wopen__compressed(self):
+        for ext in TT._COMPRESSED_OPENS:
+            path = os.path.join(self.workdir, "a.txt." + ext)
+            with TT.TextFilesMixin.wopen(path, compresslevel=1) as out:
+                out.write(u"abc")
+
+            with open(path, 'rb') as inp:
+                self.assertNotEqual(inp.read(), b"abc")
+            with TT.TextFilesMixin.ropen(path) as inp:
+                self.assertEqual(inp.read(), u"abc")
+            with TT.BinaryFilesMixin.ropen(path) as inp:
+                self.assertEqual(inp.read(), b"abc")
+
 # vim:sw=4:ts=4:et:
@@ -30,4 +30,30 @@ class Test_20(TBC.Test_20_dump_and_load, HasParserTrait):
 
     pass
 
+
+class Test_30_multi_documents(TBC.TestBaseWithIO, HasParserTrait):
+
+    cnfs = [dict(a=i, b="b%d" % i) for i in range(3)]
+    content = b"".join(TT.bson.BSON.encode(c) for c in cnfs)
+
+    def test_10_loads__first_document(self):
+        self.assertEqual(self.psr.loads(self.content), self.cnfs[0])
+        self.assertEqual(self.psr.loads(memoryview(self.content)),
+                         self.cnfs[0])
+
+    def test_20_load_iter(self):
+        with open(self.cnf_path, "wb") as out:
+            out.write(self.content)
+
+        self.assertEqual(self.psr.load(self.cnf_path), self.cnfs[0])
+        self.assertEqual(list(self.psr.load_iter(self.cnf_path)), self.cnfs)
+
+    def test_30_load__empty(self):
+        open(self.cnf_path, "wb").close()
+
+        self.assertEqual(self.psr.loads(b""), {})
+        self.assertEqual(self.psr.loads(memoryview(b"")), {})
+        self.assertEqual(self.psr.load(self.cnf_path), {})
+        self.assertEqual(list(self.psr.load_iter(self.cnf_path)), [])
+
 # vim:sw=4:ts=4:et:
@@ -4,12 +4,20 @@
 # License: MIT
 #
 # pylint: disable=missing-docstring,invalid-name,too-few-public-methods
+# pylint: disable=protected-access
 from __future__ import absolute_import
 
 # import copy
+import io
+import os.path
+import unittest
+
+import mock
+
 import anyconfig.backend.msgpack as TT
 import anyconfig.compat
 import tests.backend.common as TBC
+import tests.common
 
 from tests.common import to_bytes as _bytes
 
@@ -36,6 +44,60 @@ class Test_10(TBC.Test_10_dumps_and_loads, HasParserTrait):
     load_options = dict(use_single_float=True)
 
 
+class Test_30_load_iter(unittest.TestCase):
+
+    # Keys are loaded as str regardless of the default of msgpack versions.
+    psr = TT.Parser()
+    opts = dict(raw=False)
+    cnfs = [dict(a=i, b=[1, 2]) for i in range(3)]
+    content = b"".join(TT.msgpack.packb(c) for c in cnfs)
+
+    def setUp(self):
+        self.workdir = tests.common.setup_workdir()
+
+    def tearDown(self):
+        tests.common.cleanup_workdir(self.workdir)
+
+    def test_10_load_iter__stream(self):
+        res = list(self.psr.load_iter(io.BytesIO(self.content),
+                                      **self.opts))
+        self.assertEqual(res, self.cnfs)
+
+    def test_20_load_iter__path(self):
+        path = os.path.join(self.workdir, "a.msgpack")
+        with open(path, "wb") as out:
+            out.write(self.content)
+
+        res = list(self.psr.load_iter(path, read_size=4, **self.opts))
+        self.assertEqual(res, self.cnfs)
+
+    def test_30_load_iter__buffer_and_items(self):
+        res = list(self.psr.load_iter(memoryview(self.content),
+                                      ac_items=True, use_list=False,
+                                      **self.opts))
+        self.assertEqual(len(res), 6)
+        self.assertEqual(res[:2], [("a", 0), ("b", (1, 2))])
+
+    def test_32_load_iter__raw_option(self):
+        self.assertEqual(self.psr._load_options(dict, raw=False,
+                                                read_size=4)["raw"], False)
+        with mock.patch.object(TT.msgpack, "Unpacker",
+                               wraps=TT.msgpack.Unpacker) as unpacker:
+            res = list(self.psr.load_iter(io.BytesIO(self.content),
+                                          **self.opts))
+        self.assertEqual(unpacker.call_args[1]["raw"], False)
+        self.assertEqual(res, self.cnfs)
+
+    def test_40_load__mmap_and_buffer(self):
+        path = os.path.join(self.workdir, "a.msgpack")
+        self.psr.dump(self.cnfs[0], path)
+        self.assertEqual(self.psr.load(path, **self.opts), self.cnfs[0])
+
+        content = memoryview(TT.msgpack.packb(self.cnfs[1]))
+        self.assertEqual(self.psr.loads(content, **self.opts),
+                         self.cnfs[1])
+
+
 # pylint: disable=pointless-string-statement
 """
 TODO:
@@ -6,6 +6,13 @@
 # pylint: disable=missing-docstring,invalid-name,too-few-public-methods
 from __future__ import absolute_import
 
+import io
+import mmap
+import os.path
+import unittest
+
+import mock
+
 import anyconfig.backend.pickle as TT
 import tests.backend.common as TBC
 
@@ -26,4 +33,64 @@ class Test_20(TBC.Test_20_dump_and_load, HasParserTrait):
 
     pass
 
+
+class ZeroCopyBuffer(object):
+
+    def __init__(self, data):
+        self.data = data
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= TT.OOB_PROTOCOL:
+            return (ZeroCopyBuffer, (TT.pickle.PickleBuffer(self.data), ))
+        return (ZeroCopyBuffer, (bytes(self.data), ))
+
+
+@unittest.skipIf(not TT.HAS_OOB, "pickle protocol 5 is not available")
+class Test_30_buffers(TBC.TestBaseWithIO, HasParserTrait):
+
+    def test_10_dump_and_load__w_buffers(self):
+        cnf = dict(a=1, b=ZeroCopyBuffer(b"x" * 1024))
+        self.psr.dump(cnf, self.cnf_path, ac_pickle_buffers=True)
+        bpath = TT.buffers_path(self.cnf_path)
+        self.assertTrue(os.path.exists(bpath))
+        self.assertTrue(os.path.getsize(self.cnf_path) < 1024)
+
+        res = self.psr.load(self.cnf_path)
+        self.assertEqual(res["a"], 1)
+        self.assertEqual(bytes(res["b"].data), b"x" * 1024)
+        self.assertTrue(isinstance(res["b"].data.obj, mmap.mmap))
+
+        self.psr.dump(dict(a=2), self.cnf_path)  # Without buffers.
+        self.assertFalse(os.path.exists(bpath))
+        self.assertEqual(self.psr.load(self.cnf_path), dict(a=2))
+
+    def test_20_dumps__w_buffers(self):
+        cnf = dict(b=ZeroCopyBuffer(b"x" * 10))
+        self.assertRaises(ValueError, self.psr.dumps, cnf,
+                          ac_pickle_buffers=True)
+        res = self.psr.loads(self.psr.dumps(cnf))
+        self.assertEqual(bytes(res["b"].data), b"x" * 10)
+
+    def test_22_dump__w_buffers__stream_and_compressed(self):
+        cnf = dict(b=ZeroCopyBuffer(b"x" * 10))
+        self.assertRaises(ValueError, self.psr.dump, cnf, io.BytesIO(),
+                          ac_pickle_buffers=True)
+
+        path = self.cnf_path + ".gz"
+        self.assertRaises(ValueError, self.psr.dump, cnf, path,
+                          ac_pickle_buffers=True)
+        self.assertFalse(os.path.exists(path))
+
+    def test_30_dump__w_buffers__failed(self):
+        self.psr.dump(dict(a=1), self.cnf_path)
+        cnf = dict(a=2, b=ZeroCopyBuffer(b"x" * 1024))
+        with mock.patch("anyconfig.backend.pickle.dump_buffers",
+                        side_effect=IOError("failed")):
+            self.assertRaises(IOError, self.psr.dump, cnf, self.cnf_path,
+                              ac_pickle_buffers=True)
+
+        self.assertEqual(self.psr.load(self.cnf_path), dict(a=1))
+        self.assertEqual(sorted(os.listdir(os.path.dirname(self.cnf_path))),
+                         [os.path.basename(self.cnf_path)])
+
 # vim:sw=4:ts=4:et:
@@ -0,0 +1,112 @@
+#
+# Copyright (C) 2017 Satoru SATOH <ssato @ redhat.com>
+# License: MIT
+#
+# pylint: disable=missing-docstring,invalid-name,too-few-public-methods
+# pylint: disable=protected-access
+from __future__ import absolute_import
+
+import os
+import os.path
+import time
+import unittest
+
+import anyconfig.api
+import anyconfig.compat
+import anyconfig.backend.snapshot as TT
+import tests.backend.common as TBC
+import tests.common
+
+
+class HasParserTrait(TBC.HasParserTrait):
+
+    psr = TT.Parser()
+    cnf = TBC.CNF_1
+    cnf_s = TT.dumps(cnf)
+
+
+class Test_10(TBC.Test_10_dumps_and_loads, HasParserTrait):
+
+    load_options = dict(ac_snapshot_check=False)
+
+
+class Test_20(TBC.Test_20_dump_and_load, HasParserTrait):
+
+    pass
+
+
+class Test_30_compile(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tests.common.setup_workdir()
+        self.pattern = os.path.join(self.workdir, "*.json")
+        self.out = os.path.join(self.workdir, "cnf.acsnap")
+        for idx in range(3):
+            anyconfig.api.dump(dict(a=idx, b={str(idx): idx}),
+                               os.path.join(self.workdir, "%d.json" % idx))
+
+    def tearDown(self):
+        tests.common.cleanup_workdir(self.workdir)
+
+    def _touch(self, path):
+        mtime = time.time() + 10
+        os.utime(path, (mtime, mtime))
+
+    def test_10_compile_and_load(self):
+        cnf = anyconfig.api.compile(self.pattern, self.out)
+        self.assertEqual(cnf, anyconfig.api.load(self.pattern))
+        self.assertEqual(anyconfig.api.load(self.out), cnf)
+
+        with open(self.out, "rb") as inp:
+            (hdr, _payload) = TT.load_header(inp.read())
+        self.assertEqual(hdr["format"], "marshal")
+        self.assertEqual(hdr["path_specs"], [self.pattern])
+        self.assertEqual(len(hdr["sources"]), 3)
+        self.assertFalse(TT.is_stale(hdr))
+
+    def test_20_load__modified(self):
+        anyconfig.api.compile(self.pattern, self.out)
+        path = os.path.join(self.workdir, "2.json")
+        anyconfig.api.dump(dict(a=20), path)
+        self._touch(path)
+
+        res = anyconfig.api.load(self.out, ac_snapshot_check=False)
+        self.assertEqual(res["a"], 2)
+        self.assertEqual(anyconfig.api.load(self.out)["a"], 20)
+
+        # The snapshot was updated.
+        with open(self.out, "rb") as inp:
+            (hdr, _payload) = TT.load_header(inp.read())
+        self.assertFalse(TT.is_stale(hdr))
+        res = anyconfig.api.load(self.out, ac_snapshot_check=False)
+        self.assertEqual(res["a"], 20)
+
+    def test_22_load__added(self):
+        anyconfig.api.compile(self.pattern, self.out)
+        anyconfig.api.dump(dict(a=3), os.path.join(self.workdir, "3.json"))
+
+        self.assertEqual(anyconfig.api.load(self.out)["a"], 3)
+
+    def test_30_load__broken(self):
+        anyconfig.api.compile(self.pattern, self.out)
+        with open(self.out, "ab") as out:
+            out.write(b"x")
+
+        with self.assertRaises(TT.SnapshotError):
+            anyconfig.api.load(self.out)
+
+    def test_32_load__header_not_mapping(self):
+        hdr = b"[]"
+        with open(self.out, "wb") as out:
+            out.write(TT.MAGIC + TT._HDR_LEN.pack(len(hdr)) + hdr)
+
+        with self.assertRaises(TT.SnapshotError):
+            anyconfig.api.load(self.out)
+
+    def test_40_compile__options_not_jsonable(self):
+        with self.assertRaises(TT.SnapshotError):
+            anyconfig.api.compile(self.pattern, self.out,
+                                  ac_dict=anyconfig.compat.OrderedDict)
+        self.assertFalse(os.path.exists(self.out))
+
+# vim:sw=4:ts=4:et:
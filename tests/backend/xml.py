@@ -7,6 +7,7 @@
 # pylint: disable=ungrouped-imports,protected-access
 from __future__ import absolute_import
 import unittest
+import anyconfig.api
 import anyconfig.backend.xml as TT
 import anyconfig.compat
 import tests.backend.common as TBC
@@ -275,4 +276,9 @@ class Test_20(TBC.Test_20_dump_and_load, HasParserTrait):
         cnf = self.psr.load(self.cnf_path)
         self._assert_dicts_equal(cnf)
 
+    def test_44_load_from_text_stream(self):
+        with open(self.cnf_path) as inp:
+            cnf = anyconfig.api.load(inp, ac_parser="xml")
+        self._assert_dicts_equal(cnf)
+
 # vim:sw=4:ts=4:et:
@@ -7,6 +7,7 @@
 # pylint: disable=ungrouped-imports
 from __future__ import absolute_import
 
+import copy
 import os
 import anyconfig.backend.yaml as TT
 import tests.backend.common as TBC
@@ -46,6 +47,15 @@ class Test_10(TBC.Test_10_dumps_and_loads, HasParserTrait):
 
 class Test_20(TBC.Test_20_dump_and_load, HasParserTrait):
 
-    pass
+    def test_40_dump__not_modified(self):
+        cnf = copy.deepcopy(self.cnf)
+        sect0 = cnf["sect0"]
+        self.psr.dump(cnf, self.cnf_path)
+
+        self.assertEqual(cnf, self.cnf)
+        self.assertTrue(type(cnf) is OrderedDict)
+        self.assertTrue(cnf["sect0"] is sect0)
+        self.assertTrue(type(sect0) is OrderedDict)
+        self.assertEqual(self.psr.load(self.cnf_path), self.cnf)
 
 # vim:sw=4:ts=4:et:
@@ -38,6 +38,13 @@ class Test(unittest.TestCase):
                 self.assertEqual(TT.find_by_file(cfg),
                                  anyconfig.backend.yaml.Parser)
 
+    def test_12_find_by_file__compressed(self):
+        for cfg in ("/a/b/c.json.gz", "/a/b/c.json.bz2", "/a/b/c.json.xz"):
+            self.assertEqual(TT.find_by_file(cfg),
+                             anyconfig.backend.json.Parser)
+
+        self.assertTrue(TT.find_by_file("/a/b/c.gz") is None)
+
     def test_20_find_by_type(self):
         ini_t = "ini"
         jsn_t = "json"
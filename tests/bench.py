@@ -0,0 +1,139 @@
+#
+# Copyright (C) 2017 Satoru SATOH <ssato @ redhat.com>
+# License: MIT
+#
+# pylint: disable=missing-docstring, invalid-name, protected-access
+from __future__ import absolute_import
+
+import json
+import os.path
+import sys
+import unittest
+
+import mock
+
+import anyconfig.api
+import anyconfig.backends
+import anyconfig.bench as TT
+import tests.common
+
+
+class Test_10_gen_config(unittest.TestCase):
+
+    def _count_leaves(self, cnf):
+        return sum(self._count_leaves(v) if isinstance(v, dict) else 1
+                   for v in cnf.values())
+
+    def test_10_wide(self):
+        cnf = TT.gen_config(1000, "wide")
+        self.assertEqual(len(cnf), 100)
+        self.assertEqual(self._count_leaves(cnf), 1000)
+
+    def test_20_deep(self):
+        cnf = TT.gen_config(1000, "deep")
+        self.assertEqual(self._count_leaves(cnf), 1000)
+
+        depth = 1
+        while "child" in cnf:
+            (cnf, depth) = (cnf["child"], depth + 1)
+        self.assertEqual(depth, 32)
+
+    def test_30_find_conversion(self):
+        for ptype in anyconfig.backends.list_types():
+            conv = TT.find_conversion(ptype)
+            self.assertFalse(conv is None, ptype)
+
+            data = conv(TT.gen_config(100, "deep"))
+            res = anyconfig.api.loads(anyconfig.api.dumps(data, ptype),
+                                      ac_parser=ptype)
+            self.assertTrue(res, ptype)
+            # Keys may be loaded as byte strings, e.g. with msgpack < 1.0.
+            self.assertEqual(TT._decoded(res), TT._decoded(data), ptype)
+
+
+class Test_20_run(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tests.common.setup_workdir()
+
+    def tearDown(self):
+        tests.common.cleanup_workdir(self.workdir)
+
+    def test_10_run(self):
+        res = TT.run(["small"], ["json"], ["loads.*", "dicts.*"],
+                     min_time=0.001, repeat=1)
+        self.assertEqual(sorted(res["results"]),
+                         ["dicts.get.small.deep", "dicts.set_.small.deep",
+                          "loads.json.small.deep", "loads.json.small.wide"])
+        for val in res["results"].values():
+            self.assertTrue(val["seconds"] > 0)
+            self.assertTrue(val["number"] >= 1)
+
+    def test_12_run__memory(self):
+        res = TT.run(["small"], ["json"], memory=True)
+        self.assertEqual(res["meta"]["mode"], "memory")
+        self.assertEqual(sorted(res["results"]),
+                         ["convert_to.small.deep", "convert_to.small.wide",
+                          "dumps.json.small.deep", "dumps.json.small.wide",
+                          "load.json.small.deep", "load.json.small.wide",
+                          "multi_load.json.1", "multi_load.json.10",
+                          "multi_load.json.100"])
+
+        self.assertEqual(res["results"]["multi_load.json.10"]["keys"],
+                         10 * TT.MULTI_LOAD_NKEYS)
+
+        res = res["results"]["load.json.small.wide"]
+        self.assertTrue(res["peak"] >= res["retained"] > 0)
+        self.assertTrue(res["blocks"] > 0)
+        self.assertTrue(res["retained_ratio"] > 0)
+
+    def test_14_run__skipped_backends(self):
+        with mock.patch("anyconfig.bench.find_conversion",
+                        return_value=None):
+            res = TT.run(["small"], ["json"], ["loads.*"], min_time=0.001,
+                         repeat=1)
+        self.assertEqual(res["meta"]["skipped"], ["json"])
+        self.assertEqual(res["results"], {})
+
+    def test_16_run__memory_wo_tracemalloc(self):
+        with mock.patch.dict(sys.modules, {"tracemalloc": None}):
+            res = TT.run(["small"], ["json"], ["load.*"], memory=True)
+        for val in res["results"].values():
+            self.assertTrue(val["peak"] is None)
+            self.assertFalse("blocks_per_key" in val)
+
+        base = dict(results=dict((k, dict(v, peak=1))
+                                 for k, v in res["results"].items()))
+        self.assertEqual(TT.compare(res, base, key="peak"), [])
+
+    def test_20_compare(self):
+        res = dict(results=dict(a=dict(seconds=1.1), b=dict(seconds=2.0)))
+        base = dict(results=dict(a=dict(seconds=1.0), b=dict(seconds=1.0)))
+        self.assertEqual([r[-1] for r in TT.compare(res, base)],
+                         [False, True])
+        self.assertEqual([r[-1] for r in TT.compare(res, base, 2.5)],
+                         [False, False])
+
+        res = dict(results=dict(a=dict(peak=300)))
+        base = dict(results=dict(a=dict(peak=100)))
+        self.assertEqual(TT.compare(res, base, key="peak"),
+                         [("a", 100, 300, 3.0, True)])
+
+    def test_30_main__output_and_compare(self):
+        output = os.path.join(self.workdir, "base.json")
+        opts = ["-q", "-s", "small", "-b", "json", "-f", "dumps.*",
+                "--min-time", "0.001", "--repeat", "1"]
+        TT.main(opts + ["-o", output])
+        res = json.load(open(output))
+        self.assertEqual(len(res["results"]), 2)
+
+        # Make the baseline far faster than results.
+        for val in res["results"].values():
+            val["seconds"] /= 1000.0
+        json.dump(res, open(output, 'w'))
+
+        with self.assertRaises(SystemExit) as ctx:
+            TT.main(opts + ["--compare", output])
+        self.assertEqual(ctx.exception.code, 1)
+
+# vim:sw=4:ts=4:et:
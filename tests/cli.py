@@ -9,8 +9,11 @@ import os
 import os.path
 import unittest
 
+import mock
+
 import anyconfig.cli as TT
 import anyconfig.api
+import anyconfig.compat
 import anyconfig.template
 import tests.common
 import tests.api
@@ -33,11 +36,12 @@ class Test_00(unittest.TestCase):
     >>> psr = TT.make_parser()
     >>> assert isinstance(psr, TT.argparse.ArgumentParser)
     >>> psr.parse_args([])  # doctest: +NORMALIZE_WHITESPACE
-    Namespace(args=None, atype=None, env=False, gen_schema=False, get=None,
-              ignore_missing=False, inputs=[], itype=None, list=False,
-              loglevel=1, merge='merge_dicts', otype=None, output=None,
-              query=None, schema=None, set=None, template=False,
-              validate=False)
+    Namespace(args=None, atype=None, connect=None, each=False, env=False,
+              gen_schema=False, get=None, ignore_missing=False, inputs=[],
+              itype=None, jobs=1, list=False, loglevel=1,
+              merge='merge_dicts', otype=None, output=None, profile=None,
+              profile_mode='cprofile', query=None, schema=None, serve=None,
+              set=None, template=False, timings=False, validate=False)
     """
 
 
@@ -310,4 +314,98 @@ class Test_50_others_wo_input(Test_20_Base):
             self.assertTrue(env_var in data)
             self.assertEqual(env_val, os.environ[env_var])
 
+
+class Test_50_each(Test_20_Base):
+
+    def _make_inputs(self, num=3):
+        inpaths = []
+        for idx in range(num):
+            inpath = os.path.join(self.workdir, "in", "%d.yml" % idx)
+            anyconfig.api.dump(dict(a=idx, b=dict(c="C")), inpath)
+            inpaths.append(inpath)
+
+        return inpaths
+
+    def test_10_convert(self):
+        inpaths = self._make_inputs()
+        output = os.path.join(self.workdir, "out", "{stem}.{otype}")
+        for jobs in ("1", "2"):
+            self.run_and_check_exit_code(["--each", "-O", "json", "-j", jobs,
+                                          "-o", output] + inpaths, 0)
+            for idx in range(len(inpaths)):
+                outpath = os.path.join(self.workdir, "out", "%d.json" % idx)
+                self.assertEqual(anyconfig.api.load(outpath)["a"], idx)
+
+    def test_20_validate(self):
+        inpaths = self._make_inputs()
+        anyconfig.api.dump(dict(a="aaa"), inpaths[1])
+        scmfile = os.path.join(self.workdir, "scm.json")
+        anyconfig.api.dump({"type": "object",
+                            "properties": {"a": {"type": "integer"}}},
+                           scmfile)
+
+        self.run_and_check_exit_code(["--each", "--validate", "-S", scmfile,
+                                      "-j", "2"] + inpaths, 1)
+        self.run_and_check_exit_code(["--each", "--validate", "-S", scmfile,
+                                      inpaths[0], inpaths[2]], 0)
+
+    def test_22_process_one__removed_input(self):
+        inpath = os.path.join(self.workdir, "in", "not_exist.yml")
+        output = os.path.join(self.workdir, "out", "{stem}.json")
+        args = TT._parse_args(["--each", "-o", output, inpath])
+        (rpath, outpath, err) = TT._process_one((args, inpath))
+        self.assertEqual((rpath, outpath), (inpath, None))
+        self.assertTrue(err)
+
+        args = TT._parse_args(["--each", "-x", "-o", output, inpath])
+        self.assertEqual(TT._process_one((args, inpath)),
+                         (inpath, None, None))
+
+    def test_30_wo_output(self):
+        self.run_and_check_exit_code(["--each"] + self._make_inputs(), 1)
+
+    def test_32_w_same_outputs(self):
+        output = os.path.join(self.workdir, "out.json")
+        self.run_and_check_exit_code(["--each", "-o", output] +
+                                     self._make_inputs(), 1)
+        self.assertFalse(os.path.exists(output))
+
+
+class Test_60_timings_and_profile(Test_20_Base):
+
+    def test_10_timings(self):
+        output = os.path.join(self.workdir, "out.json")
+        timings = TT.Timings()
+        with timings.measure("test"):
+            pass
+        self.assertEqual(timings.records[0][0], "test")
+
+        with mock.patch("sys.stderr",
+                        new_callable=anyconfig.compat.StringIO) as err:
+            self.run_and_check_exit_code(["--timings", "-o", output, "-T",
+                                          "--schema", SCM_0_PATH,
+                                          CNF_0_PATH], 0)
+        self.assertEqual(anyconfig.api.load(output),
+                         anyconfig.api.load(CNF_0_PATH))
+
+        lines = err.getvalue().splitlines()
+        self.assertEqual(lines[0].split(),
+                         ["phase", "wall", "[ms]", "cpu", "[ms]", "detail"])
+        rows = dict((line.split()[0], line.split()[1:3])
+                    for line in lines[1:])
+        for phase in ("import", "render", "parse", "validate", "dump"):
+            self.assertTrue(phase in rows, phase)
+            (wall, cpu) = rows[phase]
+            self.assertTrue(float(wall) >= 0 and float(cpu) >= 0, phase)
+
+    def test_20_profile(self):
+        output = os.path.join(self.workdir, "out.json")
+        prof = os.path.join(self.workdir, "prof.out")
+        self.run_and_check_exit_code(["--profile", prof, "-o", output,
+                                      CNF_0_PATH], 0)
+        self.assertTrue(os.path.exists(output))
+
+        import pstats
+        self.assertTrue(pstats.Stats(prof).total_calls > 0)
+
 # vim:sw=4:ts=4:et:
@@ -8,6 +8,7 @@
 from __future__ import absolute_import
 
 import copy
+import sys
 import unittest
 import anyconfig.dicts as TT
 
@@ -202,4 +203,202 @@ class Test_40_merge(unittest.TestCase):
         TT.merge(dic, self.upd, ac_merge=set_none_merge_strat)
         self.assertTrue(dicts_equal(dic, exp))
 
+
+class Test_40_diff_paths(unittest.TestCase):
+
+    def test_10_diff_paths(self):
+        old = dict(a=1, b=dict(c=2, d=[0, 1]), e=[0], f=OrderedDict(g=3))
+        new = dict(a=1, b=dict(c=0, d=[0, 2]), e=[0, 1], h=None)
+        self.assertEqual(sorted(TT.diff_paths(old, new), key=str),
+                         [('b', 'c'), ('b', 'd', 1), ('e', ), ('f', ),
+                          ('h', )])
+
+    def test_20_diff_paths__same(self):
+        dic = dict(a=1, b=dict(c=2, d=[0, 1]))
+        self.assertEqual(TT.diff_paths(dic, dic), [])
+        self.assertEqual(TT.diff_paths(dic, copy.deepcopy(dic)), [])
+        self.assertEqual(TT.diff_paths(1, 2), [()])
+
+
+class Test_50_FrozenConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.dic = dict(a=1, b=dict(c=[1, dict(d=2)], e=set([3])))
+        self.cnf = TT.FrozenConfig(self.dic)
+
+    def test_10_frozen(self):
+        self.assertEqual(self.cnf["b"]["c"], (1, TT.FrozenConfig(d=2)))
+        self.assertEqual(self.cnf["b"]["e"], frozenset([3]))
+        self.assertEqual(self.cnf.get("x", 0), 0)
+        self.assertEqual(sorted(self.cnf), ['a', 'b'])
+        self.assertTrue(is_dict_like(self.cnf))
+
+        with self.assertRaises(TypeError):
+            self.cnf["a"] = 2
+        with self.assertRaises(AttributeError):
+            self.cnf._items = {}
+        with self.assertRaises(TypeError):
+            TT.set_(self.cnf, "b.x", 1)
+        with self.assertRaises(TypeError):
+            TT.merge(self.cnf, dict(a=2))
+
+    def test_20_hash_and_eq(self):
+        other = TT.FrozenConfig(copy.deepcopy(self.dic))
+        self.assertEqual(hash(self.cnf), hash(other))
+        self.assertEqual(self.cnf, other)
+        self.assertNotEqual(self.cnf, TT.FrozenConfig(a=1))
+        self.assertEqual(len(set([self.cnf, other])), 1)
+
+        # Subtrees shared are not copied.
+        self.assertTrue(TT.FrozenConfig(self.cnf)["b"] is self.cnf["b"])
+        self.assertEqual(TT.FrozenConfig(a=1, b=self.cnf["b"]), self.cnf)
+
+        # Compared with mutable ones as these were frozen.
+        self.assertEqual(self.cnf, self.dic)
+        self.assertEqual(self.dic, self.cnf)
+        self.assertNotEqual(self.cnf, dict(self.dic, a=2))
+
+    def test_30_copy(self):
+        self.assertTrue(copy.copy(self.cnf) is self.cnf)
+        self.assertTrue(copy.deepcopy(self.cnf) is self.cnf)
+
+    def test_40_convert_to(self):
+        res = TT.convert_to(self.dic, ac_dict=TT.FrozenConfig)
+        self.assertTrue(isinstance(res, TT.FrozenConfig))
+        self.assertTrue(isinstance(res["b"], TT.FrozenConfig))
+        self.assertEqual(res, self.cnf)
+
+        res = TT.convert_to(self.cnf)
+        self.assertTrue(type(res) is dict)
+        self.assertTrue(type(res["b"]) is dict)
+
+    def test_42_thaw(self):
+        res = TT.thaw(self.cnf)
+        self.assertTrue(type(res) is dict)
+        self.assertTrue(type(res["b"]["c"]) is list)
+        self.assertTrue(type(res["b"]["e"]) is set)
+        self.assertEqual(res, self.dic)
+        self.assertTrue(TT.thaw(self.dic) is self.dic)
+
+    def test_50_is_immutable_type(self):
+        self.assertTrue(TT.is_immutable_type(TT.FrozenConfig))
+        self.assertFalse(TT.is_immutable_type(OrderedDict))
+        self.assertFalse(TT.is_immutable_type(TT.convert_to))
+
+
+class Test_60_intern_objects(unittest.TestCase):
+
+    def _make(self, idx):
+        # Make strings at runtime not to share constants.
+        return {"key_%d" % 0: dict(name="name_%d" % 0, idx=idx,
+                                   long="x" * (TT.INTERN_MAX_LEN + 1),
+                                   tags=(1, "tag_%d" % 0),
+                                   frozen=TT.FrozenConfig(a=1))}
+
+    def test_10_intern_objects(self):
+        memo = {}
+        (cnf0, cnf1) = [TT.intern_objects(self._make(i), memo)
+                        for i in range(2)]
+        self.assertEqual(cnf0, self._make(0))
+
+        (key0, key1) = (list(cnf0)[0], list(cnf1)[0])
+        self.assertTrue(key0 is key1)
+        (val0, val1) = (cnf0[key0], cnf1[key1])
+        for key in ("name", "tags", "frozen"):
+            self.assertTrue(val0[key] is val1[key], key)
+
+        self.assertFalse(val0["long"] is val1["long"])
+
+    def test_20_intern_objects__types_are_kept(self):
+        memo = {}
+        res = [TT.intern_objects(x, memo) for x in [(1, ), (True, ), (1.0, )]]
+        self.assertEqual([type(x[0]) for x in res], [int, bool, float])
+
+    def test_30_intern_objects__in_place(self):
+        lst = [{"a": 1}]
+        self.assertTrue(TT.intern_objects(lst) is lst)
+        self.assertTrue(TT.intern_objects(lst[0]) is lst[0])
+
+    def test_40_sizeof(self):
+        cnf = TT.FrozenConfig(a=(1, "xyz"))
+        self.assertTrue(TT.sizeof(cnf) > TT.sizeof(dict(a=(1, "xyz"))))
+
+        lst = [cnf, cnf]  # Shared objects are counted once.
+        self.assertEqual(TT.sizeof(lst),
+                         sys.getsizeof(lst) + TT.sizeof(cnf))
+
+
+class Test_70_convert_to(unittest.TestCase):
+
+    def test_10_convert_to(self):
+        odic = OrderedDict((("a", OrderedDict(b=[1, OrderedDict(c=2)])),
+                            ("d", (3, 4))))
+        res = TT.convert_to(odic)
+        self.assertEqual(res, odic)
+        self.assertTrue(type(res) is dict)
+        self.assertTrue(type(res["a"]) is dict)
+        self.assertTrue(type(res["a"]["b"][1]) is dict)
+        self.assertTrue(res["d"] is odic["d"])  # Immutable; nothing to do.
+        self.assertFalse(res["a"]["b"] is odic["a"]["b"])
+
+        res = TT.convert_to(odic, ac_ordered=True)
+        self.assertFalse(res is odic)  # Copied by default.
+        self.assertEqual(res, odic)
+
+        res = TT.convert_to(odic, ac_ordered=True, ac_inplace=True)
+        self.assertTrue(res is odic)
+
+    def test_20_convert_to__same_type(self):
+        dic = dict(a=dict(b=[1, dict(c=2)]), d=OrderedDict(e=3))
+        res = TT.convert_to(dic)
+        self.assertFalse(res is dic)
+        self.assertFalse(res["a"] is dic["a"])
+        self.assertFalse(res["a"]["b"] is dic["a"]["b"])
+        self.assertTrue(type(res["d"]) is dict)
+
+        res["a"]["b"].append(3)  # Copies can be modified safely.
+        self.assertEqual(dic["a"]["b"], [1, dict(c=2)])
+
+        res = TT.convert_to(dic, ac_inplace=True)
+        self.assertTrue(res is dic)
+        self.assertTrue(res["a"] is dic["a"])
+
+        del dic["d"]
+        self.assertTrue(TT.convert_to(dic, ac_inplace=True) is dic)
+
+    def test_30_convert_to__inplace(self):
+        dic = dict(a=dict(b=[1, OrderedDict(c=2)]))
+        lst = dic["a"]["b"]
+        res = TT.convert_to(dic, ac_inplace=True)
+        self.assertTrue(res is dic)
+        self.assertTrue(res["a"]["b"] is lst)
+        self.assertTrue(type(lst[1]) is dict)
+
+    def test_32_convert_to__share(self):
+        dic = dict(a=dict(b=[1, dict(c=2)]), d=OrderedDict(e=[3]))
+        (sub, lst) = (dic["a"], dic["d"]["e"])
+        res = TT.convert_to(dic, ac_share=True)
+        self.assertFalse(res is dic)  # Its item was converted.
+        self.assertTrue(res["a"] is sub)
+        self.assertTrue(type(res["d"]) is dict)
+        self.assertTrue(res["d"]["e"] is lst)
+
+        # The original one is not modified.
+        self.assertTrue(type(dic["d"]) is OrderedDict)
+        self.assertTrue(dic["a"] is sub)
+
+        del dic["d"]
+        self.assertTrue(TT.convert_to(dic, ac_share=True) is dic)
+
+    def test_40_convert_to__deeply_nested(self):
+        dic = cur = OrderedDict()
+        for _ in range(10000):
+            cur["a"] = OrderedDict()
+            cur = cur["a"]
+
+        res = TT.convert_to(dic)
+        for _ in range(10000):
+            self.assertTrue(type(res) is dict)
+            res = res["a"]
+
 # vim:sw=4:ts=4:et:
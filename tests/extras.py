@@ -5,12 +5,22 @@
 # pylint: disable=missing-docstring
 from __future__ import absolute_import
 
-import unittest
+import os
+import subprocess
 import sys
+import unittest
 
 
 class TestImportErrors(unittest.TestCase):
 
+    def setUp(self):
+        self.modules = sys.modules.copy()
+
+    def tearDown(self):
+        # Do not make modules unavailable in other test cases.
+        sys.modules.clear()
+        sys.modules.update(self.modules)
+
     def test_10_ac_compat(self):
         fun = "NullHandler"
         sys.modules["logging"] = None
@@ -28,11 +38,37 @@ class TestImportErrors(unittest.TestCase):
             self.assertFalse(anyconfig.backends is None)
 
     def test_30_ac_schema(self):
+        import anyconfig.schema
+
         mod = "jsonschema"
         sys.modules[mod] = None
-        import anyconfig.schema
+        anyconfig.schema._VALIDATORS.clear()
+        try:
+            scm = {"type": "array", "items": {"$ref": "#"}}  # Not compiled.
+            self.assertTrue(anyconfig.schema.compile_schema(scm) is None)
+            self.assertEqual(anyconfig.schema.validate([], scm),
+                             (True, anyconfig.schema._NA_MSG))
+        finally:
+            anyconfig.schema._VALIDATORS.clear()
 
         self.assertTrue(sys.modules[mod] is None)
-        self.assertFalse(anyconfig.schema is None)
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_10_import_anyconfig(self):
+        topdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        paths = [topdir] + [p for p in os.environ.get("PYTHONPATH",
+                                                      "").split(os.pathsep)
+                            if p]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(paths))
+
+        mods = ("jinja2", "jsonschema", "jmespath")
+        code = ("import sys, anyconfig; "
+                "assert anyconfig.__file__.startswith(%r); "
+                "print([m for m in %r if m in sys.modules])" % (topdir, mods))
+        out = subprocess.check_output([sys.executable, "-c", code],
+                                      cwd=topdir, env=env)
+        self.assertEqual(out.strip(), b"[]")
 
 # vim:sw=4:ts=4:et:
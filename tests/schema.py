@@ -6,9 +6,12 @@
 # pylint: disable=bare-except
 from __future__ import absolute_import, print_function
 
+import copy
 import unittest
 import anyconfig.schema as TT
 
+from anyconfig.schema import IncrementalValidator
+
 from tests.common import dicts_equal
 
 
@@ -40,9 +43,31 @@ class Test_00_Functions(Test_00_Base):
 
     def test_22_array_to_schema__empty_array(self):
         scm = TT.array_to_schema([])
-        ref = dict(items=dict(type="string"), type="array")
+        ref = dict(type="array")
+        self.assertTrue(dicts_equal(scm, ref), scm)
+
+    def test_24_array_to_schema__empty_array_item(self):
+        scm = TT.array_to_schema([[1], []])
+        ref = dict(items=dict(items=dict(type="integer"), type="array"),
+                   type="array")
         self.assertTrue(dicts_equal(scm, ref), scm)
 
+    def test_26_array_to_schema__strict_unique(self):
+        for arr, uniq in (([1, True, [1], {'a': [1]}, {'a': [True]}], True),
+                          ([{'a': 1, 'b': 2}, {'b': 2, 'a': 1}], False),
+                          ([[1, 2], 3, [1, 2]], False)):
+            scm = TT.array_to_schema(arr, ac_schema_strict=True)
+            self.assertEqual(scm["uniqueItems"], uniq, arr)
+            self.assertEqual(scm["minItems"], len(arr))
+
+    def test_28_merge_schema__empty_array(self):
+        ref = dict(type="object",
+                   properties=dict(b=dict(type="array",
+                                          items=dict(type="integer"))))
+        for objs in (({'b': [1]}, {'b': []}), ({'b': []}, {'b': [1]})):
+            scm = TT.merge_schema(*[TT.gen_schema(o) for o in objs])
+            self.assertTrue(dicts_equal(scm, ref), scm)
+
     def test_30_object_to_schema_nodes_iter(self):
         scm = TT.object_to_schema({'a': 1})
         ref = dict(type="object", properties=dict(a=dict(type="integer")))
@@ -72,6 +97,241 @@ class Test_10_Validation(Test_00_Base):
         self.assertTrue(raised)
 
 
+class Test_11_CompileSchema(Test_00_Base):
+
+    def setUp(self):
+        TT._VALIDATORS.clear()
+
+    def test_10_compile_schema__cached(self):
+        vldtr = TT.compile_schema(self.schema)
+        if vldtr is None:  # jsonschema is not available.
+            return
+
+        scm = dict((k, v) for k, v in reversed(list(self.schema.items())))
+        self.assertTrue(TT.compile_schema(scm) is vldtr)
+        self.assertTrue(TT.compile_schema(vldtr) is vldtr)
+        self.assertEqual(len(TT._VALIDATORS), 1)
+
+    def test_20_validate__w_compiled_schema(self):
+        vldtr = TT.compile_schema(self.schema)
+        if vldtr is None:
+            return
+
+        self.assertTrue(TT.validate(self.obj, vldtr)[0])
+        self.assertFalse(TT.validate({'a': "aaa"}, vldtr)[0])
+        self.assertFalse(TT.validate({'a': "aaa"}, vldtr,
+                                     ac_schema_errors=True)[0])
+
+    def test_30_compile_schema__select_cls_by_schema_keyword(self):
+        scm = dict(self.schema)
+        scm["$schema"] = "http://json-schema.org/draft-03/schema#"
+        vldtr = TT.compile_schema(scm)
+        if vldtr is None:
+            return
+
+        import jsonschema
+        self.assertTrue(isinstance(vldtr, jsonschema.Draft3Validator))
+
+
+class Test_14_CompiledValidator(Test_00_Base):
+
+    scm = {"type": "object",
+           "required": ["a"],
+           "properties": {"a": {"type": ["integer", "null"]},
+                          "b": {"type": "array",
+                                "items": {"type": "object",
+                                          "properties": {
+                                              "c": {"enum": [1, "%s"]}}},
+                                "minItems": 2, "uniqueItems": True},
+                          "d": {"type": "array",
+                                "items": [{"type": "string"},
+                                          {"type": "number"}]}}}
+
+    def test_10_compile_schema(self):
+        vldtr = TT.compile_schema(self.scm)
+        self.assertTrue(isinstance(vldtr, TT.CompiledValidator))
+
+        for scm in (TT.gen_schema(self.obj2),
+                    _gen_scm(self.obj2)):
+            vldtr = TT.compile_schema(scm)
+            self.assertTrue(isinstance(vldtr, TT.CompiledValidator))
+            self.assertTrue(vldtr.is_valid(self.obj2))
+
+    def test_20_compile_schema__fallback(self):
+        for scm in ({"type": "string", "pattern": "^a"},
+                    {"type": "array", "items": {"$ref": "#"}},
+                    {"$schema": "http://json-schema.org/draft-06/schema#"}):
+            vldtr = TT.compile_schema(scm)
+            self.assertFalse(isinstance(vldtr, TT.CompiledValidator))
+
+    def test_30_iter_errors(self):
+        vldtr = TT.compile_schema(self.scm)
+        for obj in ({'a': 1}, {'a': None, 'b': [{}, {'c': "%s"}]},
+                    {'a': 0, 'd': ["x", 1.0, True]}):
+            self.assertTrue(vldtr.is_valid(obj), obj)
+            self.assertEqual(list(vldtr.iter_errors(obj)), [])
+
+        errs = list(vldtr.iter_errors({'a': True,
+                                       'b': [{'c': 3}, {'c': 3}],
+                                       'd': [1, "y"]}))
+        self.assertEqual(sorted(tuple(e.path) for e in errs),
+                         [('a', ), ('b', ), ('b', 0, 'c'), ('b', 1, 'c'),
+                          ('d', 0), ('d', 1)])
+        self.assertFalse(vldtr.is_valid([]))
+        self.assertRaises(TT.ValidationError, vldtr.validate, {})
+
+    def test_40_validate(self):
+        (ret, msg) = TT.validate({'b': [{}]}, self.scm)
+        self.assertFalse(ret)
+        self.assertTrue(msg)
+
+        (ret, msgs) = TT.validate({'b': [{}]}, self.scm,
+                                  ac_schema_errors=True)
+        self.assertFalse(ret)
+        self.assertEqual(len(msgs), 2)  # 'a' is required, 'b' is too short
+
+    def test_50_validate__ng_no_safe(self):
+        import jsonschema
+        for opts in (dict(), dict(ac_schema_jobs=2)):
+            self.assertRaises(jsonschema.ValidationError, TT.validate,
+                              {'b': [{}]}, self.scm, ac_schema_safe=False,
+                              **opts)
+
+    def test_60_compile_schema__invalid_schema(self):
+        import jsonschema
+        self.assertRaises(jsonschema.SchemaError, TT.compile_schema,
+                          {"type": "object", "required": "a"})
+
+
+class Test_16_Parallel_Validation(Test_00_Base):
+
+    scm = {"type": "array", "minItems": 1,
+           "items": {"type": "object",
+                     "properties": {"a": {"type": "integer"}}}}
+
+    def _data(self, nitems=100):
+        return [{'a': i if i % 10 else str(i)} for i in range(nitems)]
+
+    def test_10_validate__errors_w_paths(self):
+        (ret, msgs) = TT.validate(self._data(20), self.scm,
+                                  ac_schema_errors=True)
+        self.assertFalse(ret)
+        self.assertEqual(msgs, ["/0/a: '0' is not of type 'integer'",
+                                "/10/a: '10' is not of type 'integer'"])
+
+        (ret, msgs) = TT.validate(self._data(20), self.scm,
+                                  ac_schema_errors=True,
+                                  ac_schema_error_paths=False)
+        self.assertFalse(ret)
+        self.assertEqual(msgs, ["'0' is not of type 'integer'",
+                                "'10' is not of type 'integer'"])
+
+    def test_20_validate__parallel(self):
+        ref = TT.validate(self._data(), self.scm, ac_schema_errors=True)
+        res = TT.validate(self._data(), self.scm, ac_schema_errors=True,
+                          ac_schema_jobs=2, ac_schema_chunk_size=7)
+        self.assertEqual(res, ref)
+
+        (ret, msg) = TT.validate(self._data(), self.scm, ac_schema_jobs=2,
+                                 ac_schema_chunk_size=7,
+                                 ac_schema_error_paths=True)
+        self.assertFalse(ret)
+        self.assertTrue(msg.startswith("/0/a: "), msg)
+
+    def test_30_validate__max_errors(self):
+        for opts in (dict(), dict(ac_schema_jobs=2, ac_schema_chunk_size=7)):
+            (ret, msgs) = TT.validate(self._data(), self.scm,
+                                      ac_schema_errors=True,
+                                      ac_schema_max_errors=3, **opts)
+            self.assertFalse(ret)
+            self.assertEqual(len(msgs), 3, opts)
+
+    def test_40_validate_many(self):
+        objs = [{'a': 1}, {'a': "1"}, {'a': 2}, {'a': "2"}]
+        ref = ["/1/a: '1' is not of type 'integer'",
+               "/3/a: '2' is not of type 'integer'"]
+        for opts in (dict(), dict(ac_schema_jobs=2)):
+            (ret, msgs) = TT.validate_many(objs, self.scm["items"], **opts)
+            self.assertFalse(ret)
+            self.assertEqual(msgs, ref)
+
+        self.assertTrue(TT.validate_many(objs[::2], self.scm["items"])[0])
+
+    def test_42_validate_many__keep_validator_cls(self):
+        scm = {"$schema": "http://json-schema.org/draft-03/schema#",
+               "type": "object",
+               "properties": {"a": {"type": "integer", "divisibleBy": 2}}}
+        (ret, msgs) = TT.validate_many([{'a': 2}, {'a': 3}], scm)
+        self.assertFalse(ret)  # 'divisibleBy' is only in Draft 3.
+        self.assertEqual(len(msgs), 1)
+        self.assertTrue(msgs[0].startswith("/1/a: "), msgs)
+
+
+class Test_18_IncrementalValidator(Test_00_Base):
+
+    scm = {"type": "object", "required": ["a", "b"],
+           "properties": {"a": {"type": "integer"},
+                          "b": {"type": "array", "minItems": 2,
+                                "items": {"type": "object",
+                                          "required": ["c"],
+                                          "properties": {
+                                              "c": {"type": "string"}}}},
+                          "d": {"type": "object",
+                                "additionalProperties": {
+                                    "type": "integer"}}}}
+
+    def _assert_same_as_full_validation(self, vldtr, data, **kwargs):
+        ref = IncrementalValidator(self.scm).validate(data)
+        res = vldtr.validate(data, **kwargs)
+        self.assertEqual(res, ref)
+        return res
+
+    def test_10_validate(self):
+        vldtr = IncrementalValidator(self.scm)
+        data = dict(a=1, b=[dict(c="x"), dict(c="y")], d=dict(e=0))
+        self.assertEqual(vldtr.validate(data), (True, []))
+
+        data2 = copy.deepcopy(data)
+        data2["a"] = "1"
+        data2["b"][1]["c"] = 2
+        data2["d"]["e"] = "0"
+        (ret, msgs) = self._assert_same_as_full_validation(vldtr, data2,
+                                                           previous=data)
+        self.assertFalse(ret)
+        self.assertEqual(len(msgs), 3, msgs)
+
+        data3 = copy.deepcopy(data2)
+        data3["a"] = 2
+        del data3["b"][1]["c"]
+        (ret, msgs) = self._assert_same_as_full_validation(
+            vldtr, data3, changed=["a", ("b", 1, "c")]
+        )
+        self.assertEqual(len(msgs), 2, msgs)
+
+        data4 = copy.deepcopy(data3)
+        del data4["b"]
+        data4["d"] = dict(e=1)
+        (ret, msgs) = self._assert_same_as_full_validation(vldtr, data4,
+                                                           previous=data3)
+        self.assertEqual(msgs, ["'b' is a required property"])
+
+        (ret, msgs) = self._assert_same_as_full_validation(vldtr, data,
+                                                           previous=data4)
+        self.assertTrue(ret)
+
+    def test_20_validate__only_changed(self):
+        vldtr = IncrementalValidator(self.scm)
+        data = dict(a="1", b=[dict(c="x"), dict(c="y")])
+        (ret, msgs) = vldtr.validate(data)
+        self.assertEqual(len(msgs), 1)
+
+        # Errors in the values not changed are kept as they are.
+        data["b"][0]["c"] = 0
+        (ret, msgs) = vldtr.validate(data, changed=["/b/0/c"])
+        self.assertEqual(len(msgs), 2)
+        self.assertEqual(vldtr.validate(data, changed=[]), (ret, msgs))
+
+
 class Test_12_Validation_Errors(Test_00_Base):
 
     obj = dict(a=1, b=2.0)
@@ -166,4 +426,50 @@ class Test_30_GenStrictSchema(Test_00_Base):
         scm = _gen_scm(self.obj2)
         self.assertTrue(TT.validate(self.obj2, scm))
 
+
+class Test_32_GenSchema_Merged(unittest.TestCase):
+
+    objs = [dict(a=1, b="b"), dict(a=1.5, c=[True]), "x", None]
+
+    def test_10_gen_schema__heterogeneous_array(self):
+        scm = TT.gen_schema(self.objs)
+        alts = scm["items"]["anyOf"]
+        self.assertEqual(sorted(s["type"] for s in alts),
+                         ["null", "object", "string"])
+
+        oscm = [s for s in alts if s["type"] == "object"][0]
+        self.assertEqual(oscm["properties"]["a"], {"type": "number"})
+        self.assertEqual(sorted(oscm["properties"].keys()), ["a", "b", "c"])
+
+        self.assertTrue(TT.validate(self.objs, scm)[0])
+        self.assertFalse(TT.validate([1], scm)[0])
+
+    def test_12_gen_schema__heterogeneous_array__strict(self):
+        scm = _gen_scm([dict(a=1, b=2), dict(a=3), dict(a=3)])
+        self.assertEqual(scm["minItems"], 3)
+        self.assertFalse(scm["uniqueItems"])
+        self.assertEqual(scm["items"]["required"], ["a"])
+
+    def test_20_gen_schema__sampled(self):
+        arr = [0, "x", 2, "y"]
+        scm = TT.gen_schema(arr, ac_schema_sample_rate=0.5)
+        self.assertEqual(scm["items"], {"type": "integer"})
+
+        scm = TT.gen_schema(iter(arr), ac_schema_sample_rate=0.5,
+                            ac_schema_strict=True)
+        self.assertEqual(scm["minItems"], 4)
+
+    def test_30_merge_schema__fragments(self):
+        scm = TT.merge_schema(_gen_scm(dict(a=1, b=[1])),
+                              _gen_scm(dict(a="a", b=[2, 2])))
+        self.assertEqual(scm["required"], ["a", "b"])
+        self.assertEqual(sorted(s["type"] for s
+                                in scm["properties"]["a"]["anyOf"]),
+                         ["integer", "string"])
+        self.assertEqual(scm["properties"]["b"]["minItems"], 1)
+        self.assertFalse(scm["properties"]["b"]["uniqueItems"])
+
+        scm2 = TT.merge_schema(scm, _gen_scm(dict(a=None, b=[])))
+        self.assertEqual(len(scm2["properties"]["a"]["anyOf"]), 3)
+
 # vim:sw=4:ts=4:et:
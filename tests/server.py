@@ -0,0 +1,144 @@
+#
+# Copyright (C) 2017 Satoru SATOH <ssato @ redhat.com>
+# License: MIT
+#
+# pylint: disable=missing-docstring, invalid-name, protected-access
+from __future__ import absolute_import
+
+import json
+import os
+import os.path
+import socket
+import sys
+import threading
+import time
+import unittest
+
+import mock
+
+import anyconfig.api
+import anyconfig.cli
+import anyconfig.server as TT
+import tests.common
+
+
+class Test_10_Server(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tests.common.setup_workdir()
+        self.infile = os.path.join(self.workdir, "a.json")
+        anyconfig.api.dump(dict(a=dict(b=1, c=[1, 2]), name="a"),
+                           self.infile)
+        self.server = TT.Server(os.path.join(self.workdir, "a.sock"))
+
+    def tearDown(self):
+        tests.common.cleanup_workdir(self.workdir)
+
+    def _process(self, *args):
+        return self.server.process(["--silent"] + list(args), self.workdir)
+
+    def test_10_process(self):
+        res = self._process("--get", "a.b", self.infile)
+        self.assertEqual(res, dict(rc=0, stdout="1" + os.linesep, stderr=""))
+
+        res = self._process("--get", "a.x", self.infile)
+        self.assertEqual(res["rc"], 1)
+        self.assertTrue(res["stderr"])
+
+    def test_20_process__cached(self):
+        with mock.patch("anyconfig.api.load",
+                        wraps=anyconfig.api.load) as load:
+            for _ in range(3):
+                res = self._process("--get", "name", "a.json")
+                self.assertEqual(res["stdout"].strip(), "a")
+            self.assertEqual(load.call_count, 1)
+
+            time.sleep(0.01)
+            anyconfig.api.dump(dict(name="b"), self.infile)
+            os.utime(self.infile, (time.time() + 10, time.time() + 10))
+            res = self._process("--get", "name", "a.json")
+            self.assertEqual(res["stdout"].strip(), "b")
+            self.assertEqual(load.call_count, 2)
+
+    def test_22_process__set_does_not_modify_cache(self):
+        res = self._process("--set", "a.b=2", "-O", "json", self.infile)
+        self.assertEqual(json.loads(res["stdout"])["a"]["b"], 2)
+
+        res = self._process("--get", "a.b", self.infile)
+        self.assertEqual(res["stdout"].strip(), "1")
+
+    def test_24_process__wo_changing_globals(self):
+        (cwd, out) = (os.getcwd(), sys.stdout)
+        res = self._process("-O", "json", "-o", "out.json", "a.json")
+        self.assertEqual(res["rc"], 0)
+        self.assertTrue(os.path.exists(os.path.join(self.workdir,
+                                                    "out.json")))
+        self.assertEqual(os.getcwd(), cwd)
+        self.assertTrue(sys.stdout is out)
+
+        res = self._process("--no-such-option", "a.json")
+        self.assertEqual(res["rc"], 2)
+        self.assertTrue("--no-such-option" in res["stderr"])
+
+        res = self._process("--list")
+        self.assertEqual(res["rc"], 0)
+        self.assertTrue(res["stdout"].startswith("Supported config types"))
+
+    def test_26_load__cache_is_bounded(self):
+        with mock.patch("anyconfig.server._CACHE_MAX", 2):
+            for idx in range(3):
+                res = self._process("--get", "name", "-M", "merge_dicts",
+                                    "-I", "json", "-x", "a.json" + "*" * idx)
+                self.assertEqual(res["stdout"].strip(), "a")
+                self.assertTrue(len(self.server._cache) <= 2)
+
+    def test_30_serve_and_request(self):
+        thr = threading.Thread(target=self.server.serve_forever)
+        thr.start()
+        try:
+            for _ in range(100):
+                if os.path.exists(self.server.sockpath):
+                    break
+                time.sleep(0.01)
+
+            res = TT.request(self.server.sockpath,
+                             dict(argv=["-s", "--get", "a.c", self.infile]))
+            self.assertEqual(res["rc"], 0)
+            self.assertEqual(json.loads(res["stdout"]), [1, 2])
+
+            try:
+                anyconfig.cli.main(["dummy", "--connect",
+                                    self.server.sockpath, "-s", "--get",
+                                    "name", self.infile])
+            except SystemExit as exc:
+                self.assertEqual(exc.code, 0)
+
+            res = TT.request(self.server.sockpath, dict(op="reload"))
+            self.assertEqual(res["rc"], 0)
+        finally:
+            TT.request(self.server.sockpath, dict(op="shutdown"))
+            thr.join()
+
+        self.assertFalse(os.path.exists(self.server.sockpath))
+
+    def test_40_serve__timeout(self):
+        self.server.timeout = 0.1
+        thr = threading.Thread(target=self.server.serve_forever)
+        thr.start()
+        try:
+            for _ in range(100):
+                if os.path.exists(self.server.sockpath):
+                    break
+                time.sleep(0.01)
+
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.server.sockpath)  # Send nothing.
+                self.assertEqual(sock.recv(1), b"")  # Closed by the server.
+            finally:
+                sock.close()
+        finally:
+            TT.request(self.server.sockpath, dict(op="shutdown"))
+            thr.join()
+
+# vim:sw=4:ts=4:et:
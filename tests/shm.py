@@ -0,0 +1,116 @@
+#
+# Copyright (C) 2017 Satoru SATOH <ssato @ redhat.com>
+# License: MIT
+#
+# pylint: disable=missing-docstring, invalid-name, protected-access
+from __future__ import absolute_import
+
+import multiprocessing
+import os.path
+import unittest
+
+import anyconfig.api
+import anyconfig.compat
+import anyconfig.shm as TT
+import tests.common
+
+
+CNF = dict(a=1, b=dict(b1=[1, 2], b2="xyz"), c=u"あ")
+
+
+def _read_in_child(name, queue):
+    with TT.attach(name) as cnf:
+        queue.put((cnf.version, cnf["b"]["b2"]))
+
+
+class Test_10_dumps_loads(unittest.TestCase):
+
+    def test_10_dumps_loads(self):
+        self.assertEqual(TT.loads(TT.dumps(CNF)), CNF)
+
+    def test_20_dumps_loads__pickle(self):
+        cnf = dict(a=anyconfig.compat.OrderedDict((("b", 1), ("a", 2))))
+        content = TT.dumps(cnf)
+        self.assertEqual(content[len(TT.MAGIC):len(TT.MAGIC) + 1], b"P")
+        self.assertEqual(TT.loads(content), cnf)
+
+    def test_30_dumps__not_mapping(self):
+        self.assertRaises(ValueError, TT.dumps, [1, 2])
+
+
+@unittest.skipIf(not TT.SUPPORTED, "shared memory is not available")
+class Test_20_publish_attach(unittest.TestCase):
+
+    def setUp(self):
+        self.pub = TT.Publisher()
+
+    def tearDown(self):
+        self.pub.close()
+
+    def test_10_attach__not_published(self):
+        self.assertRaises(ValueError, TT.attach, self.pub.name)
+
+    def test_20_publish_and_attach(self):
+        self.assertEqual(self.pub.publish(CNF), 1)
+        with TT.attach(self.pub.name) as cnf:
+            self.assertEqual(cnf.version, 1)
+            self.assertEqual(len(cnf), 3)
+            self.assertTrue("b" in cnf)
+            self.assertEqual(dict(cnf), CNF)
+            self.assertTrue(cnf["b"] is cnf["b"])  # Cached.
+            self.assertRaises(KeyError, cnf.__getitem__, "x")
+
+    def test_30_refresh(self):
+        self.pub.publish(CNF)
+        with TT.attach(self.pub.name) as cnf:
+            self.assertFalse(cnf.refresh())
+            self.assertEqual(cnf["a"], 1)
+
+            self.assertEqual(self.pub.publish(dict(a=2, d=3)), 2)
+            self.assertEqual(cnf["a"], 1)  # Not switched until refresh.
+            self.assertTrue(cnf.refresh())
+            self.assertEqual(cnf.version, 2)
+            self.assertEqual(dict(cnf), dict(a=2, d=3))
+
+    def test_40_attach_in_child(self):
+        self.pub.publish(CNF)
+        ctx = multiprocessing.get_context("fork")
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_read_in_child,
+                           args=(self.pub.name, queue))
+        proc.start()
+        res = queue.get(timeout=10)
+        proc.join()
+
+        self.assertEqual(res, (1, "xyz"))
+        # Segments must be kept after the child exited.
+        with TT.attach(self.pub.name) as cnf:
+            self.assertEqual(cnf["a"], 1)
+
+
+@unittest.skipIf(not TT.SUPPORTED, "shared memory is not available")
+class Test_30_publish(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tests.common.setup_workdir()
+        self.path = os.path.join(self.workdir, "a.json")
+        anyconfig.api.dump(CNF, self.path)
+
+    def tearDown(self):
+        tests.common.cleanup_workdir(self.workdir)
+
+    def test_10_publish_and_load(self):
+        with TT.publish(self.path) as pub:
+            with TT.attach(pub.name) as cnf:
+                self.assertEqual(dict(cnf), CNF)
+
+                anyconfig.api.dump(dict(a=3), self.path)
+                self.assertEqual(pub.load(self.path), 2)
+                cnf.refresh()
+                self.assertEqual(dict(cnf), dict(a=3))
+
+    def test_20_publish__failed(self):
+        self.assertRaises(IOError, TT.publish,
+                          os.path.join(self.workdir, "not_exist.json"))
+
+# vim:sw=4:ts=4:et:
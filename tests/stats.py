@@ -0,0 +1,119 @@
+#
+# Copyright (C) 2017 Satoru SATOH <ssato @ redhat.com>
+# License: MIT
+#
+# pylint: disable=missing-docstring, invalid-name
+from __future__ import absolute_import
+
+import os.path
+import unittest
+
+import anyconfig.api
+import anyconfig.stats as TT
+import anyconfig.template
+import tests.common
+
+
+class Test_10_Hooks(unittest.TestCase):
+
+    def setUp(self):
+        self.events = []
+        TT.add_hook(self.events.append)
+
+    def tearDown(self):
+        TT.remove_hook(self.events.append)
+
+    def test_10_emit(self):
+        TT.emit("test", size=1)
+        self.assertEqual(self.events, [dict(event="test", size=1)])
+
+    def test_20_emit__hook_failed(self):
+        def hook(_event):
+            raise RuntimeError("failed")
+
+        TT.add_hook(hook)
+        try:
+            TT.emit("test")
+        finally:
+            TT.remove_hook(hook)
+
+        self.assertEqual(len(self.events), 1)
+
+    def test_30_disabled(self):
+        TT.remove_hook(self.events.append)
+        self.assertFalse(TT.enabled())
+        self.assertTrue(TT.timer() is None)
+
+        anyconfig.api.loads('{"a": 1}', ac_parser="json")
+        self.assertEqual(self.events, [])
+
+
+class Test_20_Events(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tests.common.setup_workdir()
+        self.registry = TT.enable(TT.Registry())
+
+    def tearDown(self):
+        TT.disable(self.registry)
+        tests.common.cleanup_workdir(self.workdir)
+
+    def test_10_load_and_dump(self):
+        path = os.path.join(self.workdir, "a.json")
+        anyconfig.api.dump(dict(a=1, b=dict(c=2)), path)
+        cnf = anyconfig.api.load(path)
+        anyconfig.api.merge(cnf, dict(b=dict(d=3)))
+        anyconfig.api.validate(cnf, {"type": "object"})
+
+        cnts = self.registry.snapshot()
+        for name in ("load", "parse", "parse.json", "merge", "validate",
+                     "dump", "dump.json"):
+            self.assertEqual(cnts[name]["count"], 1, name)
+
+        size = os.path.getsize(path)
+        self.assertEqual(cnts["parse.json"]["size"], size)
+        self.assertEqual(cnts["dump.json"]["size"], size)
+        self.assertTrue(cnts["load"]["duration"] > 0)
+
+    def test_20_render(self):
+        if not anyconfig.template.SUPPORTED:
+            return
+
+        path = os.path.join(self.workdir, "a.yml")
+        open(path, 'w').write("a: {{ a }}")
+        for _ in range(2):
+            anyconfig.api.load(path, ac_template=True, ac_context=dict(a=1))
+
+        cnts = self.registry.snapshot()
+        self.assertEqual(cnts["render"]["count"], 2)
+        self.assertEqual(cnts["tmpl_env"]["hit"], 1)
+
+    def test_12_glob(self):
+        for name in ("a.json", "b.json"):
+            anyconfig.api.dump(dict(a=1), os.path.join(self.workdir, name))
+
+        anyconfig.api.single_load(os.path.join(self.workdir, "a.json"))
+        anyconfig.api.load(os.path.join(self.workdir, "*.json"))
+
+        cnts = self.registry.snapshot()
+        self.assertEqual(cnts["glob"]["count"], 2)
+        self.assertEqual(cnts["glob"]["size"], 3)  # 1 + 2 paths.
+
+    def test_14_parse_and_dump__bytes(self):
+        content = anyconfig.api.dumps(dict(a=u"\u3042"), "json",
+                                      ensure_ascii=False)
+        anyconfig.api.loads(content, ac_parser="json")
+
+        cnts = self.registry.snapshot()
+        size = len(content.encode("utf-8"))
+        self.assertTrue(size > len(content))
+        self.assertEqual(cnts["dump.json"]["size"], size)
+        self.assertEqual(cnts["parse.json"]["size"], size)
+
+    def test_30_reset(self):
+        TT.emit("test")
+        self.assertTrue(self.registry.snapshot())
+        self.registry.reset()
+        self.assertEqual(self.registry.snapshot(), {})
+
+# vim:sw=4:ts=4:et:
@@ -3,6 +3,7 @@
 # License: MIT
 #
 # pylint: disable=missing-docstring, unused-variable, invalid-name
+# pylint: disable=protected-access
 import os.path
 import os
 import unittest
@@ -109,6 +110,14 @@ class Test(unittest.TestCase):
             self.assertNotEqual(c_r, "aaa")
             self.assertEqual(c_r, self.templates[0][-1])
 
+    def test_26_template_not_found__jinja2s(self):
+        if TT.SUPPORTED:
+            import jinja2.exceptions
+            self.assertTrue(TT.TemplateNotFound is
+                            jinja2.exceptions.TemplateNotFound)
+            self.assertRaises(jinja2.exceptions.TemplateNotFound, TT.render,
+                              os.path.join(self.workdir, "not_exist.j2"))
+
     def test_30_try_render_with_empty_filepath_and_content(self):
         if TT.SUPPORTED:
             try:
@@ -117,4 +126,67 @@ class Test(unittest.TestCase):
                 exc_was_raised = True
             self.assertTrue(exc_was_raised)
 
+
+class Test_40_Cache(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tests.common.setup_workdir()
+        self.cachedir = os.path.join(self.workdir, "cache")
+        self.tmpl = os.path.join(self.workdir, "a.j2")
+        open(self.tmpl, 'w').write("a: {{ a }}")
+
+    def tearDown(self):
+        tests.common.cleanup_workdir(self.workdir)
+
+    def test_10_tmpl_env__cached(self):
+        if TT.SUPPORTED:
+            self.assertTrue(TT.tmpl_env([self.workdir]) is
+                            TT.tmpl_env([self.workdir]))
+
+    def test_20_render__w_bytecode_cache(self):
+        if TT.SUPPORTED:
+            with mock.patch.dict(os.environ,
+                                 {TT.CACHE_DIR_ENVVAR: self.cachedir}):
+                self.assertEqual(TT.render(self.tmpl, dict(a=1)), "a: 1")
+                self.assertTrue(os.listdir(self.cachedir))
+
+                TT._ENVS.clear()  # Compiled code should be loaded from disk.
+                self.assertEqual(TT.render(self.tmpl, dict(a=2)), "a: 2")
+
+    def test_22_render__wo_bytecode_cache(self):
+        if TT.SUPPORTED:
+            with mock.patch.dict(os.environ, {TT.CACHE_DIR_ENVVAR: ""}):
+                env = TT.tmpl_env([self.workdir])
+                self.assertTrue(env.bytecode_cache is None)
+
+    def test_24_render__bytecode_cache_disabled_by_default(self):
+        if TT.SUPPORTED:
+            with mock.patch.dict(os.environ):
+                os.environ.pop(TT.CACHE_DIR_ENVVAR, None)
+                env = TT.tmpl_env([self.workdir])
+                self.assertTrue(env.bytecode_cache is None)
+
+    def test_30_precompile(self):
+        if TT.SUPPORTED:
+            subdir = os.path.join(self.workdir, "conf.d")
+            os.makedirs(subdir)
+            tmpl2 = os.path.join(subdir, "b.yml")
+            open(tmpl2, 'w').write("b: {{ b }}")
+            open(os.path.join(subdir, "c.yml"), 'w').write("{% if %}")
+
+            res = TT.precompile([self.workdir], cache_dir=self.cachedir)
+            self.assertEqual(res, [self.tmpl, tmpl2])
+
+            TT._ENVS.clear()
+            mpt = "jinja2.Environment.compile"
+            with mock.patch.dict(os.environ,
+                                 {TT.CACHE_DIR_ENVVAR: self.cachedir}):
+                with mock.patch(mpt, side_effect=AssertionError):
+                    self.assertEqual(TT.render(tmpl2, dict(b=1)), "b: 1")
+
+    def test_32_main(self):
+        if TT.SUPPORTED:
+            TT.main(["-p", "*.j2", "-C", self.cachedir, self.workdir])
+            self.assertTrue(os.listdir(self.cachedir))
+
 # vim:sw=4:ts=4:et: